@@ -1,6 +1,6 @@
 from flask import Flask
 from flask_cors import CORS
-from config import FLASK_PORT, FLASK_DEBUG, FLASK_ENV
+from config import FLASK_PORT, FLASK_DEBUG, FLASK_ENV, BACKGROUND_MIGRATIONS_ENABLED, REAPER_ENABLED
 import os
 
 # Import blueprints
@@ -12,6 +12,11 @@ from routes.typing import typing_bp
 from routes.written import written_bp
 from routes.personality import personality_bp
 from routes.users import users_bp
+from utils.audio_assets import build_audio_index
+from utils.migrations import start_background_migrations
+from utils.expiry import start_background_reaper
+from utils.indexes import ensure_indexes
+from utils.session import init_session_unit_of_work
 
 def create_app():
     """Create and configure the Flask application"""
@@ -40,6 +45,36 @@ def create_app():
     app.register_blueprint(personality_bp)
     app.register_blueprint(users_bp)
     
+    # Report MongoDB operations per request while debugging (registered first so it runs after the flush)
+    if FLASK_DEBUG:
+        @app.after_request
+        def report_db_operations(response):
+            from flask import request, g
+            operations = g.get('db_operations', 0)
+            response.headers['X-DB-Operations'] = str(operations)
+            print(f"{request.method} {request.path}: {operations} MongoDB operations")
+            return response
+    
+    # Coalesce each request's session changes into one write at the end of the request
+    init_session_unit_of_work(app)
+    
+    # Index question audio once so audio lookups never touch the filesystem
+    build_audio_index()
+    
+    # Persist schema upgrades in the background (reads upgrade documents in memory meanwhile)
+    if BACKGROUND_MIGRATIONS_ENABLED:
+        start_background_migrations()
+    
+    # Create the indexes every lookup relies on, including the TTL indexes that expire stamped documents
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Warning: Could not create indexes: {e}")
+    
+    # Expire abandoned sessions the TTL indexes can't cover
+    if REAPER_ENABLED:
+        start_background_reaper()
+    
     # Add a simple test route to verify CORS
     @app.route('/test-cors', methods=['GET', 'OPTIONS'])
     def test_cors():
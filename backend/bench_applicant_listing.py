@@ -0,0 +1,111 @@
+"""
+Benchmark: MongoDB round trips and time for one admin applicant listing page as temporary applicants grow
+
+Runs against the MongoDB configured in .env using throwaway temporary applicants, which are removed afterwards.
+
+Usage:
+    python bench_applicant_listing.py [--sizes 10,50,200] [--repeat 5] [--naive]
+
+--naive also times the previous per-applicant pattern (one evaluation and one comments query each).
+"""
+
+import argparse
+import sys
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import g
+from app import create_app
+from utils.db import db
+from utils.applicant_listing import list_applicant_summaries, LISTING_TIMESTAMP_FIELD, parse_timestamp
+from utils.file_ops import load_all_temp_applicants, load_temp_evaluation, load_temp_comments
+
+
+def seed(prefix, count):
+    """Insert count temporary applicants, each with evaluations and a comment"""
+    start = datetime.utcnow() + timedelta(days=3650)  # Newer than any real applicant, so they fill the first page
+    db.temp_applicants.insert_many([{
+        "sessionId": f"{prefix}_{i:05d}",
+        "timestamp": (start + timedelta(seconds=i)).isoformat(),
+        LISTING_TIMESTAMP_FIELD: parse_timestamp(start + timedelta(seconds=i)),
+        "applicant": {"firstName": f"Bench {i}", "lastName": "Applicant", "positionApplied": "Benchmark"}
+    } for i in range(count)])
+    db.temp_evaluations.insert_many([{
+        "sessionId": f"{prefix}_{i:05d}",
+        "speech_eval": [{"transcript": "x" * 500, "evaluation": {"score": 7}}] * 5,
+        "listening_test": [{"accuracy_percentage": 80}] * 5,
+        "written_test": [{"score_percentage": 75}],
+        "personality_test": [],
+        "typing_test": [{"words_per_minute": 40}]
+    } for i in range(count)])
+    db.temp_comments.insert_many([{
+        "sessionId": f"{prefix}_{i:05d}",
+        "comments": [{"id": "1", "text": "Benchmark comment"}]
+    } for i in range(count)])
+
+
+def cleanup(prefix):
+    """Remove the benchmark documents"""
+    query = {"sessionId": {"$regex": f"^{prefix}_"}}
+    for collection_name in ["temp_applicants", "temp_evaluations", "temp_comments"]:
+        db[collection_name].delete_many(query)
+
+
+def naive_listing():
+    """The previous pattern: every temporary applicant, then its evaluation and comments one by one"""
+    applicants = []
+    for temp_applicant in load_all_temp_applicants():
+        session_id = temp_applicant.get("sessionId")
+        applicants.append({
+            "applicant": temp_applicant,
+            "evaluation": load_temp_evaluation(session_id),
+            "comments": load_temp_comments(session_id)
+        })
+    return applicants
+
+
+def measure(app, listing, repeat):
+    """Best time (ms), MongoDB round trips and rows for one listing call"""
+    best = None
+    for _ in range(repeat):
+        with app.test_request_context():
+            started = time.perf_counter()
+            rows = listing()
+            elapsed = (time.perf_counter() - started) * 1000
+            operations = g.get('db_operations', 0)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, operations, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Applicant listing round-trip benchmark")
+    parser.add_argument("--sizes", default="10,50,200", help="Comma-separated temporary applicant counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per size (best time is reported)")
+    parser.add_argument("--naive", action="store_true", help="Also run the previous per-applicant queries")
+    args = parser.parse_args()
+
+    app = create_app()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    prefix = f"bench_{uuid.uuid4().hex[:8]}"
+    seeded = 0
+    print(f"{'applicants':>10}  {'pipeline ms':>11}  {'round trips':>11}  {'rows':>5}" + ("  {:>8}  {:>11}".format("naive ms", "round trips") if args.naive else ""))
+    try:
+        for size in sizes:
+            if size > seeded:
+                seed(f"{prefix}_{size}", size - seeded)
+                seeded = size
+            elapsed, operations, page = measure(app, lambda: list_applicant_summaries(limit=size), args.repeat)
+            line = f"{size:>10}  {elapsed:>11.1f}  {operations:>11}  {len(page['applicants']):>5}"
+            if args.naive:
+                naive_elapsed, naive_operations, _ = measure(app, naive_listing, args.repeat)
+                line += f"  {naive_elapsed:>8.1f}  {naive_operations:>11}"
+            print(line)
+    finally:
+        cleanup(prefix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Check: page through the admin applicant listing across both collections and verify every applicant appears exactly once, in order
+
+Seeds permanent and temporary applicants whose application times were written in every format found in the data
+(ISO strings with and without "Z", UTC offsets, micro- and millisecond fractions, BSON dates, missing), including
+ties across the two collections. Runs against the MongoDB configured in .env; the documents are removed afterwards.
+
+Usage:
+    python check_applicant_paging.py [--page-sizes 1,2,3,5,50]
+"""
+
+import argparse
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.db import db
+from utils.applicant_listing import list_applicant_summaries, parse_timestamp
+from utils.file_ops import save_applicant, save_temp_applicant
+
+
+def timestamp_formats(base):
+    """The same kinds of values application timestamps were stored as"""
+    return [
+        base.isoformat() + "Z",  # Server time, microseconds
+        base.isoformat(),  # No zone (treated as UTC)
+        base.strftime("%Y-%m-%dT%H:%M:%S.") + f"{base.microsecond // 1000:03d}Z",  # Browser toISOString()
+        (base.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=8)))).isoformat(),  # Local offset
+        base,  # BSON date
+        None  # Never recorded
+    ]
+
+
+def seed(prefix):
+    """Insert applicants in both collections; returns {id: application time} for the expected order"""
+    expected = {}
+    base = datetime(2031, 5, 4, 12, 0, 0, 123456)
+    for i in range(12):
+        moment = base + timedelta(minutes=i // 2)  # Pairs share a minute, so string and date forms interleave
+        for j, stamp in enumerate(timestamp_formats(moment)):
+            permanent = (i + j) % 2 == 0
+            applicant_id = f"{prefix}_{i:02d}_{j}"
+            info = {"firstName": prefix, "lastName": f"Paging {i} {j}"}
+            if permanent:
+                save_applicant({"id": applicant_id, "applicant_info": info, "application_timestamp": stamp})
+            else:
+                save_temp_applicant({"sessionId": applicant_id, "applicant": info, "timestamp": stamp}, applicant_id)
+            expected[applicant_id] = parse_timestamp(stamp)
+    # Identical instants in both collections, told apart only by id
+    tie = base + timedelta(days=1)
+    save_applicant({"id": f"{prefix}_tie_a", "applicant_info": {"firstName": prefix}, "application_timestamp": tie.isoformat() + "Z"})
+    save_temp_applicant({"sessionId": f"{prefix}_tie_b", "applicant": {"firstName": prefix}, "timestamp": tie}, f"{prefix}_tie_b")
+    expected[f"{prefix}_tie_a"] = expected[f"{prefix}_tie_b"] = parse_timestamp(tie)
+    return expected
+
+
+def cleanup(prefix):
+    """Remove the seeded documents"""
+    db.applicants.delete_many({"id": {"$regex": f"^{prefix}_"}})
+    db.temp_applicants.delete_many({"sessionId": {"$regex": f"^{prefix}_"}})
+
+
+def page_through(prefix, page_size):
+    """Every id the listing returns for the seeded applicants, following next_cursor to the end"""
+    ids = []
+    cursor = None
+    while True:
+        page = list_applicant_summaries(cursor=cursor, limit=page_size, search=prefix)
+        ids.extend(summary["id"] for summary in page["applicants"])
+        if not page["has_more"]:
+            return ids
+        cursor = page["next_cursor"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Applicant listing keyset paging check")
+    parser.add_argument("--page-sizes", default="1,2,3,5,50", help="Comma-separated page sizes to page through with")
+    args = parser.parse_args()
+
+    prefix = f"paging{uuid.uuid4().hex[:8]}"
+    failures = 0
+    try:
+        expected = seed(prefix)
+        order = sorted(expected, key=lambda i: (expected[i] is not None, expected[i] or datetime.min, i), reverse=True)
+        for page_size in [int(size) for size in args.page_sizes.split(",")]:
+            ids = page_through(prefix, page_size)
+            duplicates = sorted({i for i in ids if ids.count(i) > 1})
+            missing = sorted(set(order) - set(ids))
+            ok = ids == order
+            failures += not ok
+            print(f"[{'OK' if ok else 'FAIL'}] page size {page_size}: {len(ids)}/{len(order)} applicants"
+                  + (f", duplicated {duplicates}" if duplicates else "")
+                  + (f", skipped {missing}" if missing else "")
+                  + (", out of order" if not ok and not duplicates and not missing else ""))
+    finally:
+        cleanup(prefix)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
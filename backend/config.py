@@ -14,6 +14,21 @@ TYPING_TESTS_FILE = "data/questions/typing_tests.json"
 WRITTEN_TEST_QUESTIONS_FILE = "data/questions/written_test_questions.json"
 USERS_FILE = "data/users.json"
 
+# Question audio assets (absolute so lookups don't depend on the working directory)
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+LISTENING_QUESTIONS_AUDIO_DIR = os.path.join(BACKEND_DIR, "data", "questions", "listening_questions_audio")
+SPEECH_QUESTIONS_AUDIO_DIR = os.path.join(BACKEND_DIR, "data", "questions", "speech_questions_audio")
+TTS_CACHE_DIR = os.path.join(BACKEND_DIR, "data", "tts_cache")
+AUDIO_SPRITE_DIR = os.path.join(BACKEND_DIR, "data", "audio_sprites")
+
+# Listening test audio sprites (one compressed file per session plus an offset table)
+LISTENING_AUDIO_SPRITE_ENABLED = os.getenv("LISTENING_AUDIO_SPRITE_ENABLED", "false").lower() == "true"
+AUDIO_SPRITE_FORMAT = os.getenv("AUDIO_SPRITE_FORMAT", "mp3")  # mp3, ogg or flac (falls back if unsupported)
+AUDIO_SPRITE_GAP_SECONDS = float(os.getenv("AUDIO_SPRITE_GAP_SECONDS", "0.3"))  # Silence between clips
+AUDIO_SPRITE_CACHE_MAX_ENTRIES = int(os.getenv("AUDIO_SPRITE_CACHE_MAX_ENTRIES", "256"))  # Manifests kept per worker
+AUDIO_SPRITE_MAX_AGE_HOURS = float(os.getenv("AUDIO_SPRITE_MAX_AGE_HOURS", "24"))  # Reaper deletes older sprite files
+AUDIO_SPRITE_MAX_FILES = int(os.getenv("AUDIO_SPRITE_MAX_FILES", "500"))  # Reaper keeps at most this many sprites
+
 # Legacy admin credentials (for migration/fallback) - DEPRECATED
 # Use MongoDB to create admin users or API calls instead
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME")
@@ -65,8 +80,69 @@ FLASK_DEBUG = FLASK_ENV == "development"
 # Alternative: Uncomment the line below to force disable debug mode for better performance
 # FLASK_DEBUG = False
 
+# Text-to-speech rendering
+TTS_QUEUE_MAXSIZE = int(os.getenv("TTS_QUEUE_MAXSIZE", "32"))  # Pending renders before /speak rejects
+TTS_VOICE = os.getenv("TTS_VOICE", "female")  # Substring matched against voice names (e.g. "zira")
+TTS_RATE = int(os.getenv("TTS_RATE", "175"))  # Words per minute
+TTS_SPEAK_WAIT_SECONDS = float(os.getenv("TTS_SPEAK_WAIT_SECONDS", "0.5"))  # /speak answers 202 after this; clients poll /speak-audio
+
+# Upload quality gate (runs on the decoded recording before any transcription/GPT call)
+AUDIO_QUALITY_GATE_ENABLED = os.getenv("AUDIO_QUALITY_GATE_ENABLED", "true").lower() == "true"
+AUDIO_QUALITY_THRESHOLDS = {
+    "speech": {
+        "min_duration_seconds": 1.0,
+        "min_peak_dbfs": -35.0,  # Quieter than this is treated as a silent recording
+        "max_clipping_ratio": 0.01,  # Fraction of samples at full scale
+        "min_snr_db": 10.0,  # Loud frames vs. noise floor
+        "min_speech_ratio": 0.15  # Fraction of frames that contain voice activity
+    },
+    "listening_test": {
+        "min_duration_seconds": 0.5,
+        "min_peak_dbfs": -35.0,
+        "max_clipping_ratio": 0.01,
+        "min_snr_db": 10.0,
+        "min_speech_ratio": 0.1
+    }
+}
+
 # Session management
 MAX_QUESTIONS_PER_SESSION = 5
+QUESTION_SAMPLING_SEED = os.getenv("QUESTION_SAMPLING_SEED")  # Optional; makes each session's question pick reproducible
+
+# Per-worker session state cache (bounded so long-running workers don't grow without limit)
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "1000"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # Approximate
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "1800"))  # Idle time before expiry
+
+# Per-worker cache of authenticated users. Invalidation is local: a role change, deactivation or delete made
+# through another worker takes effect here only once the cached copy is older than the TTL (counted from load)
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "256"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "15"))
+
+# Admin applicant listing (keyset pages of summaries; full records load per applicant)
+APPLICANT_PAGE_SIZE = int(os.getenv("APPLICANT_PAGE_SIZE", "50"))
+APPLICANT_PAGE_SIZE_MAX = int(os.getenv("APPLICANT_PAGE_SIZE_MAX", "200"))
+
+# Bulk applicant import/export (python manage.py import-applicants / export-applicants, GET /admin/applicants/export)
+TRANSFER_BATCH_SIZE = int(os.getenv("TRANSFER_BATCH_SIZE", "500"))  # Documents per bulk write / cursor batch
+TRANSFER_READ_CHUNK = int(os.getenv("TRANSFER_READ_CHUNK", str(1024 * 1024)))  # Characters read per import chunk
+TRANSFER_MAX_DOCUMENT_CHARS = int(os.getenv("TRANSFER_MAX_DOCUMENT_CHARS", str(16 * 1024 * 1024)))  # MongoDB's document limit
+
+# Schema migrations (documents are upgraded in memory on read, persisted in background batches)
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+BACKGROUND_MIGRATIONS_ENABLED = os.getenv("BACKGROUND_MIGRATIONS_ENABLED", "true").lower() == "true"
+
+# Expiry of abandoned sessions (days since last write; enforced by TTL indexes and the reaper)
+EXPIRY_TTL_DAYS = {
+    "session_states": float(os.getenv("SESSION_STATES_TTL_DAYS", "7")),
+    "temp_applicants": float(os.getenv("TEMP_APPLICANTS_TTL_DAYS", "30")),
+    "temp_evaluations": float(os.getenv("TEMP_EVALUATIONS_TTL_DAYS", "30")),
+    "temp_comments": float(os.getenv("TEMP_COMMENTS_TTL_DAYS", "30"))
+}
+REAPER_ENABLED = os.getenv("REAPER_ENABLED", "true").lower() == "true"
+REAPER_INTERVAL_SECONDS = int(os.getenv("REAPER_INTERVAL_SECONDS", "3600"))
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "500"))
+ORPHAN_GRACE_HOURS = float(os.getenv("ORPHAN_GRACE_HOURS", "24"))  # Session data may exist briefly before its applicant
 
 # JWT Configuration
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
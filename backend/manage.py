@@ -0,0 +1,141 @@
+"""
+Maintenance commands for the backend
+
+Usage:
+    python manage.py migrate [--collection NAME] [--batch-size N] [--dry-run]
+    python manage.py reap [--dry-run]
+    python manage.py ensure-indexes
+    python manage.py verify-indexes [--no-ensure]
+    python manage.py import-applicants FILE [--batch-size N] [--dry-run]
+    python manage.py export-applicants [FILE] [--format ndjson|csv] [--batch-size N]
+"""
+
+import argparse
+import sys
+from utils.migrations import MIGRATIONS, migrate_collection, get_schema_version
+from utils.expiry import reap_expired
+from utils.indexes import INDEX_MANIFEST, ensure_indexes, verify_indexes
+from utils.applicant_transfer import EXPORT_FORMATS, import_applicants, iter_export, format_throughput
+
+
+def cmd_migrate(args):
+    """Persist pending schema upgrades"""
+    collections = [args.collection] if args.collection else list(MIGRATIONS)
+    for collection_name in collections:
+        report = migrate_collection(collection_name, batch_size=args.batch_size, dry_run=args.dry_run)
+        target = get_schema_version(collection_name)
+        if args.dry_run:
+            print(f"{collection_name}: {report['outdated']} documents below schema version {target}")
+        else:
+            print(f"{collection_name}: upgraded {report['upgraded']}/{report['outdated']} to schema version {target}"
+                  + (f" ({report['skipped']} changed concurrently, rerun to retry)" if report['skipped'] else ""))
+
+
+def cmd_reap(args):
+    """Delete expired and orphaned session data and recordings"""
+    report = reap_expired(dry_run=args.dry_run)
+    verb = "would delete" if args.dry_run else "deleted"
+    for collection_name, count in report["deleted"].items():
+        print(f"{collection_name}: {verb} {count} documents")
+    print(f"recordings: {verb} {report['recording_folders']} folders ({report['recording_bytes'] / (1024 * 1024):.1f} MB)")
+    print(f"audio sprites: {verb} {report['sprites']} sprites ({report['sprite_bytes'] / (1024 * 1024):.1f} MB)")
+
+
+def cmd_ensure_indexes(args):
+    """Create every index in the manifest"""
+    failures = ensure_indexes()
+    total = sum(len(indexes) for indexes in INDEX_MANIFEST.values())
+    print(f"indexes: {total - len(failures)}/{total} in place")
+    if failures:
+        sys.exit(1)
+
+
+def cmd_verify_indexes(args):
+    """Explain every point lookup and fail if any of them scans a whole collection"""
+    if not args.no_ensure:
+        ensure_indexes()
+    results = verify_indexes()
+    for result in results:
+        status = "ok" if result["ok"] else "COLLSCAN"
+        print(f"[{status}] {result['collection']} {result['filter']} ({result['query']}): {' > '.join(result['stages'])}")
+    failed = [result for result in results if not result["ok"]]
+    print(f"\n{len(results) - len(failed)}/{len(results)} queries use an index")
+    if failed:
+        sys.exit(1)
+
+
+def cmd_import_applicants(args):
+    """Upsert applicants from a JSON or NDJSON file ("-" for stdin)"""
+    stream = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    try:
+        report = import_applicants(stream, batch_size=args.batch_size, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"Import stopped: {e}")
+        sys.exit(1)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(format_throughput(report["read"], report["bytes"], report["seconds"], noun="documents read"))
+    if args.dry_run:
+        print(f"applicants: {report['read'] - report['skipped']} would be upserted, {report['skipped']} skipped (no id)")
+    else:
+        print(f"applicants: {report['upserted']} inserted, {report['matched']} replaced ({report['modified']} changed), "
+              f"{report['skipped']} skipped (no id), {report['errors']} failed")
+    if report["errors"]:
+        sys.exit(1)
+
+
+def cmd_export_applicants(args):
+    """Stream every applicant to a file (or stdout) as NDJSON or CSV"""
+    report = {}
+    to_stdout = args.file in (None, "-")
+    stream = sys.stdout if to_stdout else open(args.file, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in iter_export(args.format, batch_size=args.batch_size, report=report):
+            stream.write(chunk)
+    finally:
+        if not to_stdout:
+            stream.close()
+    # Report on stderr so it never mixes into an export written to stdout
+    print(format_throughput(report["exported"], report["bytes"], report["seconds"]), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade stored documents to the latest schema")
+    migrate_parser.add_argument("--collection", choices=list(MIGRATIONS), help="Only migrate one collection")
+    migrate_parser.add_argument("--batch-size", type=int, default=None, help="Documents per bulk write")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only count outdated documents")
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    reap_parser = subparsers.add_parser("reap", help="Delete abandoned sessions and their recordings")
+    reap_parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    reap_parser.set_defaults(func=cmd_reap)
+
+    ensure_parser = subparsers.add_parser("ensure-indexes", help="Create the indexes every query relies on")
+    ensure_parser.set_defaults(func=cmd_ensure_indexes)
+
+    verify_parser = subparsers.add_parser("verify-indexes", help="Fail if any point lookup is a collection scan")
+    verify_parser.add_argument("--no-ensure", action="store_true", help="Check the existing indexes without creating missing ones")
+    verify_parser.set_defaults(func=cmd_verify_indexes)
+
+    import_parser = subparsers.add_parser("import-applicants", help="Bulk upsert applicants from JSON or NDJSON")
+    import_parser.add_argument("file", help="JSON array, {\"applicants\": [...]} file or NDJSON; - for stdin")
+    import_parser.add_argument("--batch-size", type=int, default=None, help="Documents per bulk write")
+    import_parser.add_argument("--dry-run", action="store_true", help="Parse and count without writing")
+    import_parser.set_defaults(func=cmd_import_applicants)
+
+    export_parser = subparsers.add_parser("export-applicants", help="Stream applicants out as NDJSON or CSV")
+    export_parser.add_argument("file", nargs="?", help="Output file (default: stdout)")
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson", help="NDJSON keeps full documents, CSV one summary row each")
+    export_parser.add_argument("--batch-size", type=int, default=None, help="Documents per cursor batch")
+    export_parser.set_defaults(func=cmd_export_applicants)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,25 @@
-from flask import Blueprint, jsonify, request, send_from_directory
+from flask import Blueprint, jsonify, request, send_from_directory, Response, stream_with_context
 import os
+from werkzeug.utils import secure_filename
 from config import ADMIN_USERNAME, ADMIN_PASSWORD
 from utils.file_ops import (
-    load_applicants, save_applicants, load_questions, save_questions, 
-    load_listening_test_questions, save_listening_test_questions,
+    load_questions, load_listening_test_questions,
     cleanup_temp_files, cleanup_recordings, load_temp_applicant, load_temp_evaluation,
-    save_temp_comments, load_temp_comments, load_all_temp_applicants
+    load_temp_comments, principal_cache,
+    insert_question, find_question, update_question, delete_question,
+    load_applicant, update_applicant, update_temp_applicant,
+    push_applicant_comment, pull_applicant_comment
 )
-from utils.session import clear_session
+from utils.session import clear_session, session_states_cache
+from utils.db import db
 from utils.auth import require_permission, require_auth
+from utils.audio_assets import QUESTION_AUDIO_TYPES, AUDIO_EXTENSIONS, get_audio_asset_dir, refresh_audio_index
+from utils.question_catalog import invalidate_question_catalog, reload_question_catalog, get_catalog_version
+from utils.tts import get_cached_speech, prerender_question_audio
+from utils.audio_sprite import sprite_cache
+from utils.metrics import get_metrics
+from utils.applicant_listing import list_applicant_summaries
+from utils.applicant_transfer import EXPORT_FORMATS, iter_export, format_throughput
 from utils.resume_ops import (
     save_applicant_resume, get_applicant_resume, delete_applicant_resume, 
     get_applicant_all_resumes
@@ -16,16 +27,23 @@ from utils.resume_ops import (
 
 admin_bp = Blueprint('admin', __name__)
 
+def find_applicant_storage(applicant_id):
+    """Which storage holds an applicant ("permanent", "temporary" or None), using projected indexed lookups"""
+    if load_applicant(applicant_id, {"id": 1}) is not None:
+        return "permanent"
+    if db.temp_applicants.find_one({"sessionId": applicant_id}, {"_id": 1}) is not None:
+        return "temporary"
+    return None
+
 def find_applicant_data(applicant_id):
-    """Find applicant data in either permanent or temporary storage"""
-    # First try to find in permanent applicants
-    applicants_data = load_applicants()
-    for app in applicants_data.get("applicants", []):
-        if app.get("id") == applicant_id:
-            # Add status field if not present
-            if "status" not in app:
-                app["status"] = "permanent"
-            return app, "permanent", applicants_data
+    """Find applicant data in either permanent or temporary storage. Returns (applicant, storage_type)."""
+    # First try to find in permanent applicants (indexed point lookup)
+    app = load_applicant(applicant_id)
+    if app is not None:
+        # Add status field if not present
+        if "status" not in app:
+            app["status"] = "permanent"
+        return app, "permanent"
     
     # If not found, try to load as temporary applicant
     temp_applicant = load_temp_applicant(applicant_id)
@@ -77,91 +95,55 @@ def find_applicant_data(applicant_id):
                 "typing_test": []
             })
         
-        return applicant_entry, "temporary", None
+        return applicant_entry, "temporary"
     
-    return None, None, None
+    return None, None
 
 @admin_bp.route("/admin/applicants", methods=["GET"])
 @require_permission("view_applicants")  # Re-enabled authentication
 def admin_get_applicants():
-    """Admin endpoint to retrieve all applicants data including temporary applicants"""
+    """Admin endpoint to retrieve one page of applicant summaries (permanent and temporary), newest first, optionally searched with ?q="""
     try:
-        # Load permanent applicants from MongoDB
-        main_applicants = load_applicants()  # Now loads from MongoDB
-        
-        # Load temporary applicants and convert them to the same format
-        temp_applicants_raw = load_all_temp_applicants()
-        temp_applicants_formatted = []
-        
-        for temp_applicant in temp_applicants_raw:
-            session_id = temp_applicant.get("sessionId")
-            
-            # Convert temp applicant to permanent applicant format
-            formatted_applicant = {
-                "id": session_id,
-                "applicant_info": temp_applicant.get("applicant", {}),
-                "application_timestamp": temp_applicant.get("timestamp"),
-                "completion_timestamp": None,  # Not completed yet
-                "last_updated": temp_applicant.get("timestamp"),
-                "total_questions": 0,  # Will calculate from evaluations
-                "comments": load_temp_comments(session_id),
-                "status": "temporary"  # Mark as temporary for frontend
-            }
-            
-            # Try to load corresponding evaluation data
-            eval_data = load_temp_evaluation(session_id)
-            if eval_data:
-                # Handle segmented evaluation structure
-                formatted_applicant.update(eval_data)
-                # Calculate total questions from all test segments
-                total_questions = 0
-                total_questions += len(eval_data.get("speech_eval", []))
-                total_questions += len(eval_data.get("listening_test", []))
-                total_questions += len(eval_data.get("written_test", []))
-                total_questions += len(eval_data.get("typing_test", []))
-                formatted_applicant["total_questions"] = total_questions
-                
-                # Ensure all test segments are present
-                for segment in ["speech_eval", "listening_test", "written_test", "typing_test"]:
-                    if segment not in formatted_applicant:
-                        formatted_applicant[segment] = []
-            else:
-                # Initialize empty evaluation segments if no evaluations exist
-                formatted_applicant.update({
-                    "speech_eval": [],
-                    "listening_test": [],
-                    "written_test": [],
-                    "typing_test": []
-                })
-            
-            temp_applicants_formatted.append(formatted_applicant)
-        
-        # Mark permanent applicants with status
-        for applicant in main_applicants.get("applicants", []):
-            applicant["status"] = "permanent"
-        
-        # Combine permanent and temporary applicants
-        all_applicants = {
-            "applicants": main_applicants.get("applicants", []) + temp_applicants_formatted
-        }
-        
-        # Sort applicants by application timestamp (newest first)
-        # Use application_timestamp to maintain chronological order of when applicants started
-        def get_sort_timestamp(applicant):
-            # Prioritize application_timestamp to sort by when applicant started, not completed
-            if applicant.get("application_timestamp"):
-                return applicant["application_timestamp"]
-            elif applicant.get("last_updated"):
-                return applicant["last_updated"]
-            else:
-                return "1970-01-01T00:00:00.000Z"  # Very old date for items without timestamps
-        
-        all_applicants["applicants"].sort(key=get_sort_timestamp, reverse=True)
-        
-        return jsonify(all_applicants)
+        page = list_applicant_summaries(request.args.get("cursor"), request.args.get("limit"), request.args.get("q"))
+        return jsonify({"success": True, **page})
+    except ValueError as e:  # Malformed cursor or limit
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": f"Error retrieving applicants: {str(e)}"}), 500
 
+@admin_bp.route("/admin/applicants/export", methods=["GET"])
+@require_permission("view_applicants")
+def admin_export_applicants():
+    """Stream every permanent applicant as NDJSON (?format=ndjson, default) or CSV (?format=csv)"""
+    try:
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"success": False, "message": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        report = {}
+
+        def generate():
+            # Rows go out as the cursor yields them, so memory stays flat however many applicants there are
+            yield from iter_export(export_format, report=report)
+            print(f"Applicant export ({export_format}): {format_throughput(report['exported'], report['bytes'], report['seconds'])}")
+
+        filename = f"applicants.{export_format}"
+        return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format],
+                        headers={"Content-Disposition": f"attachment; filename={filename}"})
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error exporting applicants: {str(e)}"}), 500
+
+@admin_bp.route("/admin/applicants/<applicant_id>", methods=["GET"])
+@require_permission("view_applicants")
+def admin_get_applicant(applicant_id):
+    """Admin endpoint to retrieve one applicant's full record (evaluations, transcripts and comments)"""
+    try:
+        applicant, storage_type = find_applicant_data(applicant_id)
+        if not applicant:
+            return jsonify({"success": False, "message": "Applicant not found"}), 404
+        return jsonify({"success": True, "applicant": applicant, "storage_type": storage_type})
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error retrieving applicant: {str(e)}"}), 500
+
 @admin_bp.route("/admin/questions", methods=["GET"])
 @require_permission("view_questions")
 def admin_get_questions():
@@ -181,21 +163,19 @@ def admin_add_question():
         if not data or not data.get("text") or not data.get("keywords"):  # Validate required fields
             return jsonify({"success": False, "message": "Question text and keywords are required"}), 400
         
-        all_questions = load_questions()  # Load existing questions
-        
-        # Generate new ID
-        new_id = max([q.get("id", 0) for q in all_questions], default=0) + 1  # Calculate next available ID
-        
-        new_question = {  # Create new question object
-            "id": new_id,  # Set unique question ID
+        cached_audio = get_cached_speech(data["text"])  # Reuse audio if this prompt was rendered before
+        new_question = insert_question("questions", {  # Insert with the next ID from the questions sequence
             "text": data["text"],  # Set question text
             "keywords": data["keywords"],  # Set expected keywords
-            "active": data.get("active", True)  # Set active status (default to True)
-        }
-        
-        all_questions.append(new_question)  # Add new question to questions list
-        if not save_questions(all_questions):  # Save updated questions to database
+            "active": data.get("active", True),  # Set active status (default to True)
+            "audio_id": cached_audio["audio_id"] if cached_audio else ""  # Filled in once rendering finishes
+        })
+        if not new_question:
             return jsonify({"success": False, "message": "Failed to save question to database"}), 500
+        invalidate_question_catalog("speech")  # Sessions resolve IDs against the refreshed catalog
+        
+        if not cached_audio:
+            prerender_question_audio(new_question["id"], new_question["text"])  # Render in the background
         
         return jsonify({"success": True, "message": "Question added successfully", "question": new_question})  # Return success response
     except Exception as e:  # Handle any errors during question addition
@@ -210,30 +190,34 @@ def admin_update_question(question_id):
         if not data:  # Validate data was provided
             return jsonify({"success": False, "message": "No data provided"}), 400
         
-        all_questions = load_questions()  # Load existing questions
-        
-        # Find the question to update
-        question_index = None  # Initialize question index variable
-        for i, q in enumerate(all_questions):  # Iterate through all questions
-            if q.get("id") == question_id:  # Check if question ID matches
-                question_index = i  # Store question index
-                break
-        
-        if question_index is None:  # Check if question was found
+        question = find_question("questions", question_id)  # Load only the question being edited
+        if question is None:  # Check if question was found
             return jsonify({"success": False, "message": "Question not found"}), 404
         
-        # Update the question
-        if "text" in data:  # Check if text should be updated
-            all_questions[question_index]["text"] = data["text"]  # Update question text
+        # Collect the changed fields
+        changes = {}
+        needs_audio = False
+        if "text" in data and data["text"] != question.get("text"):  # Check if text changed
+            changes["text"] = data["text"]  # Update question text
+            cached_audio = get_cached_speech(data["text"])
+            # Drop the old audio so applicants never hear a prompt that no longer matches the text
+            changes["audio_id"] = cached_audio["audio_id"] if cached_audio else ""
+            needs_audio = not cached_audio
         if "keywords" in data:  # Check if keywords should be updated
-            all_questions[question_index]["keywords"] = data["keywords"]  # Update keywords
+            changes["keywords"] = data["keywords"]  # Update keywords
         if "active" in data:  # Check if active status should be updated
-            all_questions[question_index]["active"] = data["active"]  # Update active status
+            changes["active"] = data["active"]  # Update active status
+        
+        if changes:
+            question = update_question("questions", question_id, changes)  # Single-document $set
+            if question is None:  # Deleted while we were editing it
+                return jsonify({"success": False, "message": "Question not found"}), 404
+            invalidate_question_catalog("speech")  # Sessions resolve IDs against the refreshed catalog
         
-        if not save_questions(all_questions):  # Save updated questions to database
-            return jsonify({"success": False, "message": "Failed to save question update to database"}), 500
+        if needs_audio:
+            prerender_question_audio(question_id, question["text"])  # Re-render in the background
         
-        return jsonify({"success": True, "message": "Question updated successfully", "question": all_questions[question_index]})  # Return success response
+        return jsonify({"success": True, "message": "Question updated successfully", "question": question})  # Return success response
     except Exception as e:  # Handle any errors during question update
         return jsonify({"success": False, "message": f"Error updating question: {str(e)}"}), 500
 
@@ -242,21 +226,10 @@ def admin_update_question(question_id):
 def admin_delete_question(question_id):
     """Delete a question (admin only)"""
     try:
-        all_questions = load_questions()  # Load existing questions
-        
-        # Find the question to delete
-        question_index = None  # Initialize question index variable
-        for i, q in enumerate(all_questions):  # Iterate through all questions
-            if q.get("id") == question_id:  # Check if question ID matches
-                question_index = i  # Store question index
-                break
-        
-        if question_index is None:  # Check if question was found
+        deleted_question = delete_question("questions", question_id)  # Remove only this question
+        if deleted_question is None:  # Check if question was found
             return jsonify({"success": False, "message": "Question not found"}), 404
-        
-        # Remove the question
-        deleted_question = all_questions.pop(question_index)  # Remove question and store deleted data
-        save_questions(all_questions)  # Save updated questions to file
+        invalidate_question_catalog("speech")  # Sessions resolve IDs against the refreshed catalog
         
         return jsonify({"success": True, "message": "Question deleted successfully", "deleted_question": deleted_question})  # Return success response
     except Exception as e:  # Handle any errors during question deletion
@@ -267,8 +240,14 @@ def admin_delete_question(question_id):
 def admin_reload_questions():
     """Reload questions from file (admin only)"""
     try:
-        # This will be handled by the session management
-        return jsonify({"success": True, "message": "Questions reloaded successfully"})  # Return success response
+        count = reload_question_catalog("speech")  # Bump the generation so every worker reloads from MongoDB
+        refresh_audio_index("speech")  # Pick up speech question audio changed on disk
+        return jsonify({
+            "success": True,
+            "message": "Questions reloaded successfully",
+            "count": count,
+            "catalog_version": get_catalog_version("speech")
+        })  # Return success response
     except Exception as e:  # Handle any errors during reload
         return jsonify({"success": False, "message": f"Error reloading questions: {str(e)}"}), 500
 
@@ -298,18 +277,8 @@ def admin_delete_applicant(session_id):
     try:
         print(f"Attempting to delete applicant with session_id: {session_id}")  # Log deletion attempt
         
-        # Load existing applicants data
-        applicants_data = load_applicants()  # Load current applicants data
-        
-        # Find and remove the applicant
-        original_count = len(applicants_data["applicants"])  # Store original applicant count
-        applicants_data["applicants"] = [  # Filter out the applicant to delete
-            applicant for applicant in applicants_data["applicants"] 
-            if applicant.get("id") != session_id  # Keep applicants that don't match session ID
-        ]
-        
-        # Check if applicant was found and removed
-        if len(applicants_data["applicants"]) == original_count:  # Check if no applicant was removed
+        # Check if applicant was found in permanent storage
+        if find_applicant_storage(session_id) != "permanent":
             print(f"Applicant {session_id} not found in applicants.json")  # Log that applicant wasn't found
             # Check if it exists in temporary MongoDB collections
             from utils.file_ops import load_temp_applicant
@@ -336,7 +305,6 @@ def admin_delete_applicant(session_id):
                 return jsonify({"success": False, "message": f"Applicant with ID '{session_id}' not found"}), 404  # Return not found error
         
         # Delete the applicant directly from MongoDB
-        from utils.db import db
         delete_result = db.applicants.delete_one({"id": session_id})
         
         if delete_result.deleted_count > 0:
@@ -382,19 +350,13 @@ def admin_add_listening_test_question():
         if not data or not data.get("text"):  # Validate required fields
             return jsonify({"success": False, "message": "Question text is required"}), 400
         
-        all_questions = load_listening_test_questions()  # Load existing questions
-        
-        # Generate new ID
-        new_id = max([q.get("id", 0) for q in all_questions], default=0) + 1  # Calculate next available ID
-        
-        new_question = {  # Create new question object
-            "id": new_id,  # Set unique question ID
+        new_question = insert_question("listening_test_questions", {  # Insert with the next ID from the listening sequence
             "text": data["text"],  # Set question text
             "active": data.get("active", True)  # Set active status (default to True)
-        }
-        
-        all_questions.append(new_question)  # Add new question to questions list
-        save_listening_test_questions(all_questions)  # Save updated questions to file
+        })
+        if not new_question:
+            return jsonify({"success": False, "message": "Failed to save listening test question to database"}), 500
+        invalidate_question_catalog("listening")  # Sessions resolve IDs against the refreshed catalog
         
         return jsonify({"success": True, "message": "Listening test question added successfully", "question": new_question})  # Return success response
     except Exception as e:  # Handle any errors during question addition
@@ -409,27 +371,23 @@ def admin_update_listening_test_question(question_id):
         if not data:  # Validate data was provided
             return jsonify({"success": False, "message": "No data provided"}), 400
         
-        all_questions = load_listening_test_questions()  # Load existing questions
-        
-        # Find the question to update
-        question_index = None  # Initialize question index variable
-        for i, q in enumerate(all_questions):  # Iterate through all questions
-            if q.get("id") == question_id:  # Check if question ID matches
-                question_index = i  # Store question index
-                break
-        
-        if question_index is None:  # Check if question was found
-            return jsonify({"success": False, "message": "Listening test question not found"}), 404
-        
-        # Update the question
+        # Collect the changed fields
+        changes = {}
         if "text" in data:  # Check if text should be updated
-            all_questions[question_index]["text"] = data["text"]  # Update question text
+            changes["text"] = data["text"]  # Update question text
         if "active" in data:  # Check if active status should be updated
-            all_questions[question_index]["active"] = data["active"]  # Update active status
+            changes["active"] = data["active"]  # Update active status
         
-        save_listening_test_questions(all_questions)  # Save updated questions to file
+        if changes:
+            question = update_question("listening_test_questions", question_id, changes)  # Single-document $set
+        else:
+            question = find_question("listening_test_questions", question_id)
+        if question is None:  # Check if question was found
+            return jsonify({"success": False, "message": "Listening test question not found"}), 404
+        if changes:
+            invalidate_question_catalog("listening")  # Sessions resolve IDs against the refreshed catalog
         
-        return jsonify({"success": True, "message": "Listening test question updated successfully", "question": all_questions[question_index]})  # Return success response
+        return jsonify({"success": True, "message": "Listening test question updated successfully", "question": question})  # Return success response
     except Exception as e:  # Handle any errors during question update
         return jsonify({"success": False, "message": f"Error updating listening test question: {str(e)}"}), 500
 
@@ -438,21 +396,10 @@ def admin_update_listening_test_question(question_id):
 def admin_delete_listening_test_question(question_id):
     """Delete a listening test question (admin only)"""
     try:
-        all_questions = load_listening_test_questions()  # Load existing questions
-        
-        # Find the question to delete
-        question_index = None  # Initialize question index variable
-        for i, q in enumerate(all_questions):  # Iterate through all questions
-            if q.get("id") == question_id:  # Check if question ID matches
-                question_index = i  # Store question index
-                break
-        
-        if question_index is None:  # Check if question was found
+        deleted_question = delete_question("listening_test_questions", question_id)  # Remove only this question
+        if deleted_question is None:  # Check if question was found
             return jsonify({"success": False, "message": "Listening test question not found"}), 404
-        
-        # Remove the question
-        deleted_question = all_questions.pop(question_index)  # Remove question and store deleted data
-        save_listening_test_questions(all_questions)  # Save updated questions to file
+        invalidate_question_catalog("listening")  # Sessions resolve IDs against the refreshed catalog
         
         return jsonify({"success": True, "message": "Listening test question deleted successfully", "deleted_question": deleted_question})  # Return success response
     except Exception as e:  # Handle any errors during question deletion
@@ -463,11 +410,62 @@ def admin_delete_listening_test_question(question_id):
 def admin_reload_listening_test_questions():
     """Reload listening test questions from file (admin only)"""
     try:
-        # This will be handled by the session management
-        return jsonify({"success": True, "message": "Listening test questions reloaded successfully"})  # Return success response
+        count = reload_question_catalog("listening")  # Bump the generation so every worker reloads from MongoDB
+        refresh_audio_index("listening")  # Pick up listening question audio changed on disk
+        return jsonify({
+            "success": True,
+            "message": "Listening test questions reloaded successfully",
+            "count": count,
+            "catalog_version": get_catalog_version("listening")
+        })  # Return success response
     except Exception as e:  # Handle any errors during reload
         return jsonify({"success": False, "message": f"Error reloading listening test questions: {str(e)}"}), 500
 
+# Question Audio Management Endpoints
+
+@admin_bp.route("/admin/question-audio/<audio_type>", methods=["POST"])
+@require_permission("edit_questions")
+def admin_upload_question_audio(audio_type):
+    """Upload a question audio file and refresh the audio index (admin only)"""
+    try:
+        if audio_type not in QUESTION_AUDIO_TYPES:
+            return jsonify({"success": False, "message": f"Invalid audio type. Must be one of: {', '.join(QUESTION_AUDIO_TYPES)}"}), 400
+        
+        audio = request.files.get("audio")  # Get uploaded audio file
+        audio_id = secure_filename(request.form.get("audio_id", ""))  # Sanitize requested audio ID
+        if not audio or not audio_id:
+            return jsonify({"success": False, "message": "Audio file and audio_id are required"}), 400
+        
+        ext = os.path.splitext(audio.filename or "")[1].lower() or ".wav"
+        if ext not in AUDIO_EXTENSIONS:
+            return jsonify({"success": False, "message": f"Unsupported audio format: {ext}"}), 400
+        
+        audio_dir = get_audio_asset_dir(audio_type)
+        os.makedirs(audio_dir, exist_ok=True)
+        audio.save(os.path.join(audio_dir, f"{audio_id}{ext}"))  # Overwrites any existing file for this ID
+        refresh_audio_index(audio_type)  # Make the new file visible to /speak-audio
+        
+        return jsonify({"success": True, "message": "Question audio uploaded successfully", "audio_id": audio_id})
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error uploading question audio: {str(e)}"}), 500
+
+@admin_bp.route("/admin/metrics", methods=["GET"])
+@require_permission("view_analytics")
+def admin_get_metrics():
+    """Get this worker's instrumentation counters (admin only)"""
+    try:
+        return jsonify({
+            "success": True,
+            "metrics": get_metrics(request.args.get("prefix")),
+            "caches": {
+                "session_states": session_states_cache.stats(),
+                "principals": principal_cache.stats(),
+                "audio_sprites": sprite_cache.stats()
+            }
+        })
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error retrieving metrics: {str(e)}"}), 500
+
 # Comments endpoints
 @admin_bp.route("/admin/applicants/<applicant_id>/comments", methods=["GET"])
 @require_permission("view_evaluations")
@@ -475,13 +473,16 @@ def get_applicant_comments(applicant_id):
     """Get all comments for a specific applicant (permanent or temporary)"""
     try:
         # Find applicant in either permanent or temporary storage
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
+        storage_type = find_applicant_storage(applicant_id)
         
-        if not applicant:
+        if not storage_type:
             return jsonify({"success": False, "message": "Applicant not found"}), 404
         
-        # Return comments array (initialize if it doesn't exist)
-        comments = applicant.get("comments", [])
+        # Load only the comments (initialize if they don't exist)
+        if storage_type == "permanent":
+            comments = (load_applicant(applicant_id, {"comments": 1}) or {}).get("comments", [])
+        else:
+            comments = load_temp_comments(applicant_id)
         return jsonify({
             "success": True, 
             "comments": comments,
@@ -505,9 +506,9 @@ def add_applicant_comment(applicant_id):
         from datetime import datetime
         
         # Find applicant in either permanent or temporary storage
-        applicant, storage_type, applicants_data = find_applicant_data(applicant_id)
+        storage_type = find_applicant_storage(applicant_id)
         
-        if not applicant:
+        if not storage_type:
             return jsonify({"success": False, "message": "Applicant not found"}), 404
         
         # Create new comment object
@@ -520,36 +521,9 @@ def add_applicant_comment(applicant_id):
             "user_role": request.current_user.get('role') if hasattr(request, 'current_user') else None
         }
         
-        if storage_type == "permanent":
-            # Handle permanent applicant
-            applicant_index = None
-            for i, app in enumerate(applicants_data.get("applicants", [])):
-                if app.get("id") == applicant_id:
-                    applicant_index = i
-                    break
-            
-            if applicant_index is None:
-                return jsonify({"success": False, "message": "Applicant not found in permanent storage"}), 404
-            
-            # Initialize comments array if it doesn't exist
-            if "comments" not in applicants_data["applicants"][applicant_index]:
-                applicants_data["applicants"][applicant_index]["comments"] = []
-            
-            # Add new comment to the beginning of the list (most recent first)
-            applicants_data["applicants"][applicant_index]["comments"].insert(0, new_comment)
-            
-            # Save updated applicants data
-            save_applicants(applicants_data)
-            
-        else:  # storage_type == "temporary"
-            # Handle temporary applicant
-            current_comments = load_temp_comments(applicant_id)
-            
-            # Add new comment to the beginning of the list (most recent first)
-            current_comments.insert(0, new_comment)
-            
-            # Save updated comments to temp file
-            save_temp_comments(applicant_id, current_comments)
+        # Atomically push the comment to the front of the list (most recent first) on this applicant only
+        if not push_applicant_comment(storage_type, applicant_id, new_comment):
+            return jsonify({"success": False, "message": f"Applicant not found in {storage_type} storage"}), 404
         
         return jsonify({"success": True, "message": "Comment added successfully", "comment": new_comment})
         
@@ -563,52 +537,14 @@ def delete_applicant_comment(applicant_id, comment_id):
     """Delete a specific comment for an applicant (permanent or temporary)"""
     try:
         # Find applicant in either permanent or temporary storage
-        applicant, storage_type, applicants_data = find_applicant_data(applicant_id)
+        storage_type = find_applicant_storage(applicant_id)
         
-        if not applicant:
+        if not storage_type:
             return jsonify({"success": False, "message": "Applicant not found"}), 404
         
-        if storage_type == "permanent":
-            # Handle permanent applicant
-            applicant_index = None
-            for i, app in enumerate(applicants_data.get("applicants", [])):
-                if app.get("id") == applicant_id:
-                    applicant_index = i
-                    break
-            
-            if applicant_index is None:
-                return jsonify({"success": False, "message": "Applicant not found in permanent storage"}), 404
-            
-            applicant = applicants_data["applicants"][applicant_index]
-            
-            # Check if comments array exists
-            if "comments" not in applicant:
-                return jsonify({"success": False, "message": "No comments found"}), 404
-            
-            # Find and remove the comment
-            comments = applicant["comments"]
-            original_count = len(comments)
-            applicant["comments"] = [c for c in comments if c.get("id") != comment_id]
-            
-            if len(applicant["comments"]) == original_count:
-                return jsonify({"success": False, "message": "Comment not found"}), 404
-            
-            # Save updated applicants data
-            save_applicants(applicants_data)
-            
-        else:  # storage_type == "temporary"
-            # Handle temporary applicant
-            current_comments = load_temp_comments(applicant_id)
-            
-            # Find and remove the comment
-            original_count = len(current_comments)
-            current_comments = [c for c in current_comments if c.get("id") != comment_id]
-            
-            if len(current_comments) == original_count:
-                return jsonify({"success": False, "message": "Comment not found"}), 404
-            
-            # Save updated comments to temp file
-            save_temp_comments(applicant_id, current_comments)
+        # Atomically pull the comment from this applicant only
+        if not pull_applicant_comment(storage_type, applicant_id, comment_id):
+            return jsonify({"success": False, "message": "Comment not found"}), 404
         
         return jsonify({"success": True, "message": "Comment deleted successfully"})
         
@@ -633,51 +569,23 @@ def update_applicant_status(applicant_id):
             return jsonify({"success": False, "message": f"Invalid status. Must be one of: {', '.join(valid_statuses)}"}), 400
         
         # Find applicant in either permanent or temporary storage
-        applicant, storage_type, applicants_data = find_applicant_data(applicant_id)
+        storage_type = find_applicant_storage(applicant_id)
         
-        if not applicant:
+        if not storage_type:
             return jsonify({"success": False, "message": "Applicant not found"}), 404
         
         if storage_type == "permanent":
-            # Handle permanent applicant
-            applicant_index = None
-            for i, app in enumerate(applicants_data.get("applicants", [])):
-                if app.get("id") == applicant_id:
-                    applicant_index = i
-                    break
-            
-            if applicant_index is None:
-                return jsonify({"success": False, "message": "Applicant not found in permanent storage"}), 404
-            
-            # Update the applicant_status in applicant_info
-            if "applicant_info" not in applicants_data["applicants"][applicant_index]:
-                applicants_data["applicants"][applicant_index]["applicant_info"] = {}
-            
-            applicants_data["applicants"][applicant_index]["applicant_info"]["applicant_status"] = new_status
-            
-            # Also update last_updated timestamp
+            # Update the applicant_status in applicant_info (and last_updated) on this document only
             from datetime import datetime
-            applicants_data["applicants"][applicant_index]["last_updated"] = datetime.utcnow().isoformat() + 'Z'
-            
-            # Save updated applicants data
-            if not save_applicants(applicants_data):
+            if not update_applicant(applicant_id, {
+                "applicant_info.applicant_status": new_status,
+                "last_updated": datetime.utcnow().isoformat() + 'Z'
+            }):
                 return jsonify({"success": False, "message": "Failed to save applicant status"}), 500
             
         else:  # storage_type == "temporary"
-            # For temporary applicants, we need to update the temp file
-            temp_applicant = load_temp_applicant(applicant_id)
-            if not temp_applicant:
-                return jsonify({"success": False, "message": "Temporary applicant not found"}), 404
-            
-            # Update the applicant_status in applicant data
-            if "applicant" not in temp_applicant:
-                temp_applicant["applicant"] = {}
-            
-            temp_applicant["applicant"]["applicant_status"] = new_status
-            
-            # Save updated temp applicant
-            from utils.file_ops import save_temp_applicant
-            if not save_temp_applicant(temp_applicant, applicant_id):
+            # Update the applicant_status in the temporary applicant's data
+            if not update_temp_applicant(applicant_id, {"applicant.applicant_status": new_status}):
                 return jsonify({"success": False, "message": "Failed to save temporary applicant status"}), 500
         
         return jsonify({
@@ -713,8 +621,7 @@ def upload_applicant_resume(applicant_id):
     """
     try:
         # Check if applicant exists
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
-        if not applicant:
+        if not find_applicant_storage(applicant_id):
             return jsonify({
                 "success": False,
                 "message": "Applicant not found"
@@ -767,8 +674,7 @@ def get_applicant_resume_endpoint(applicant_id):
     """
     try:
         # Check if applicant exists
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
-        if not applicant:
+        if not find_applicant_storage(applicant_id):
             return jsonify({
                 "success": False,
                 "message": "Applicant not found"
@@ -800,8 +706,7 @@ def get_applicant_all_resumes_endpoint(applicant_id):
     """
     try:
         # Check if applicant exists
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
-        if not applicant:
+        if not find_applicant_storage(applicant_id):
             return jsonify({
                 "success": False,
                 "message": "Applicant not found"
@@ -833,8 +738,7 @@ def delete_applicant_resume_file(applicant_id, filename):
     """
     try:
         # Check if applicant exists
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
-        if not applicant:
+        if not find_applicant_storage(applicant_id):
             return jsonify({
                 "success": False,
                 "message": "Applicant not found"
@@ -866,8 +770,7 @@ def delete_applicant_all_resumes(applicant_id):
     """
     try:
         # Check if applicant exists
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
-        if not applicant:
+        if not find_applicant_storage(applicant_id):
             return jsonify({
                 "success": False,
                 "message": "Applicant not found"
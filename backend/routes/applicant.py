@@ -2,7 +2,7 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime
 from utils.file_ops import (
     save_temp_applicant, load_temp_applicant, load_temp_evaluation,
-    load_applicants, save_applicants, cleanup_temp_files, cleanup_recordings
+    cleanup_temp_files, cleanup_recordings, save_applicant
 )
 from utils.session import clear_session
 
@@ -72,9 +72,6 @@ def finish_evaluation():
             evaluation_data = load_temp_evaluation(session_id)  # Load stored evaluation results
 
             if applicant_data and evaluation_data:  # Check if both data sets exist
-                # Load existing applicants data
-                applicants_data = load_applicants()  # Load current applicants from file
-
                 # Create combined record with all evaluations
                 combined_record = {  # Combine applicant and evaluation data
                     "id": session_id,  # Use session ID as unique identifier
@@ -83,7 +80,7 @@ def finish_evaluation():
                     "total_questions": 0,  # Will calculate total from all sections
                     "completion_timestamp": datetime.utcnow().isoformat() + 'Z',  # Record completion time in UTC
                     "last_updated": datetime.utcnow().isoformat() + 'Z',  # Update timestamp in UTC
-                    "comments": []  # Initialize empty comments array
+                    "comments": []  # Only used for a new applicant; save_applicant keeps existing comments
                 }
                 
                 # Handle both old and new segmented structure
@@ -103,25 +100,8 @@ def finish_evaluation():
                     total_questions += len(evaluation_data.get("typing_test", []))
                     combined_record["total_questions"] = total_questions
 
-                # Check if applicant already exists (by session_id)
-                existing_index = None  # Track if applicant exists
-                for i, applicant in enumerate(applicants_data["applicants"]):  # Search existing applicants
-                    if applicant.get("id") == session_id:  # Check for matching session ID
-                        existing_index = i  # Store index of existing applicant
-                        break
-
-                if existing_index is not None:  # If applicant exists
-                    # Preserve existing comments when updating
-                    existing_comments = applicants_data["applicants"][existing_index].get("comments", [])
-                    combined_record["comments"] = existing_comments
-                    # Update existing applicant with all evaluations
-                    applicants_data["applicants"][existing_index] = combined_record  # Replace with updated data
-                else:  # If new applicant
-                    # Add new applicant
-                    applicants_data["applicants"].append(combined_record)  # Add to applicants list
-
-                # Save to applicants.json
-                if not save_applicants(applicants_data):
+                # Insert or update only this applicant, without rewriting comments pushed meanwhile
+                if not save_applicant(combined_record):
                     return jsonify({
                         "success": False, 
                         "message": "Failed to save applicant data to database"
@@ -165,85 +145,13 @@ def finish_evaluation():
 
 @applicant_bp.route("/get_applicants", methods=["GET"])
 def get_applicants():
-    """Retrieve all stored applicants data including temporary applicants"""
+    """Retrieve one page of applicant summaries including temporary applicants (full records via /get_applicant_details)"""
     try:
-        # Load permanent applicants from MongoDB
-        applicants_data = load_applicants()  # Load applicants from database
-        
-        # Load temporary applicants and convert them to the same format
-        from utils.file_ops import load_all_temp_applicants, load_temp_evaluation, load_temp_comments
-        temp_applicants_raw = load_all_temp_applicants()
-        temp_applicants_formatted = []
-        
-        for temp_applicant in temp_applicants_raw:
-            session_id = temp_applicant.get("sessionId")
-            
-            # Convert temp applicant to permanent applicant format
-            formatted_applicant = {
-                "id": session_id,
-                "applicant_info": temp_applicant.get("applicant", {}),
-                "application_timestamp": temp_applicant.get("timestamp"),
-                "completion_timestamp": None,  # Not completed yet
-                "last_updated": temp_applicant.get("timestamp"),
-                "total_questions": 0,  # Will calculate from evaluations
-                "comments": load_temp_comments(session_id),
-                "status": "temporary"  # Mark as temporary for frontend
-            }
-            
-            # Try to load corresponding evaluation data
-            eval_data = load_temp_evaluation(session_id)
-            if eval_data:
-                # Handle segmented evaluation structure
-                formatted_applicant.update(eval_data)
-                # Calculate total questions from all test segments
-                total_questions = 0
-                total_questions += len(eval_data.get("speech_eval", []))
-                total_questions += len(eval_data.get("listening_test", []))
-                total_questions += len(eval_data.get("written_test", []))
-                total_questions += len(eval_data.get("personality_test", []))
-                total_questions += len(eval_data.get("typing_test", []))
-                formatted_applicant["total_questions"] = total_questions
-                
-                # Ensure all test segments are present
-                for segment in ["speech_eval", "listening_test", "written_test", "personality_test", "typing_test"]:
-                    if segment not in formatted_applicant:
-                        formatted_applicant[segment] = []
-            else:
-                # Initialize empty evaluation segments if no evaluations exist
-                formatted_applicant.update({
-                    "speech_eval": [],
-                    "listening_test": [],
-                    "written_test": [],
-                    "personality_test": [],
-                    "typing_test": []
-                })
-            
-            temp_applicants_formatted.append(formatted_applicant)
-        
-        # Mark permanent applicants with status
-        for applicant in applicants_data.get("applicants", []):
-            if "status" not in applicant:
-                applicant["status"] = "permanent"
-        
-        # Combine permanent and temporary applicants
-        all_applicants = {
-            "applicants": applicants_data.get("applicants", []) + temp_applicants_formatted
-        }
-        
-        # Sort applicants by application timestamp (newest first)
-        # Use application_timestamp to maintain chronological order of when applicants started
-        def get_sort_timestamp(applicant):
-            # Prioritize application_timestamp to sort by when applicant started, not completed
-            if applicant.get("application_timestamp"):
-                return applicant["application_timestamp"]
-            elif applicant.get("last_updated"):
-                return applicant["last_updated"]
-            else:
-                return "1970-01-01T00:00:00.000Z"  # Very old date for items without timestamps
-        
-        all_applicants["applicants"].sort(key=get_sort_timestamp, reverse=True)
-        
-        return jsonify(all_applicants)  # Return combined applicants data as JSON
+        from utils.applicant_listing import list_applicant_summaries
+        page = list_applicant_summaries(request.args.get("cursor"), request.args.get("limit"), request.args.get("q"))
+        return jsonify({"success": True, **page})  # Return the page of summaries as JSON
+    except ValueError as e:  # Malformed cursor or limit
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:  # Handle any errors during retrieval
         return jsonify({"success": False, "message": f"Error retrieving applicants: {str(e)}"}), 500
 
@@ -258,7 +166,7 @@ def get_applicant_details():
         
         # Use the admin function to find applicant in both permanent and temporary storage
         from routes.admin import find_applicant_data
-        applicant, storage_type, _ = find_applicant_data(applicant_id)
+        applicant, storage_type = find_applicant_data(applicant_id)
         
         if not applicant:
             return jsonify({"success": False, "message": "Applicant not found"}), 404
@@ -3,13 +3,42 @@ import os
 import subprocess
 import uuid
 from datetime import datetime
-from utils.file_ops import save_audio_file, save_temp_evaluation, load_temp_evaluation
+from utils.file_ops import save_audio_file, append_temp_evaluation
 from utils.evaluation import run_evaluation
 from utils.session import mark_question_answered
-from utils.tts import speak_async
+from concurrent.futures import TimeoutError as RenderTimeoutError
+from config import TTS_SPEAK_WAIT_SECONDS, AUDIO_SPRITE_DIR, AUDIO_QUALITY_GATE_ENABLED
+from utils.audio_quality import check_upload_quality
+from utils.tts import render_speech_async, get_speech_audio_id, TTSQueueFullError
+from utils.audio_assets import get_audio_asset, get_audio_asset_by_filename, get_audio_asset_dir
 
 audio_bp = Blueprint('audio', __name__)
 
+def quality_gate(audio_webm_path, audio_wav_path, test_type):
+    """Reject unusable recordings before any paid API call; returns a response or None if the upload is fine"""
+    if not AUDIO_QUALITY_GATE_ENABLED:
+        return None
+    try:
+        quality = check_upload_quality(audio_wav_path, test_type)
+    except Exception as e:
+        print(f"Audio quality check failed, continuing with evaluation: {e}")  # Never block on the gate itself
+        return None
+    if quality["passed"]:
+        return None
+    
+    # Clean up temporary files since this upload won't be evaluated
+    for path in (audio_webm_path, audio_wav_path):
+        if os.path.exists(path):
+            os.remove(path)
+    
+    return jsonify({
+        "success": False,
+        "rerecord": True,
+        "message": quality["message"],
+        "reasons": quality["reasons"],
+        "quality": quality["metrics"]
+    }), 422
+
 @audio_bp.route("/evaluate", methods=["POST", "OPTIONS"])
 def evaluate():
     """Evaluate audio response for a question"""
@@ -41,6 +70,11 @@ def evaluate():
     except Exception as e:  # Handle conversion errors
         return jsonify({"success": False, "message": f"Audio conversion failed: {str(e)}"}), 500
 
+    # Ask for a re-record before spending Whisper/GPT calls on an unusable upload
+    rejection = quality_gate(audio_webm_path, audio_wav_path, "speech")
+    if rejection:
+        return rejection
+
     # Run evaluation
     result = run_evaluation(question, keywords, audio_wav_path)  # Process audio and get evaluation results
     
@@ -81,21 +115,8 @@ def evaluate():
         mark_question_answered(session_id, question_index)
         print(f"Checkpoint: Marked speech question {question_index} as answered for session {session_id}")
         
-        # Load existing temp evaluations for this session
-        temp_evaluations = load_temp_evaluation(session_id)
-        if not temp_evaluations:
-            temp_evaluations = {
-                "speech_eval": [],
-                "listening_test": [],
-                "written_test": [],
-                "typing_test": []
-            }
-        
-        # Add speech evaluation result to speech_eval section
-        temp_evaluations["speech_eval"].append(result)
-        
-        # Save back to temporary evaluations
-        if not save_temp_evaluation(temp_evaluations, session_id):
+        # Append atomically so parallel submissions for this session can't overwrite each other
+        if not append_temp_evaluation(result, session_id, "speech_eval"):
             print(f"Warning: Failed to save speech evaluation for session {session_id}")  # Log warning but don't fail request
     
     return jsonify(result)  # Return evaluation results
@@ -132,6 +153,11 @@ def evaluate_listening_test():
     except Exception as e:  # Handle conversion errors
         return jsonify({"success": False, "message": f"Audio conversion failed: {str(e)}"}), 500
 
+    # Ask for a re-record before spending a Whisper call on an unusable upload
+    rejection = quality_gate(audio_webm_path, audio_wav_path, "listening_test")
+    if rejection:
+        return rejection
+
     # Get applicant info for folder organization
     applicant_info = None
     if session_id:  # Check if session ID exists
@@ -221,45 +247,50 @@ def evaluate_listening_test():
     # Save evaluation result to listening test section and mark question as answered (checkpoint)
     if session_id:  # Check if session ID exists
         # Mark this listening question as answered in the session state (persist to MongoDB)
-        from utils.session import get_session_state, set_session_state
-        state = get_session_state(session_id)
-        listening_has_answered = state.get('listening_has_answered', set())
-        listening_has_answered.add(question_index)
-        state['listening_has_answered'] = listening_has_answered
-        set_session_state(session_id, state)
+        from utils.session import update_session_state
+        update_session_state(session_id, lambda state: state.setdefault('listening_has_answered', set()).add(question_index))
         print(f"Checkpoint: Marked listening question {question_index} as answered for session {session_id}")
         
-        # Load existing temp evaluations for this session
-        temp_evaluations = load_temp_evaluation(session_id)
-        if not temp_evaluations:
-            temp_evaluations = {
-                "speech_eval": [],
-                "listening_test": [],
-                "written_test": [],
-                "typing_test": []
-            }
-        
-        # Add listening test result to listening_test section
-        temp_evaluations["listening_test"].append(result)
-        
-        # Save back to temporary evaluations
-        if not save_temp_evaluation(temp_evaluations, session_id):
+        # Append atomically so parallel submissions for this session can't overwrite each other
+        if not append_temp_evaluation(result, session_id, "listening_test"):
             print(f"Warning: Failed to save listening test evaluation for session {session_id}")  # Log warning but don't fail request
     
     return jsonify(result)  # Return evaluation results
 
 @audio_bp.route("/speak", methods=["POST"])
 def speak_endpoint():
-    """Speak the provided text"""
+    """Render the provided text to audio (cached) and return its URL"""
     try:
         data = request.json  # Get request data
         if not data or not data.get("text"):  # Check if text was provided
             return jsonify({"success": False, "message": "Text is required"}), 400  # Return error if no text
 
         text = data["text"]  # Extract text from request
-        speak_async(text)  # Start text-to-speech in background
+        try:
+            future = render_speech_async(text)  # Returns immediately if this prompt was rendered before
+        except TTSQueueFullError:
+            return jsonify({"success": False, "message": "Text-to-speech is busy, please try again"}), 503
 
-        return jsonify({"success": True, "message": "Text-to-speech started"})  # Return success message
+        try:
+            # Cached prompts resolve at once; only a short wait so renders never hold the request thread
+            asset = future.result(timeout=TTS_SPEAK_WAIT_SECONDS)
+        except RenderTimeoutError:
+            # Still rendering; the client polls /speak-audio with this ID until it stops returning 404
+            response = jsonify({
+                "success": True,
+                "pending": True,
+                "audio_id": get_speech_audio_id(text),
+                "message": "Text-to-speech is rendering"
+            })
+            response.headers["Retry-After"] = "1"
+            return response, 202
+
+        return jsonify({
+            "success": True,
+            "message": "Text-to-speech ready",
+            "audio_id": asset["audio_id"],
+            "audio_url": asset["url"]
+        })
     except Exception as e:  # Handle any errors
         return jsonify({"success": False, "message": f"Error with text-to-speech: {str(e)}"}), 500
 
@@ -272,62 +303,54 @@ def speak_audio_endpoint():
         if not data or not data.get("id"):  # Check if audio ID was provided
             return jsonify({"success": False, "message": "Audio ID is required"}), 400  # Return error if no ID
 
-        audio_id = data["id"]  # Extract audio ID from request
-        print(f"DEBUG: Received request for audio with ID: {audio_id}")
-        
-        # Check if the audio file exists in listening questions first
-        listening_audio_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions', 'listening_questions_audio')
-        listening_audio_file = os.path.join(listening_audio_dir, f"{audio_id}.wav")
-        
-        # Check if the audio file exists in speech questions
-        speech_audio_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions', 'speech_questions_audio')
-        speech_audio_file = os.path.join(speech_audio_dir, f"{audio_id}.wav")
-        
-        if os.path.exists(listening_audio_file):
-            # Return the URL to the listening audio file
-            audio_url = f"/audio/listening-questions/{audio_id}.wav"
-            print(f"DEBUG: Listening audio file found, returning URL: {audio_url}")
-        elif os.path.exists(speech_audio_file):
-            # Return the URL to the speech audio file
-            audio_url = f"/audio/speech-questions/{audio_id}.wav"
-            print(f"DEBUG: Speech audio file found, returning URL: {audio_url}")
-        else:
-            print(f"DEBUG: Audio file not found in either directory")
+        asset = get_audio_asset(data["id"])  # Look up audio in the asset index (falls back to the disk)
+        if not asset:
             return jsonify({"success": False, "message": "Audio file not found"}), 404
         
         return jsonify({
             "success": True, 
             "message": "Audio file available", 
-            "audio_url": audio_url
+            "audio_url": asset["url"]
         })
             
     except Exception as e:  # Handle any errors
-        print(f"DEBUG: Error in speak-audio endpoint: {str(e)}")
+        print(f"Error in speak-audio endpoint: {str(e)}")
         return jsonify({"success": False, "message": f"Error with audio file: {str(e)}"}), 500
 
-@audio_bp.route("/audio/listening-questions/<path:filename>")
-def serve_listening_audio(filename):
-    """Serve audio files from the listening_questions_audio directory"""
+def serve_indexed_audio(asset_type, filename):
+    """Serve an indexed question audio file, 404 if it is not in the index"""
+    asset = get_audio_asset_by_filename(asset_type, filename)
+    if not asset:
+        return jsonify({"error": f"Audio file not found: {filename}"}), 404
     try:
-        audio_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions', 'listening_questions_audio')
-        print(f"DEBUG: Serving audio file {filename} from directory: {audio_dir}")
-        print(f"DEBUG: Full path: {os.path.join(audio_dir, filename)}")
-        return send_from_directory(audio_dir, filename)
+        return send_from_directory(get_audio_asset_dir(asset_type), asset["filename"], conditional=True)
     except Exception as e:
-        print(f"Error serving audio file {filename}: {e}")
+        print(f"Error serving {asset_type} audio file {filename}: {e}")
         return jsonify({"error": f"Audio file not found: {str(e)}"}), 404
 
+@audio_bp.route("/audio/listening-questions/<path:filename>")
+def serve_listening_audio(filename):
+    """Serve audio files from the listening_questions_audio directory"""
+    return serve_indexed_audio("listening", filename)
+
 @audio_bp.route("/audio/speech-questions/<path:filename>")
 def serve_speech_audio(filename):
     """Serve audio files from the speech_questions_audio directory"""
+    return serve_indexed_audio("speech", filename)
+
+@audio_bp.route("/audio/tts/<path:filename>")
+def serve_tts_audio(filename):
+    """Serve rendered text-to-speech files from the TTS cache directory"""
+    return serve_indexed_audio("tts", filename)
+
+@audio_bp.route("/audio/sprites/<path:filename>")
+def serve_sprite_audio(filename):
+    """Serve listening test audio sprites from the sprite cache directory"""
     try:
-        audio_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions', 'speech_questions_audio')
-        print(f"DEBUG: Serving speech audio file {filename} from directory: {audio_dir}")
-        print(f"DEBUG: Full path: {os.path.join(audio_dir, filename)}")
-        return send_from_directory(audio_dir, filename)
+        return send_from_directory(AUDIO_SPRITE_DIR, filename, conditional=True)
     except Exception as e:
-        print(f"Error serving speech audio file {filename}: {e}")
-        return jsonify({"error": f"Speech audio file not found: {str(e)}"}), 404
+        print(f"Error serving audio sprite {filename}: {e}")
+        return jsonify({"error": f"Audio sprite not found: {str(e)}"}), 404
 
 @audio_bp.route("/recordings/<path:filename>")
 def serve_audio(filename):
@@ -3,8 +3,9 @@ import json
 import random
 from datetime import datetime
 from utils.file_ops import (
-    save_temp_evaluation, load_temp_evaluation, load_personality_test_questions, save_personality_test_questions
+    append_temp_evaluation, save_personality_test_questions
 )
+from utils.question_catalog import get_catalog_questions, get_catalog_version
 
 personality_bp = Blueprint('personality', __name__)
 
@@ -15,8 +16,8 @@ def get_personality_test_questions():
         # Get session ID from query parameters (optional for personality test)
         session_id = request.args.get("session_id")
         
-        # Load all questions from MongoDB
-        all_questions = load_personality_test_questions()
+        # Load all questions from the in-process catalog
+        all_questions = get_catalog_questions("personality")
         
         # Filter active questions
         active_questions = [q for q in all_questions if q.get("active", True)]
@@ -38,7 +39,8 @@ def get_personality_test_questions():
             
         return jsonify({
             "success": True,
-            "questions": questions_for_frontend
+            "questions": questions_for_frontend,
+            "catalog_version": get_catalog_version("personality")
         }), 200
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -64,7 +66,7 @@ def submit_personality_test():
             }), 400
         
         # Load all questions to analyze responses
-        all_questions = load_personality_test_questions()
+        all_questions = get_catalog_questions("personality")
         
         # Create a lookup for questions by ID
         questions_lookup = {q["id"]: q for q in all_questions}
@@ -139,26 +141,8 @@ def submit_personality_test():
             "completion_time": data.get('completion_time', 0)  # Time taken in seconds
         }
         
-        # Load existing temporary evaluations for this session
-        temp_evaluations = load_temp_evaluation(session_id)
-        if not temp_evaluations:
-            temp_evaluations = {
-                "speech_eval": [],
-                "listening_test": [],
-                "written_test": [],
-                "typing_test": [],
-                "personality_test": []
-            }
-        
-        # Ensure personality_test exists in temp_evaluations
-        if "personality_test" not in temp_evaluations:
-            temp_evaluations["personality_test"] = []
-        
-        # Add personality test result to personality_test section
-        temp_evaluations["personality_test"].append(personality_result)
-        
-        # Save back to temporary file
-        if not save_temp_evaluation(temp_evaluations, session_id):
+        # Append atomically so parallel submissions for this session can't overwrite each other
+        if not append_temp_evaluation(personality_result, session_id, "personality_test"):
             return jsonify({
                 "success": False,
                 "message": "Failed to save evaluation results"
@@ -1,17 +1,18 @@
 from flask import Blueprint, jsonify, request
 from utils.session import (
-    get_active_questions_for_session, get_session_state, set_session_state,
+    get_active_questions_for_session, get_session_state, update_session_state,
     get_current_question_for_session, move_to_next_question, 
     mark_question_answered, get_question_status, reset_session_questions,
     get_active_listening_test_questions_for_session, get_question_by_index,
-    resume_session_from_last_checkpoint, resume_listening_session_from_last_checkpoint,
-    get_next_unanswered_question_index, get_next_unanswered_listening_question_index,
-    get_test_completion_status
+    resume_session_from_last_checkpoint, resume_listening_session_from_last_checkpoint
 )
-from utils.tts import speak_async
+from utils.progress import get_progress_snapshot
+from config import LISTENING_AUDIO_SPRITE_ENABLED
+from utils.audio_sprite import build_audio_sprite
 from utils.file_ops import (
-    load_questions, save_questions, load_listening_test_questions, save_listening_test_questions, load_written_test_questions, save_written_test_questions
+    save_questions, load_listening_test_questions, save_listening_test_questions, load_written_test_questions, save_written_test_questions
 )
+from utils.question_catalog import get_catalog_questions
 
 questions_bp = Blueprint('questions', __name__)
 
@@ -19,7 +20,7 @@ questions_bp = Blueprint('questions', __name__)
 def get_current_question():
     """Get the current question from MongoDB."""
     try:
-        questions = load_questions()
+        questions = get_catalog_questions("speech")
         # ... (existing logic to select the current question)
         # Return the question as before
     except Exception as e:
@@ -104,6 +105,7 @@ def next_question():
     
     # Try to move to next question
     if move_to_next_question(session_id):  # Attempt to advance to next question
+        state = get_session_state(session_id)  # Re-read the saved state
         # Get new current question
         current_question = get_question_by_index(session_id, state['current_index'])  # Get next question data
         
@@ -178,11 +180,24 @@ def get_current_listening_test_question():
     if current_index < len(questions):  # Check if current index is valid
         current_question = questions[current_index]  # Get current question data
         print(f"DEBUG: Session {session_id} - Returning listening question {current_index + 1}: {current_question['text'][:50]}...")
-        return jsonify({
+        response = {
             "text": current_question["text"],
             "id": current_question["id"],
             "audio_id": current_question.get("audio_id", "")
-        })  # Return current question as JSON
+        }
+        
+        # Optional sprite mode: all of the session's clips in one download plus an offset table
+        sprite_param = request.args.get("sprite")
+        use_sprite = sprite_param == "1" if sprite_param is not None else LISTENING_AUDIO_SPRITE_ENABLED
+        if use_sprite:
+            try:
+                sprite = build_audio_sprite([q.get("audio_id", "") for q in questions])
+                if sprite:
+                    response["sprite"] = {**sprite, "current_segment": current_index}
+            except Exception as e:
+                print(f"Error building listening audio sprite for session {session_id}: {e}")  # Fall back to per-clip audio
+        
+        return jsonify(response)  # Return current question as JSON
     else:  # If no current question
         print(f"DEBUG: Session {session_id} - No current listening question available")
         return jsonify({"text": "No listening test questions available", "keywords": []})
@@ -227,18 +242,22 @@ def listening_test_next_question():
             "currentIndex": current_index
         })
     
-    # Try to move to next question
-    if current_index + 1 < len(questions):  # Check if next question exists
+    def _advance(state):
+        index = state.get('listening_current_index', 0)  # Re-read in case another request moved on
+        if index + 1 >= len(questions):
+            return None
         # Mark current question as answered
-        state['listening_has_answered'] = state.get('listening_has_answered', set())
-        state['listening_has_answered'].add(current_index)  # Track that current question was answered
+        state.setdefault('listening_has_answered', set()).add(index)  # Track that current question was answered
         
         # Move to next question
-        state['listening_current_index'] = current_index + 1  # Increment question index
-        set_session_state(session_id, state)  # Save updated state
-        
+        state['listening_current_index'] = index + 1  # Increment question index
+        return state['listening_current_index']
+    
+    # Try to move to next question
+    next_index = update_session_state(session_id, _advance) if current_index + 1 < len(questions) else None  # Save updated state
+    if next_index is not None:  # Check if next question exists
         # Get new current question
-        current_question = questions[state['listening_current_index']]  # Get next question data
+        current_question = questions[next_index]  # Get next question data
         
         return jsonify({  # Return success with next question
             "success": True, 
@@ -247,7 +266,7 @@ def listening_test_next_question():
                 "id": current_question["id"],
                 "audio_id": current_question.get("audio_id", "")
             },
-            "currentIndex": state['listening_current_index']
+            "currentIndex": next_index
         })
     else:  # If no more questions
         return jsonify({  # Return error indicating no more questions
@@ -266,11 +285,12 @@ def listening_test_reset():
         return jsonify({"success": False, "message": "Session ID required"}), 400
     
     # Reset listening test session state
-    state = get_session_state(session_id)  # Get current session state
-    state['listening_current_index'] = 0  # Reset to first question
-    state['listening_questions'] = None  # Clear cached questions to force regeneration
-    state['listening_has_answered'] = set()  # Clear answered questions tracking
-    set_session_state(session_id, state)  # Save reset state
+    def _reset(state):
+        state['listening_current_index'] = 0  # Reset to first question
+        state['listening_question_ids'] = None  # Clear picked questions to force regeneration
+        state['listening_has_answered'] = set()  # Clear answered questions tracking
+    update_session_state(session_id, _reset)  # Save reset state
+    state = get_session_state(session_id)
     
     # Get session-specific listening test questions (will regenerate with new randomization)
     questions = get_active_listening_test_questions_for_session(session_id)  # Load session-specific listening test questions
@@ -304,42 +324,12 @@ def get_session_progress():
         if not session_id:
             return jsonify({"success": False, "message": "Session ID required"}), 400
         
-        # Get session state from MongoDB (persistent storage)
-        state = get_session_state(session_id)
-        
-        # Get test completion status
-        test_completion = get_test_completion_status(session_id)
-        
-        # Get speech evaluation progress
-        speech_questions = get_active_questions_for_session(session_id)
-        speech_next_index = get_next_unanswered_question_index(session_id)
-        speech_answered_count = len(state.get('has_answered', set()))
-        
-        # Get listening test progress
-        listening_questions = get_active_listening_test_questions_for_session(session_id)
-        listening_next_index = get_next_unanswered_listening_question_index(session_id)
-        listening_answered_count = len(state.get('listening_has_answered', set()))
-        
-        progress_data = {
-            "success": True,
-            "session_id": session_id,
-            "test_completion": test_completion,
-            "speech_evaluation": {
-                "current_index": speech_next_index,
-                "total_questions": len(speech_questions) if speech_questions else 0,
-                "answered_count": speech_answered_count,
-                "is_complete": test_completion.get('speech', False)
-            },
-            "listening_test": {
-                "current_index": listening_next_index,
-                "total_questions": len(listening_questions) if listening_questions else 0,
-                "answered_count": listening_answered_count,
-                "is_complete": test_completion.get('listening', False)
-            },
-            "last_updated": state.get('last_updated')
-        }
+        # Build every test's progress from one session state read (no writes)
+        progress_data = {"success": True, **get_progress_snapshot(session_id)}
+        speech = progress_data["speech_evaluation"]
+        listening = progress_data["listening_test"]
         
-        print(f"Session {session_id} progress retrieved: Speech {speech_answered_count}/{len(speech_questions) if speech_questions else 0}, Listening {listening_answered_count}/{len(listening_questions) if listening_questions else 0}")
+        print(f"Session {session_id} progress retrieved: Speech {speech['answered_count']}/{speech['total_questions']}, Listening {listening['answered_count']}/{listening['total_questions']}")
         
         return jsonify(progress_data)
         
@@ -4,8 +4,9 @@ import os
 from datetime import datetime
 from config import TYPING_TESTS_FILE
 from utils.file_ops import (
-    load_typing_tests, save_typing_tests, save_temp_evaluation, load_temp_evaluation
+    save_typing_tests, append_temp_evaluation
 )
+from utils.question_catalog import get_catalog_questions, get_catalog_version
 
 typing_bp = Blueprint('typing', __name__)
 
@@ -13,7 +14,7 @@ typing_bp = Blueprint('typing', __name__)
 def get_typing_test():
     """Get a random typing test for the applicant from MongoDB"""
     try:
-        typing_tests = load_typing_tests()
+        typing_tests = get_catalog_questions("typing")
         if not typing_tests:
             return jsonify({"success": False, "message": "Typing tests not available"}), 404
         import random
@@ -27,7 +28,8 @@ def get_typing_test():
                 "word_count": selected_test["word_count"],
                 "difficulty": selected_test["difficulty"],
                 "category": selected_test["category"]
-            }
+            },
+            "catalog_version": get_catalog_version("typing")
         })
     except Exception as e:
         return jsonify({"success": False, "message": f"Error retrieving typing test: {str(e)}"}), 500
@@ -70,21 +72,8 @@ def submit_typing_test():
             "accuracy_percentage": accuracy
         }
         
-        # Load existing temporary evaluations for this session
-        temp_evaluations = load_temp_evaluation(session_id)
-        if not temp_evaluations:
-            temp_evaluations = {
-                "speech_eval": [],
-                "listening_test": [],
-                "written_test": [],
-                "typing_test": []
-            }
-        
-        # Add typing test result to typing_test section
-        temp_evaluations["typing_test"].append(typing_result)
-        
-        # Save back to temporary file
-        if not save_temp_evaluation(temp_evaluations, session_id):
+        # Append atomically so parallel submissions for this session can't overwrite each other
+        if not append_temp_evaluation(typing_result, session_id, "typing_test"):
             return jsonify({
                 "success": False,
                 "message": "Failed to save evaluation results"
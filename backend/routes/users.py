@@ -7,7 +7,7 @@ from utils.auth import (
 )
 from utils.file_ops import (
     load_users, save_users, find_user_by_username, find_user_by_id,
-    create_user, update_user, delete_user
+    create_user, update_user, delete_user, count_active_super_admins
 )
 from config import USER_ROLES, ADMIN_USERNAME, ADMIN_PASSWORD
 
@@ -292,9 +292,7 @@ def toggle_user_status(user_id):
         
         # Don't allow deactivating the last super admin
         if not new_status and user.get('role') == 'super_admin':
-            users = load_users()
-            active_super_admins = [u for u in users if u.get('role') == 'super_admin' and u.get('active', True)]
-            if len(active_super_admins) <= 1:
+            if count_active_super_admins() <= 1:
                 return jsonify({"success": False, "message": "Cannot deactivate the last super admin"}), 400
         
         updated_user = update_user(user_id, {
@@ -4,7 +4,7 @@ import random
 from datetime import datetime
 from config import WRITTEN_TEST_QUESTIONS_FILE
 from utils.file_ops import (
-    save_temp_evaluation, load_temp_evaluation, load_written_test_questions, save_written_test_questions
+    append_temp_evaluation, load_written_test_questions, save_written_test_questions
 )
 from utils.session import get_active_written_test_questions_for_session
 
@@ -155,21 +155,8 @@ def submit_written_test():
             "completion_time": data.get('completion_time', 0)  # Time taken in seconds
         }
         
-        # Load existing temporary evaluations for this session
-        temp_evaluations = load_temp_evaluation(session_id)
-        if not temp_evaluations:
-            temp_evaluations = {
-                "speech_eval": [],
-                "listening_test": [],
-                "written_test": [],
-                "typing_test": []
-            }
-        
-        # Add written test result to written_test section
-        temp_evaluations["written_test"].append(written_result)
-        
-        # Save back to temporary file
-        if not save_temp_evaluation(temp_evaluations, session_id):
+        # Append atomically so parallel submissions for this session can't overwrite each other
+        if not append_temp_evaluation(written_result, session_id, "written_test"):
             return jsonify({
                 "success": False,
                 "message": "Failed to save evaluation results"
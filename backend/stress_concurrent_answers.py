@@ -0,0 +1,90 @@
+"""
+Stress check: submit many answers for one session in parallel and verify none are lost
+
+Runs against the MongoDB configured in .env using a throwaway session, which is removed afterwards.
+
+Usage:
+    python stress_concurrent_answers.py [--answers 40] [--workers 16] [--naive]
+
+--naive also runs the old read-modify-write save for comparison (expect lost updates).
+"""
+
+import argparse
+import sys
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from utils.db import db, session_states_collection
+from utils.file_ops import append_temp_evaluation, load_temp_evaluation, save_temp_evaluation, cleanup_temp_files
+from utils.session import update_session_state, clear_session
+
+
+def submit_answer(app, session_id, index):
+    """One upload: speech checkpoint through the API, listening checkpoint and evaluation results directly"""
+    with app.test_client() as client:
+        response = client.post("/mark_answered", json={"session_id": session_id, "question_index": index})
+        if response.status_code != 200:
+            raise RuntimeError(response.get_json())
+    update_session_state(session_id, lambda state: state.setdefault('listening_has_answered', set()).add(index))
+    append_temp_evaluation({"question_index": index}, session_id, "speech_eval")
+
+
+def naive_submit(session_id, index):
+    """The previous pattern: load the whole evaluation, append, save it back"""
+    evaluations = load_temp_evaluation(session_id) or {"speech_eval": []}
+    evaluations["speech_eval"].append({"question_index": index})
+    save_temp_evaluation(evaluations, session_id)
+
+
+def run(label, session_id, count, workers, submit):
+    """Submit count answers with a thread pool, then report what was stored"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(submit, range(count)))
+    state = session_states_collection.find_one({"session_id": session_id}) or {}
+    evaluations = load_temp_evaluation(session_id) or {}
+    stored = {
+        "speech checkpoints": len(state.get("has_answered", [])),
+        "listening checkpoints": len(state.get("listening_has_answered", [])),
+        "speech evaluations": len(evaluations.get("speech_eval", []))
+    }
+    print(f"\n{label}")
+    for name, value in stored.items():
+        print(f"  {name}: {value}/{count}")
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel answer submission stress check")
+    parser.add_argument("--answers", type=int, default=40, help="Answers to submit")
+    parser.add_argument("--workers", type=int, default=16, help="Parallel submitters")
+    parser.add_argument("--naive", action="store_true", help="Also run the old read-modify-write save")
+    args = parser.parse_args()
+
+    app = create_app()
+    session_id = f"stress_{uuid.uuid4().hex[:12]}"
+    failed = False
+    try:
+        stored = run("Atomic submissions", session_id, args.answers, args.workers,
+                     lambda index: submit_answer(app, session_id, index))
+        failed = any(value != args.answers for value in stored.values())
+
+        if args.naive:
+            db.temp_evaluations.delete_one({"sessionId": session_id})
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                list(pool.map(lambda index: naive_submit(session_id, index), range(args.answers)))
+            saved = len((load_temp_evaluation(session_id) or {}).get("speech_eval", []))
+            print("\nRead-modify-write submissions (previous behaviour)")
+            print(f"  speech evaluations: {saved}/{args.answers} ({args.answers - saved} lost)")
+    finally:
+        clear_session(session_id)
+        cleanup_temp_files(session_id)
+
+    print("\nFAILED: answers were lost" if failed else "\nOK: no answers lost")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
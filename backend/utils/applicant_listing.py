@@ -0,0 +1,226 @@
+"""Paginated applicant summaries for the admin listing (full records load per applicant)"""
+
+import base64
+import json
+import re
+from datetime import datetime, timezone
+from config import APPLICANT_PAGE_SIZE, APPLICANT_PAGE_SIZE_MAX
+from .db import db
+
+EVALUATION_SEGMENTS = ["speech_eval", "listening_test", "written_test", "personality_test", "typing_test"]
+
+# Applicant info fields the listing shows and searches on; everything else comes with the details
+SUMMARY_INFO_FIELDS = [
+    "firstName", "lastName", "email", "positionApplied", "positionType",
+    "cellphoneNumber", "landlineNumber", "applicant_status"
+]
+
+# Applicant info fields the listing search matches against
+SEARCH_FIELDS = ["firstName", "lastName", "email", "positionApplied", "cellphoneNumber"]
+
+# Headline score per test: (segment, numeric field averaged over its entries, missing values counting as 0)
+HEADLINE_SCORES = {
+    "speech": ("speech_eval", "evaluation.score"),
+    "listening": ("listening_test", "accuracy_percentage"),
+    "written": ("written_test", "score_percentage"),
+    "typing": ("typing_test", "words_per_minute")
+}
+
+
+# BSON date of the application time, stored on applicants and temp applicants so the listing sorts one typed
+# field (application timestamps were written as ISO strings with and without a "Z", and sometimes as dates)
+LISTING_TIMESTAMP_FIELD = "application_at"
+
+
+def parse_timestamp(value):
+    """Naive UTC datetime, at BSON's millisecond precision, from a stored timestamp (None if it isn't one)"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=parsed.microsecond // 1000 * 1000)
+
+
+def encode_cursor(timestamp, applicant_id):
+    """Opaque cursor for the position after an applicant"""
+    position = [timestamp.isoformat() if timestamp is not None else None, applicant_id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(datetime or None, applicant_id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        timestamp, applicant_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    parsed = parse_timestamp(timestamp)
+    if timestamp is not None and parsed is None:
+        raise ValueError("Invalid cursor")
+    return parsed, applicant_id
+
+
+def _keyset_filter(timestamp_field, id_field, cursor):
+    """Documents after the cursor in (timestamp desc, id desc) order; missing timestamps sort last"""
+    if cursor is None:
+        return {}
+    timestamp, applicant_id = cursor
+    if timestamp is None:
+        return {timestamp_field: None, id_field: {"$lt": applicant_id}}
+    return {"$or": [
+        {timestamp_field: {"$lt": timestamp}},
+        {timestamp_field: timestamp, id_field: {"$lt": applicant_id}},
+        {timestamp_field: None}
+    ]}
+
+
+def _search_filter(info_path, search):
+    """Every word of the search must appear (case-insensitively) in one of the searched info fields"""
+    words = [word for word in re.split(r"[\s,]+", search or "") if word]
+    if not words:
+        return {}
+    return {"$and": [
+        {"$or": [{f"{info_path}.{field}": {"$regex": re.escape(word), "$options": "i"}} for field in SEARCH_FIELDS]}
+        for word in words
+    ]}
+
+
+def _combine(*filters):
+    """AND the non-empty filters together"""
+    filters = [f for f in filters if f]
+    if not filters:
+        return {}
+    return filters[0] if len(filters) == 1 else {"$and": filters}
+
+
+def _array(path):
+    """Expression for an array field, [] when missing or not an array"""
+    return {"$cond": [{"$isArray": f"${path}"}, f"${path}", []]}
+
+
+def _summary_scores(root=""):
+    """Projection computing headline scores and per-test counts from evaluation segments under root"""
+    scores = {}
+    for name, (segment, field) in HEADLINE_SCORES.items():
+        entries = _array(f"{root}{segment}")
+        scores[name] = {"$cond": [
+            {"$gt": [{"$size": entries}, 0]},
+            {"$divide": [{"$sum": f"${root}{segment}.{field}"}, {"$size": entries}]},
+            0
+        ]}
+    # Personality: categories passed out of categories analysed in the first result
+    categories = {"$objectToArray": {"$ifNull": [{"$arrayElemAt": [f"${root}personality_test.category_analysis", 0]}, {}]}}
+    scores["personality_passed"] = {"$size": {"$filter": {"input": categories, "as": "c", "cond": {"$eq": ["$$c.v.passed", True]}}}}
+    scores["personality_total"] = {"$size": categories}
+    return {
+        "scores": scores,
+        "test_counts": {segment: {"$size": _array(f"{root}{segment}")} for segment in EVALUATION_SEGMENTS}
+    }
+
+
+def _info_projection(path):
+    """Projection of the summary applicant info fields from an embedded document"""
+    return {field: f"${path}.{field}" for field in SUMMARY_INFO_FIELDS}
+
+
+def _permanent_page(cursor, limit, search=None):
+    """One page of permanent applicant summaries, newest first"""
+    pipeline = [
+        {"$match": _combine(_keyset_filter(LISTING_TIMESTAMP_FIELD, "id", cursor), _search_filter("applicant_info", search))},
+        {"$sort": {LISTING_TIMESTAMP_FIELD: -1, "id": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "status": {"$literal": "permanent"},
+            "applicant_info": _info_projection("applicant_info"),
+            "applicant_status": 1,
+            "application_timestamp": 1,
+            LISTING_TIMESTAMP_FIELD: 1,
+            "completion_timestamp": 1,
+            "last_updated": 1,
+            "comment_count": {"$size": _array("comments")},
+            **_summary_scores()
+        }}
+    ]
+    return list(db.applicants.aggregate(pipeline))
+
+
+def _temporary_page(cursor, limit, search=None):
+    """One page of in-progress (temporary) applicant summaries, newest first, joined with evaluations and comments in one pipeline"""
+    pipeline = [
+        {"$match": _combine(_keyset_filter(LISTING_TIMESTAMP_FIELD, "sessionId", cursor), _search_filter("applicant", search))},
+        {"$sort": {LISTING_TIMESTAMP_FIELD: -1, "sessionId": -1}},
+        {"$limit": limit},
+        # Both joins use the sessionId indexes; only the computed summary leaves the server
+        {"$lookup": {"from": "temp_evaluations", "localField": "sessionId", "foreignField": "sessionId", "as": "evaluation"}},
+        {"$lookup": {"from": "temp_comments", "localField": "sessionId", "foreignField": "sessionId", "as": "comment_doc"}},
+        {"$addFields": {
+            "evaluation": {"$arrayElemAt": ["$evaluation", 0]},
+            "comment_doc": {"$arrayElemAt": ["$comment_doc", 0]}
+        }},
+        {"$project": {
+            "_id": 0,
+            "id": "$sessionId",
+            "status": {"$literal": "temporary"},
+            "applicant_info": _info_projection("applicant"),
+            "application_timestamp": {"$ifNull": ["$timestamp", None]},
+            LISTING_TIMESTAMP_FIELD: {"$ifNull": [f"${LISTING_TIMESTAMP_FIELD}", None]},
+            "completion_timestamp": {"$literal": None},  # Not completed yet
+            "last_updated": {"$ifNull": ["$timestamp", None]},
+            "comment_count": {"$size": _array("comment_doc.comments")},
+            **_summary_scores("evaluation.")
+        }}
+    ]
+    return list(db.temp_applicants.aggregate(pipeline))
+
+
+def _sort_key(summary):
+    """Same order as the MongoDB sorts: application date desc (missing last), then id desc"""
+    timestamp = summary.get(LISTING_TIMESTAMP_FIELD)
+    return (timestamp is not None, timestamp or datetime.min, summary.get("id") or "")
+
+
+def count_applicants(search=None):
+    """Number of permanent and temporary applicants matching a search"""
+    return (db.applicants.count_documents(_search_filter("applicant_info", search))
+            + db.temp_applicants.count_documents(_search_filter("applicant", search)))
+
+
+def list_applicant_summaries(cursor=None, limit=None, search=None):
+    """
+    One page of permanent and temporary applicants, newest application first
+
+    Args:
+        cursor: next_cursor from the previous page, or None for the first page
+        limit: page size (defaults to APPLICANT_PAGE_SIZE, capped at APPLICANT_PAGE_SIZE_MAX)
+        search: words that must each match a name, email, position or cellphone number
+
+    Returns:
+        dict: {"applicants": [summary], "next_cursor": str or None, "has_more": bool}, plus "total" on the first page
+    """
+    limit = max(1, min(int(limit or APPLICANT_PAGE_SIZE), APPLICANT_PAGE_SIZE_MAX))
+    position = decode_cursor(cursor) if cursor else None
+
+    # Each source is already sorted, so limit + 1 from each is enough to fill the page and detect more
+    candidates = _permanent_page(position, limit + 1, search) + _temporary_page(position, limit + 1, search)
+    candidates.sort(key=_sort_key, reverse=True)
+    page = candidates[:limit]
+    has_more = len(candidates) > limit
+
+    next_cursor = None
+    if has_more and page:
+        last = page[-1]
+        next_cursor = encode_cursor(last.get(LISTING_TIMESTAMP_FIELD), last.get("id"))
+    for summary in page:
+        summary.pop(LISTING_TIMESTAMP_FIELD, None)  # Only used for ordering; application_timestamp is shown
+    result = {"applicants": page, "next_cursor": next_cursor, "has_more": has_more}
+    if position is None:
+        result["total"] = count_applicants(search) if has_more else len(page)  # Counted once, not per page
+    return result
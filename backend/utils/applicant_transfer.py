@@ -0,0 +1,270 @@
+"""Streaming bulk import/export of permanent applicants (constant memory in both directions)"""
+
+import csv
+import io
+import json
+import time
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+from config import TRANSFER_BATCH_SIZE, TRANSFER_READ_CHUNK, TRANSFER_MAX_DOCUMENT_CHARS
+from .db import db
+from .migrations import upgrade_document
+from .applicant_listing import SUMMARY_INFO_FIELDS, HEADLINE_SCORES, LISTING_TIMESTAMP_FIELD, parse_timestamp, _summary_scores
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}  # format -> content type
+WRAPPER_KEY = "applicants"  # data/applicants.json is {"_comment": ..., "applicants": [...]}
+
+# CSV export columns: one row per applicant, evaluations reduced to their headline scores
+CSV_COLUMNS = (
+    ["id", "application_timestamp", "completion_timestamp", "last_updated"]
+    + SUMMARY_INFO_FIELDS
+    + [f"{name}_score" for name in HEADLINE_SCORES]
+    + ["personality_passed", "personality_total", "comment_count"]
+)
+
+
+def iter_json_documents(stream, chunk_size=None, stats=None):
+    """
+    Yield applicant documents from a text stream without loading it whole
+
+    Accepts a JSON array of applicants, the {"applicants": [...]} wrapper used by data/applicants.json,
+    or NDJSON (one applicant per line). Only one chunk plus the document being decoded is held in memory,
+    and a document that is still incomplete after TRANSFER_MAX_DOCUMENT_CHARS is rejected.
+
+    Args:
+        stats: optional dict whose "bytes" is kept up to date with the UTF-8 size read so far
+
+    Raises:
+        ValueError: if the input is not valid JSON in one of those shapes (offsets count characters from the start)
+    """
+    chunk_size = chunk_size or TRANSFER_READ_CHUNK
+    stats = stats if stats is not None else {}
+    stats.setdefault("bytes", 0)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    consumed = 0  # Characters dropped from the front of the buffer, so consumed + pos is the input offset
+    eof = False
+
+    def fill():
+        """Read another chunk, dropping what has already been consumed"""
+        nonlocal buffer, pos, consumed, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        stats["bytes"] += len(chunk.encode("utf-8"))
+        consumed += pos
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def invalid(message, offset):
+        return ValueError(f"Invalid JSON: {message} near offset {consumed + offset}")
+
+    def peek():
+        """Next non-whitespace character ("" at the end of input)"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    def decode():
+        """Decode the next JSON value, reading more input until it is complete"""
+        nonlocal pos
+        peek()  # raw_decode does not skip leading whitespace
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise invalid(e.msg, e.pos)
+                if len(buffer) - pos > TRANSFER_MAX_DOCUMENT_CHARS:
+                    # Malformed or truncated input would otherwise be buffered up to the end of the stream
+                    raise invalid(f"no complete value within {TRANSFER_MAX_DOCUMENT_CHARS} characters", pos)
+                fill()
+                continue
+            if end == len(buffer) and not eof and end - pos <= TRANSFER_MAX_DOCUMENT_CHARS:
+                fill()  # A number or literal may continue in the next chunk
+                continue
+            pos = end
+            return value
+
+    def expect(char):
+        nonlocal pos
+        if peek() != char:
+            raise invalid(f"expected '{char}'", pos)
+        pos += 1
+
+    def iter_array():
+        """Elements of the array starting at the current position"""
+        nonlocal pos
+        expect("[")
+        if peek() == "]":
+            pos += 1
+            return
+        while True:
+            yield decode()
+            if peek() == "]":
+                pos += 1
+                return
+            expect(",")
+
+    while True:
+        first = peek()
+        if first == "":
+            return
+        if first == "[":
+            yield from iter_array()
+            continue
+        if first != "{":
+            raise invalid("expected an object or array", pos)
+
+        # An object is either the wrapper (stream its applicants array) or one NDJSON document;
+        # read it key by key so the wrapper never has to fit in memory
+        pos += 1
+        document = {}
+        while peek() != "}":
+            if document:
+                expect(",")
+            key = decode()
+            expect(":")
+            if key == WRAPPER_KEY and peek() == "[":
+                yield from iter_array()
+                document = None
+                break
+            document[key] = decode()
+        if document is None:
+            return  # Anything after the wrapper's applicants array is metadata
+        pos += 1
+        yield document
+
+
+def _write_batch(operations, report):
+    """Unordered bulk upsert; failed documents are counted and the rest of the batch still lands"""
+    try:
+        result = db.applicants.bulk_write(operations, ordered=False)
+        counts = (result.upserted_count, result.matched_count, result.modified_count)
+    except BulkWriteError as e:
+        details = e.details
+        counts = (details.get("nUpserted", 0), details.get("nMatched", 0), details.get("nModified", 0))
+        report["errors"] += len(details.get("writeErrors", []))
+    report["upserted"] += counts[0]
+    report["matched"] += counts[1]
+    report["modified"] += counts[2]
+
+
+def import_applicants(stream, batch_size=None, dry_run=False):
+    """
+    Upsert applicants by ID from a JSON/NDJSON stream in unordered batches
+
+    Returns:
+        dict: {read, skipped, upserted, matched, modified, errors, bytes, seconds}
+    """
+    batch_size = batch_size or TRANSFER_BATCH_SIZE
+    report = {"read": 0, "skipped": 0, "upserted": 0, "matched": 0, "modified": 0, "errors": 0, "bytes": 0}
+    started = time.perf_counter()
+    operations = []
+    for doc in iter_json_documents(stream, stats=report):
+        report["read"] += 1
+        if not isinstance(doc, dict) or not doc.get("id"):
+            report["skipped"] += 1  # Applicants are keyed by id
+            continue
+        doc.pop("_id", None)
+        upgrade_document("applicants", doc)  # Older exports are stored in the current shape, with schema_version set
+        doc[LISTING_TIMESTAMP_FIELD] = parse_timestamp(doc.get("application_timestamp"))  # Never exported; always derived
+        operations.append(ReplaceOne({"id": doc["id"]}, doc, upsert=True))
+        if len(operations) >= batch_size:
+            if not dry_run:
+                _write_batch(operations, report)
+            operations = []
+    if operations and not dry_run:
+        _write_batch(operations, report)
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def _export_cursor(batch_size=None):
+    """Server-side cursor over every permanent applicant, fetched batch_size documents at a time"""
+    return db.applicants.find({}, {"_id": 0, LISTING_TIMESTAMP_FIELD: 0}, batch_size=batch_size or TRANSFER_BATCH_SIZE)
+
+
+def _csv_cursor(batch_size=None):
+    """Server-side cursor over one flat row per applicant (scores computed in MongoDB)"""
+    pipeline = [{"$project": {
+        "_id": 0,
+        "id": 1,
+        "application_timestamp": 1,
+        "completion_timestamp": 1,
+        "last_updated": 1,
+        "applicant_info": 1,
+        "comment_count": {"$size": {"$cond": [{"$isArray": "$comments"}, "$comments", []]}},
+        **_summary_scores()
+    }}]
+    return db.applicants.aggregate(pipeline, batchSize=batch_size or TRANSFER_BATCH_SIZE)
+
+
+def _csv_row(summary):
+    """Flatten an exported summary into CSV_COLUMNS order"""
+    info = summary.get("applicant_info") or {}
+    scores = summary.get("scores") or {}
+    row = {column: summary.get(column) for column in ["id", "application_timestamp", "completion_timestamp",
+                                                      "last_updated", "comment_count"]}
+    row.update({field: info.get(field) for field in SUMMARY_INFO_FIELDS})
+    row.update({f"{name}_score": scores.get(name) for name in HEADLINE_SCORES})
+    row["personality_passed"] = scores.get("personality_passed")
+    row["personality_total"] = scores.get("personality_total")
+    return [("" if row.get(column) is None else row.get(column)) for column in CSV_COLUMNS]
+
+
+def _csv_line(values):
+    """One CSV-encoded line"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def iter_export(export_format="ndjson", batch_size=None, report=None):
+    """
+    Yield the export as text chunks (one per applicant, plus the CSV header)
+
+    Args:
+        export_format: "ndjson" (full documents) or "csv" (one summary row per applicant)
+        report: optional dict updated with {exported, bytes, seconds} as the stream is consumed
+
+    Raises:
+        ValueError: for an unknown format
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    report = report if report is not None else {}
+    return _iter_export(export_format, batch_size, report)
+
+
+def _iter_export(export_format, batch_size, report):
+    """Generator behind iter_export (kept separate so a bad format fails before streaming starts)"""
+    report.update({"exported": 0, "bytes": 0, "seconds": 0.0})
+    started = time.perf_counter()
+
+    if export_format == "ndjson":
+        rows = (json.dumps(doc, default=str) + "\n" for doc in _export_cursor(batch_size))
+    else:
+        header = _csv_line(CSV_COLUMNS)
+        report["bytes"] += len(header.encode())
+        yield header
+        rows = (_csv_line(_csv_row(summary)) for summary in _csv_cursor(batch_size))
+
+    for line in rows:
+        report["exported"] += 1
+        report["bytes"] += len(line.encode())
+        report["seconds"] = time.perf_counter() - started
+        yield line
+    report["seconds"] = time.perf_counter() - started
+
+
+def format_throughput(count, byte_count, seconds, noun="applicants"):
+    """Human-readable rate line for a finished import or export"""
+    seconds = max(seconds, 1e-9)
+    return (f"{count} {noun} in {seconds:.2f}s "
+            f"({count / seconds:.0f} {noun}/s, {byte_count / (1024 * 1024) / seconds:.2f} MB/s)")
@@ -0,0 +1,156 @@
+"""In-memory index of question audio assets keyed by audio_id"""
+
+import os
+import threading
+from werkzeug.utils import secure_filename
+from config import LISTENING_QUESTIONS_AUDIO_DIR, SPEECH_QUESTIONS_AUDIO_DIR, TTS_CACHE_DIR
+
+# Asset types in lookup priority order (listening audio wins if an id exists in both)
+AUDIO_ASSET_TYPES = {
+    "listening": {
+        "dir": LISTENING_QUESTIONS_AUDIO_DIR,
+        "url_prefix": "/audio/listening-questions"
+    },
+    "speech": {
+        "dir": SPEECH_QUESTIONS_AUDIO_DIR,
+        "url_prefix": "/audio/speech-questions"
+    },
+    "tts": {
+        "dir": TTS_CACHE_DIR,
+        "url_prefix": "/audio/tts"
+    }
+}
+
+QUESTION_AUDIO_TYPES = ("listening", "speech")  # Types admins may upload into
+
+AUDIO_EXTENSIONS = {".wav"}
+
+_index_lock = threading.Lock()
+_assets_by_id = {}  # audio_id -> asset entry
+_assets_by_file = {}  # (asset_type, filename) -> asset entry
+
+
+def _make_entry(asset_type, filename, path, stat):
+    """Build an index entry for one audio file"""
+    return {
+        "audio_id": os.path.splitext(filename)[0],
+        "type": asset_type,
+        "filename": filename,
+        "path": path,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "url": f"{AUDIO_ASSET_TYPES[asset_type]['url_prefix']}/{filename}"
+    }
+
+
+def _scan_asset_dir(asset_type):
+    """Scan one asset directory and return its entries"""
+    audio_dir = AUDIO_ASSET_TYPES[asset_type]["dir"]
+    entries = []
+
+    if not os.path.isdir(audio_dir):
+        return entries
+
+    with os.scandir(audio_dir) as it:
+        for dir_entry in it:
+            ext = os.path.splitext(dir_entry.name)[1]
+            if ext.lower() not in AUDIO_EXTENSIONS or not dir_entry.is_file():
+                continue
+            entries.append(_make_entry(asset_type, dir_entry.name, dir_entry.path, dir_entry.stat()))
+    return entries
+
+
+def _rebuild(asset_types):
+    """Rebuild index entries for the given asset types, keeping the others"""
+    scanned = {asset_type: _scan_asset_dir(asset_type) for asset_type in asset_types}
+
+    with _index_lock:
+        by_file = {key: entry for key, entry in _assets_by_file.items() if key[0] not in scanned}
+        for entries in scanned.values():
+            for entry in entries:
+                by_file[(entry["type"], entry["filename"])] = entry
+
+        # Insert in reverse priority so higher-priority types overwrite duplicate ids
+        by_id = {}
+        for asset_type in reversed(list(AUDIO_ASSET_TYPES)):
+            for (entry_type, _), entry in by_file.items():
+                if entry_type == asset_type:
+                    by_id[entry["audio_id"]] = entry
+
+        _assets_by_id.clear()
+        _assets_by_id.update(by_id)
+        _assets_by_file.clear()
+        _assets_by_file.update(by_file)
+
+    return sum(len(entries) for entries in scanned.values())
+
+
+def build_audio_index():
+    """Build the full audio asset index (called at startup)"""
+    count = _rebuild(list(AUDIO_ASSET_TYPES))
+    print(f"✓ Indexed {count} question audio files")
+    return count
+
+
+def refresh_audio_index(asset_type=None):
+    """Refresh the index after question audio changes (one type or all)"""
+    asset_types = [asset_type] if asset_type else list(AUDIO_ASSET_TYPES)
+    return _rebuild(asset_types)
+
+
+def register_audio_asset(asset_type, path):
+    """Add or replace a single file in the index without rescanning its directory"""
+    entry = _make_entry(asset_type, os.path.basename(path), path, os.stat(path))
+    with _index_lock:
+        _assets_by_file[(asset_type, entry["filename"])] = entry
+        existing = _assets_by_id.get(entry["audio_id"])
+        asset_types = list(AUDIO_ASSET_TYPES)
+        # Only take over the ID if no higher-priority type already owns it
+        if not existing or asset_types.index(asset_type) <= asset_types.index(existing["type"]):
+            _assets_by_id[entry["audio_id"]] = entry
+    return entry
+
+
+def _find_on_disk(asset_type, filename):
+    """
+    Path of an asset file that another process wrote after this index was built, or None
+
+    Only plain filenames with an audio extension are looked up, and only directly inside the asset directory.
+    """
+    if not filename or filename != secure_filename(filename):
+        return None
+    if os.path.splitext(filename)[1].lower() not in AUDIO_EXTENSIONS:
+        return None
+    audio_dir = os.path.realpath(AUDIO_ASSET_TYPES[asset_type]["dir"])
+    path = os.path.realpath(os.path.join(audio_dir, filename))
+    if os.path.dirname(path) != audio_dir or not os.path.isfile(path):
+        return None
+    return path
+
+
+def get_audio_asset(audio_id):
+    """Look up an audio asset by its ID (the disk is only checked when the index has no entry)"""
+    entry = _assets_by_id.get(audio_id)
+    if entry is None:
+        for asset_type in AUDIO_ASSET_TYPES:
+            for ext in sorted(AUDIO_EXTENSIONS):
+                path = _find_on_disk(asset_type, f"{audio_id}{ext}")
+                if path:
+                    return register_audio_asset(asset_type, path)
+    return entry
+
+
+def get_audio_asset_by_filename(asset_type, filename):
+    """Look up an audio asset by type and filename (the disk is only checked when the index has no entry)"""
+    entry = _assets_by_file.get((asset_type, filename))
+    if entry is None and asset_type in AUDIO_ASSET_TYPES:
+        path = _find_on_disk(asset_type, filename)
+        if path:
+            entry = register_audio_asset(asset_type, path)
+    return entry
+
+
+def get_audio_asset_dir(asset_type):
+    """Get the directory backing an asset type"""
+    asset_config = AUDIO_ASSET_TYPES.get(asset_type)
+    return asset_config["dir"] if asset_config else None
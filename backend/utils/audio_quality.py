@@ -0,0 +1,96 @@
+"""Fast quality checks on uploaded recordings, run before any paid transcription or GPT call"""
+
+import numpy as np
+import soundfile as sf
+from config import AUDIO_QUALITY_THRESHOLDS
+from .metrics import increment
+
+FRAME_SECONDS = 0.02  # 20 ms analysis frames
+CLIPPING_LEVEL = 0.99  # Samples at or above this magnitude count as clipped
+SILENCE_FLOOR_DBFS = -60.0  # Frames quieter than this never count as speech
+SPEECH_MARGIN_DB = 10.0  # Speech frames must be this far above the noise floor
+
+REJECTION_MESSAGES = {
+    "too_short": "The recording is too short.",
+    "too_quiet": "We could barely hear you. Please move closer to the microphone.",
+    "clipped": "The recording is distorted. Please speak a little softer or move away from the microphone.",
+    "noisy": "There is too much background noise. Please find a quieter place.",
+    "no_speech": "We couldn't detect speech in the recording."
+}
+
+
+def _to_dbfs(value):
+    """Convert a linear amplitude to dBFS"""
+    return float(20 * np.log10(max(value, 1e-10)))
+
+
+def analyze_audio_quality(samples, sample_rate):
+    """Compute peak level, clipping ratio, SNR estimate and speech ratio for a mono float buffer"""
+    samples = np.asarray(samples, dtype=np.float32)
+    duration = len(samples) / sample_rate if sample_rate else 0
+    if not len(samples):
+        return {"duration_seconds": 0, "peak_dbfs": _to_dbfs(0), "clipping_ratio": 0.0, "snr_db": 0.0, "speech_ratio": 0.0}
+
+    magnitude = np.abs(samples)
+
+    # Frame-level RMS energy in dBFS
+    frame_length = max(int(FRAME_SECONDS * sample_rate), 1)
+    frame_count = max(len(samples) // frame_length, 1)
+    frames = np.resize(samples, frame_count * frame_length).reshape(frame_count, frame_length)
+    frame_dbfs = 20 * np.log10(np.maximum(np.sqrt(np.mean(frames ** 2, axis=1)), 1e-10))
+
+    noise_floor = float(np.percentile(frame_dbfs, 10))
+    speech_level = float(np.percentile(frame_dbfs, 95))
+    speech_threshold = max(noise_floor + SPEECH_MARGIN_DB, SILENCE_FLOOR_DBFS)
+
+    return {
+        "duration_seconds": round(duration, 2),
+        "peak_dbfs": round(_to_dbfs(float(magnitude.max())), 1),
+        "clipping_ratio": round(float(np.mean(magnitude >= CLIPPING_LEVEL)), 4),
+        "snr_db": round(speech_level - noise_floor, 1),
+        "speech_ratio": round(float(np.mean(frame_dbfs > speech_threshold)), 3)
+    }
+
+
+def evaluate_audio_quality(metrics, test_type):
+    """Compare quality metrics to the thresholds for a test type and return rejection reasons"""
+    thresholds = AUDIO_QUALITY_THRESHOLDS.get(test_type, AUDIO_QUALITY_THRESHOLDS["speech"])
+    reasons = []
+    if metrics["duration_seconds"] < thresholds["min_duration_seconds"]:
+        reasons.append("too_short")
+    if metrics["peak_dbfs"] < thresholds["min_peak_dbfs"]:
+        reasons.append("too_quiet")
+    if metrics["clipping_ratio"] > thresholds["max_clipping_ratio"]:
+        reasons.append("clipped")
+    if "too_quiet" not in reasons:  # SNR and voice activity are meaningless on a silent buffer
+        if metrics["snr_db"] < thresholds["min_snr_db"]:
+            reasons.append("noisy")
+        if metrics["speech_ratio"] < thresholds["min_speech_ratio"]:
+            reasons.append("no_speech")
+    return reasons
+
+
+def check_upload_quality(audio_wav_path, test_type="speech"):
+    """
+    Check a decoded upload and count the outcome
+
+    Returns:
+        dict: {passed: bool, reasons: list, metrics: dict, message: str}
+    """
+    data, sample_rate = sf.read(audio_wav_path, dtype="float32", always_2d=True)
+    metrics = analyze_audio_quality(data.mean(axis=1), sample_rate)
+    reasons = evaluate_audio_quality(metrics, test_type)
+
+    increment(f"audio_quality.checked.{test_type}")
+    if reasons:
+        increment(f"audio_quality.rejected.{test_type}")
+        for reason in reasons:
+            increment(f"audio_quality.rejected.{test_type}.{reason}")
+
+    message = " ".join(REJECTION_MESSAGES[r] for r in reasons)
+    return {
+        "passed": not reasons,
+        "reasons": reasons,
+        "metrics": metrics,
+        "message": f"{message} Please re-record your answer." if reasons else ""
+    }
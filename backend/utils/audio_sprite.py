@@ -0,0 +1,217 @@
+"""Listening test audio sprites: a session's clips concatenated into one compressed file plus an offset table"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+import soundfile as sf
+from config import (
+    AUDIO_SPRITE_DIR, AUDIO_SPRITE_FORMAT, AUDIO_SPRITE_GAP_SECONDS,
+    AUDIO_SPRITE_CACHE_MAX_ENTRIES, AUDIO_SPRITE_MAX_AGE_HOURS, AUDIO_SPRITE_MAX_FILES
+)
+from .audio_assets import get_audio_asset
+from .cache import BoundedTTLCache
+
+# Output formats in fallback order: (extension, libsndfile format, subtype)
+SPRITE_FORMATS = {
+    "mp3": ("mp3", "MP3", "MPEG_LAYER_III"),
+    "ogg": ("ogg", "OGG", "VORBIS"),
+    "flac": ("flac", "FLAC", "PCM_16")
+}
+SPRITE_SAMPLE_RATE = 44100  # Every clip is resampled to this rate before concatenation
+SPRITE_URL_PREFIX = "/audio/sprites"
+
+_sprite_lock = threading.Lock()  # Guards _build_locks only, never held while rendering
+_build_locks = {}  # sprite key -> lock held while that sprite is built, so it is rendered once
+sprite_cache = BoundedTTLCache("audio_sprites", max_entries=AUDIO_SPRITE_CACHE_MAX_ENTRIES)  # key -> manifest (avoids re-reading sidecar files)
+
+
+def _get_sprite_format():
+    """Pick the configured sprite format, falling back to one libsndfile can write"""
+    available = sf.available_formats()
+    preferred = [AUDIO_SPRITE_FORMAT] + [f for f in SPRITE_FORMATS if f != AUDIO_SPRITE_FORMAT]
+    for name in preferred:
+        sprite_format = SPRITE_FORMATS.get(name)
+        if sprite_format and sprite_format[1] in available:
+            return sprite_format
+    return SPRITE_FORMATS["flac"]
+
+
+def get_sprite_key(assets):
+    """Cache key for an ordered list of clips (changes if any clip file is replaced)"""
+    parts = [f"{a['audio_id']}:{a['size']}:{a['mtime']}" for a in assets]
+    parts.append(f"gap:{AUDIO_SPRITE_GAP_SECONDS}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _decode_clip(path):
+    """Decode a clip to mono float32 PCM at the sprite sample rate"""
+    data, rate = sf.read(path, dtype="float32", always_2d=True)
+    samples = data.mean(axis=1)  # Downmix to mono
+    if rate != SPRITE_SAMPLE_RATE and len(samples):
+        duration = len(samples) / rate
+        target_length = int(round(duration * SPRITE_SAMPLE_RATE))
+        source_times = np.arange(len(samples)) / rate
+        target_times = np.arange(target_length) / SPRITE_SAMPLE_RATE
+        samples = np.interp(target_times, source_times, samples).astype(np.float32)
+    return samples
+
+
+def _render_sprite(assets, sprite_path, temp_path, sprite_format):
+    """Concatenate the clips into one file and return the segment offsets"""
+    gap = np.zeros(int(AUDIO_SPRITE_GAP_SECONDS * SPRITE_SAMPLE_RATE), dtype=np.float32)
+    pieces = []
+    segments = []
+    position = 0  # In samples
+
+    for asset in assets:
+        samples = _decode_clip(asset["path"])
+        segments.append({
+            "audio_id": asset["audio_id"],
+            "start": round(position / SPRITE_SAMPLE_RATE, 3),
+            "end": round((position + len(samples)) / SPRITE_SAMPLE_RATE, 3)
+        })
+        pieces.extend([samples, gap])
+        position += len(samples) + len(gap)
+
+    sprite = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    _, file_format, subtype = sprite_format
+    sf.write(temp_path, sprite, SPRITE_SAMPLE_RATE, format=file_format, subtype=subtype)
+    os.replace(temp_path, sprite_path)  # Publish atomically
+    return segments, round(len(sprite) / SPRITE_SAMPLE_RATE, 3)
+
+
+def build_audio_sprite(audio_ids):
+    """Get (building once if needed) the sprite for an ordered list of audio IDs, or None if a clip is missing"""
+    assets = [get_audio_asset(audio_id) for audio_id in audio_ids]
+    if not assets or any(asset is None for asset in assets):
+        return None
+
+    key = get_sprite_key(assets)
+    sprite = _cached_sprite(key)
+    if sprite:
+        return sprite
+    with _sprite_lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    # Only requests for this same sprite wait here; other sessions build theirs in parallel
+    with build_lock:
+        sprite = _cached_sprite(key)
+        if sprite:
+            return sprite
+
+        manifest_path = os.path.join(AUDIO_SPRITE_DIR, f"{key}.json")
+        sprite = _read_manifest(manifest_path)  # Built by a previous run or another worker
+        if sprite is None:
+            os.makedirs(AUDIO_SPRITE_DIR, exist_ok=True)
+            sprite_format = _get_sprite_format()
+            filename = f"{key}.{sprite_format[0]}"
+            temp_path = os.path.join(AUDIO_SPRITE_DIR, f"{key}.{threading.get_ident()}.tmp.{sprite_format[0]}")
+            segments, duration = _render_sprite(assets, os.path.join(AUDIO_SPRITE_DIR, filename), temp_path, sprite_format)
+            sprite = {
+                "url": f"{SPRITE_URL_PREFIX}/{filename}",
+                "duration": duration,
+                "segments": segments
+            }
+            temp_manifest = f"{manifest_path}.{threading.get_ident()}.tmp"
+            with open(temp_manifest, "w", encoding="utf-8") as f:
+                json.dump(sprite, f)
+            os.replace(temp_manifest, manifest_path)  # Written last so a manifest always has its audio
+
+        sprite_cache.set(key, sprite)
+        with _sprite_lock:
+            _build_locks.pop(key, None)
+        return sprite
+
+
+def _sprite_path(sprite):
+    """Local file behind a manifest's URL"""
+    return os.path.join(AUDIO_SPRITE_DIR, sprite["url"].rsplit("/", 1)[-1])
+
+
+def _sprite_available(sprite):
+    """
+    True if a manifest's audio file still exists
+
+    Files handed out again are touched (at most every half max age) so the reaper's age
+    limit counts from the last use, not from the build.
+    """
+    path = _sprite_path(sprite)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return False
+    now = time.time()
+    if now - mtime > AUDIO_SPRITE_MAX_AGE_HOURS * 1800:
+        try:
+            os.utime(path, (now, now))
+            os.utime(os.path.join(AUDIO_SPRITE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}.json"), (now, now))
+        except OSError:
+            pass
+    return True
+
+
+def _cached_sprite(key):
+    """Cached manifest for a key, unless the reaper has deleted its file since"""
+    sprite = sprite_cache.get(key)
+    if sprite and not _sprite_available(sprite):
+        sprite_cache.pop(key)
+        return None
+    return sprite
+
+
+def _read_manifest(manifest_path):
+    """Manifest written by an earlier build, or None if it is missing or its audio was pruned"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            sprite = json.load(f)
+    except FileNotFoundError:
+        return None
+    return sprite if _sprite_available(sprite) else None
+
+
+def prune_sprite_files(dry_run=False):
+    """
+    Delete sprites older than AUDIO_SPRITE_MAX_AGE_HOURS, then the oldest beyond AUDIO_SPRITE_MAX_FILES
+
+    Sprites are rebuilt on demand, so this only costs a re-render. Leftover temp files from
+    interrupted builds are removed by age too.
+
+    Returns:
+        tuple: (sprites removed, bytes reclaimed)
+    """
+    if not os.path.isdir(AUDIO_SPRITE_DIR):
+        return 0, 0
+
+    groups = {}  # sprite key -> [(path, size, mtime)], the manifest plus its audio and any temp files
+    with os.scandir(AUDIO_SPRITE_DIR) as it:
+        for entry in it:
+            if entry.is_file():
+                stat = entry.stat()
+                groups.setdefault(entry.name.split(".", 1)[0], []).append((entry.path, stat.st_size, stat.st_mtime))
+
+    cutoff = time.time() - AUDIO_SPRITE_MAX_AGE_HOURS * 3600
+    newest_first = sorted(groups, key=lambda key: max(mtime for _, _, mtime in groups[key]), reverse=True)
+    expired = [
+        key for index, key in enumerate(newest_first)
+        if index >= AUDIO_SPRITE_MAX_FILES or max(mtime for _, _, mtime in groups[key]) < cutoff
+    ]
+
+    reclaimed = 0
+    for key in expired:
+        if not dry_run:
+            sprite_cache.pop(key)
+        # The manifest goes first so no worker picks up a manifest whose audio is gone
+        for path, size, _ in sorted(groups[key], key=lambda item: not item[0].endswith(".json")):
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"Error deleting audio sprite file {path}: {e}")
+                    continue
+            reclaimed += size
+    return len(expired), reclaimed
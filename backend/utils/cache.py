@@ -0,0 +1,141 @@
+"""Bounded in-process caches with LRU eviction, idle TTL and hit/miss counters"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from .metrics import increment
+
+
+def approx_sizeof(value, _seen=None):
+    """Approximate the memory footprint of a value in bytes (containers included)"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_sizeof(k, _seen) + approx_sizeof(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_sizeof(item, _seen) for item in value)
+    return size
+
+
+class BoundedTTLCache:
+    """
+    Thread-safe LRU cache bounded by entry count and approximate bytes, with idle expiry
+
+    Counters are published as cache.<name>.hits / misses / evictions / expirations.
+    """
+
+    def __init__(self, name, max_entries, max_bytes=None, ttl_seconds=None, sizeof=approx_sizeof):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size, last_access), least recently used first
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _count(self, event, amount=1):
+        increment(f"cache.{self.name}.{event}", amount)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _is_expired(self, last_access, now):
+        return self.ttl_seconds is not None and now - last_access > self.ttl_seconds
+
+    def get(self, key, default=None):
+        """Get a value and mark it recently used (counts a hit or miss)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("misses")
+                return default
+            value, size, last_access = entry
+            if self._is_expired(last_access, now):
+                self._remove(key)
+                self._count("expirations")
+                self._count("misses")
+                return default
+            self._entries[key] = (value, size, now)
+            self._entries.move_to_end(key)
+            self._count("hits")
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries to stay within bounds"""
+        size = self._sizeof(value)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, now)
+            self._total_bytes += size
+            self._evict(now, keep=key)
+
+    def _evict(self, now, keep=None):
+        """Drop expired entries, then LRU entries while over the entry or byte limit"""
+        # Entries are ordered by last access, so expired ones always form a prefix
+        expired = 0
+        while self._entries:
+            oldest = next(iter(self._entries))
+            if not self._is_expired(self._entries[oldest][2], now):
+                break
+            self._remove(oldest)
+            expired += 1
+        if expired:
+            self._count("expirations", expired)
+
+        evicted = 0
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep and len(self._entries) == 1:
+                break  # Never evict the entry being stored, even if it alone exceeds max_bytes
+            self._remove(oldest)
+            evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value (no hit/miss counted)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry[2], time.monotonic())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Current size of the cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "approx_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
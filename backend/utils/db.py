@@ -1,5 +1,6 @@
 import os
-from pymongo import MongoClient
+from flask import g, has_request_context
+from pymongo import MongoClient, monitoring
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,11 +13,38 @@ mongo_db = os.getenv('MONGODB_DB')
 if not mongo_uri or not mongo_db:
     raise ValueError("MONGODB_URI and MONGODB_DB environment variables must be set in .env file")
 
+class RequestOperationCounter(monitoring.CommandListener):
+    """Count MongoDB commands issued while handling the current request (reported in debug mode)"""
+
+    def started(self, event):
+        if has_request_context():
+            g.db_operations = g.get('db_operations', 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
 # Connect to MongoDB
-client = MongoClient(mongo_uri)
+client = MongoClient(mongo_uri, event_listeners=[RequestOperationCounter()])
 
 # Select database
 db = client[mongo_db]
 
 # Collections
 session_states_collection = db["session_states"]
+
+_transactions_supported = None
+
+def supports_transactions():
+    """True if the server is a replica set member or mongos (standalone servers reject transactions); checked once"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            hello = client.admin.command("hello")
+            _transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            print(f"Warning: Could not check MongoDB transaction support: {e}")
+            return False  # Checked again next time
+    return _transactions_supported
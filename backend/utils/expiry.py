@@ -0,0 +1,160 @@
+"""Expiry for abandoned sessions: TTL indexes on temp collections plus a background reaper for what TTL can't cover"""
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from config import RECORDINGS_DIR, EXPIRY_TTL_DAYS, REAPER_INTERVAL_SECONDS, REAPER_BATCH_SIZE, ORPHAN_GRACE_HOURS
+from .db import db
+from .metrics import increment
+from .audio_sprite import prune_sprite_files
+
+EXPIRES_AT_FIELD = "expires_at"  # BSON date; the TTL index deletes a document once it is in the past
+SESSION_COLLECTIONS = ["temp_evaluations", "temp_comments", "session_states"]  # Belong to a temp applicant's session
+RECORDING_TEST_FOLDERS = ["speech_evaluation_recordings", "listening_test_recordings"]
+
+
+def get_expires_at(collection_name):
+    """Expiry time for a document written now (each write pushes it back)"""
+    return datetime.utcnow() + timedelta(days=EXPIRY_TTL_DAYS[collection_name])
+
+
+def _session_key(collection_name):
+    return "session_id" if collection_name == "session_states" else "sessionId"
+
+
+def _delete_in_batches(collection_name, ids, dry_run):
+    """Delete documents by _id in batches and count them"""
+    if dry_run:
+        return len(ids)
+    deleted = 0
+    for start in range(0, len(ids), REAPER_BATCH_SIZE):
+        batch = ids[start:start + REAPER_BATCH_SIZE]
+        deleted += db[collection_name].delete_many({"_id": {"$in": batch}}).deleted_count
+    return deleted
+
+
+def _find_legacy_expired(collection_name, now):
+    """IDs of documents without expires_at whose creation time (from the ObjectId) is past the TTL"""
+    cutoff = now - timedelta(days=EXPIRY_TTL_DAYS[collection_name])
+    cursor = db[collection_name].find({EXPIRES_AT_FIELD: {"$exists": False}}, {"_id": 1})
+    return [doc["_id"] for doc in cursor if doc["_id"].generation_time.replace(tzinfo=None) < cutoff]
+
+
+def _find_orphans(collection_name, live_sessions, now):
+    """IDs of session documents whose temp applicant no longer exists (after a grace period for new sessions)"""
+    cutoff = now - timedelta(hours=ORPHAN_GRACE_HOURS)
+    key = _session_key(collection_name)
+    cursor = db[collection_name].find({}, {"_id": 1, key: 1})
+    return [
+        doc["_id"] for doc in cursor
+        if doc.get(key) not in live_sessions and doc["_id"].generation_time.replace(tzinfo=None) < cutoff
+    ]
+
+
+def _folder_size(path):
+    """Total bytes of the files under a folder"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _folder_session_known(folder_name, known_sessions):
+    """Recording folders are <name>_<session_id>; session IDs may contain underscores, so try every suffix"""
+    parts = folder_name.split("_")
+    return any("_".join(parts[i:]) in known_sessions for i in range(len(parts)))
+
+
+def _reap_recordings(known_sessions, now, dry_run):
+    """Delete recording folders that belong to no temp applicant or applicant"""
+    cutoff = time.mktime((now - timedelta(days=EXPIRY_TTL_DAYS["temp_applicants"])).timetuple())
+    folders = 0
+    reclaimed = 0
+    if not os.path.isdir(RECORDINGS_DIR):
+        return folders, reclaimed
+
+    parents = [os.path.join(RECORDINGS_DIR, folder) for folder in RECORDING_TEST_FOLDERS] + [RECORDINGS_DIR]
+    for parent in parents:
+        if not os.path.isdir(parent):
+            continue
+        for entry in os.scandir(parent):
+            if not entry.is_dir() or entry.name in RECORDING_TEST_FOLDERS:
+                continue
+            if _folder_session_known(entry.name, known_sessions) or entry.stat().st_mtime > cutoff:
+                continue
+            size = _folder_size(entry.path)
+            if not dry_run:
+                try:
+                    shutil.rmtree(entry.path)
+                except Exception as e:
+                    print(f"Error deleting recordings folder {entry.path}: {e}")
+                    continue
+            folders += 1
+            reclaimed += size
+    return folders, reclaimed
+
+
+def reap_expired(dry_run=False):
+    """
+    Delete expired temp data that TTL indexes don't cover, orphaned session documents, recordings and old audio sprites
+
+    Returns:
+        dict: {deleted: {collection: count}, recording_folders, recording_bytes, sprites, sprite_bytes, dry_run}
+    """
+    now = datetime.utcnow()
+    report = {"deleted": {}, "recording_folders": 0, "recording_bytes": 0, "sprites": 0, "sprite_bytes": 0, "dry_run": dry_run}
+
+    # Documents written before expiry stamping have no TTL field; age them by ObjectId
+    for collection_name in EXPIRY_TTL_DAYS:
+        ids = _find_legacy_expired(collection_name, now)
+        report["deleted"][collection_name] = _delete_in_batches(collection_name, ids, dry_run)
+
+    # Session documents whose temp applicant expired or was never stored
+    live_sessions = set(db.temp_applicants.distinct("sessionId"))
+    if dry_run:  # Nothing was deleted above, so discount what would have been
+        expired_ids = set(_find_legacy_expired("temp_applicants", now))
+        live_sessions = {doc["sessionId"] for doc in db.temp_applicants.find({}, {"_id": 1, "sessionId": 1}) if doc["_id"] not in expired_ids}
+    for collection_name in SESSION_COLLECTIONS:
+        ids = _find_orphans(collection_name, live_sessions, now)
+        report["deleted"][collection_name] += _delete_in_batches(collection_name, ids, dry_run)
+
+    # Recordings of sessions that are neither in progress nor saved as applicants
+    known_sessions = live_sessions | set(db.applicants.distinct("id"))
+    report["recording_folders"], report["recording_bytes"] = _reap_recordings(known_sessions, now, dry_run)
+
+    # Listening audio sprites are a rebuildable cache; keep it bounded by age and count
+    report["sprites"], report["sprite_bytes"] = prune_sprite_files(dry_run)
+
+    if not dry_run:
+        for collection_name, count in report["deleted"].items():
+            increment(f"reaper.deleted.{collection_name}", count)
+        increment("reaper.recordings.folders", report["recording_folders"])
+        increment("reaper.recordings.bytes", report["recording_bytes"])
+        increment("reaper.sprites.files", report["sprites"])
+        increment("reaper.sprites.bytes", report["sprite_bytes"])
+        increment("reaper.runs")
+    return report
+
+
+def start_background_reaper():
+    """Run the reaper periodically in a daemon thread"""
+    def _run():
+        while True:
+            try:
+                report = reap_expired()
+                deleted = sum(report["deleted"].values())
+                if deleted or report["recording_folders"] or report["sprites"]:
+                    print(f"✓ Reaper removed {deleted} expired documents, {report['recording_folders']} recording folders ({report['recording_bytes']} bytes) and {report['sprites']} audio sprites ({report['sprite_bytes']} bytes)")
+            except Exception as e:
+                print(f"Warning: Reaper run failed: {e}")
+            time.sleep(REAPER_INTERVAL_SECONDS)
+
+    thread = threading.Thread(target=_run, name="expiry-reaper", daemon=True)
+    thread.start()
+    return thread
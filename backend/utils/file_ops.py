@@ -1,9 +1,36 @@
 import os
 import json
 import shutil
+import time
 from datetime import datetime
-from config import APPLICANTS_FILE, RECORDINGS_DIR, QUESTIONS_FILE, LISTENING_TEST_QUESTIONS_FILE, USERS_FILE
-from .db import db
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config import APPLICANTS_FILE, RECORDINGS_DIR, QUESTIONS_FILE, LISTENING_TEST_QUESTIONS_FILE, USERS_FILE, PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS
+from .db import db, supports_transactions
+from .cache import BoundedTTLCache
+from .migrations import upgrade_document, get_schema_version, SCHEMA_VERSION_FIELD, EVALUATION_SECTIONS
+from .expiry import get_expires_at
+from .applicant_listing import LISTING_TIMESTAMP_FIELD, parse_timestamp
+
+# Question collections by question type, as keyed in retired_questions
+QUESTION_COLLECTION_TYPES = {
+    "questions": "speech",
+    "listening_test_questions": "listening",
+    "written_test_questions": "written",
+    "personality_test_questions": "personality",
+    "typing_tests": "typing"
+}
+
+SUPER_ADMIN_GUARD_ID = "super_admin_guard"  # counters document that serializes last-super-admin checks
+
+# Users resolved from auth tokens, keyed by user ID. Writes through this worker invalidate its entry at once;
+# other workers keep their copy for at most PRINCIPAL_CACHE_TTL_SECONDS after loading it (entries hold
+# {"user", "loaded_at"}, since the cache's own TTL only counts idle time and a busy user would never expire)
+principal_cache = BoundedTTLCache(
+    "principals",
+    max_entries=PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS
+)
 
 def ensure_data_directory():
     """Ensure the data directory exists"""
@@ -72,6 +99,8 @@ def save_audio_file(audio_wav_path, applicant_info, session_id, question_index,
 def load_applicants():
     """Load all applicants from MongoDB."""
     applicants = list(db.applicants.find({}, {'_id': 0}))  # Exclude MongoDB's _id field
+    for applicant in applicants:
+        upgrade_document("applicants", applicant)  # In memory only; the background migrator persists it
     return {"applicants": applicants}
 
 
@@ -84,6 +113,7 @@ def save_applicants(data):
             # This preserves other applicants in the database
             applicant_id = applicant.get("id")
             if applicant_id:
+                upgrade_document("applicants", applicant)  # Stored in the current shape, with schema_version set
                 db.applicants.replace_one(
                     {"id": applicant_id}, 
                     applicant, 
@@ -94,6 +124,62 @@ def save_applicants(data):
         print(f"Error saving applicants: {e}")
         return False
 
+
+def load_applicant(applicant_id, projection=None):
+    """Load one permanent applicant by ID (indexed point lookup), or None."""
+    doc = db.applicants.find_one({"id": applicant_id}, {'_id': 0, **(projection or {})})
+    if doc is not None and not projection:
+        upgrade_document("applicants", doc)  # In memory only; the background migrator persists it
+    return doc
+
+
+def save_applicant(applicant):
+    """Insert or update one permanent applicant by ID; existing comments are kept (they only change through push/pull)."""
+    fields = {k: v for k, v in applicant.items() if k not in ('_id', 'comments', SCHEMA_VERSION_FIELD)}
+    if "application_timestamp" in fields:
+        fields[LISTING_TIMESTAMP_FIELD] = parse_timestamp(fields["application_timestamp"])  # Listing order
+    try:
+        db.applicants.update_one(
+            {"id": applicant["id"]},
+            {
+                "$set": fields,
+                # An existing applicant keeps its version until the migrator has upgraded every field
+                "$setOnInsert": {"comments": applicant.get("comments", []),
+                                 SCHEMA_VERSION_FIELD: get_schema_version("applicants")}
+            },
+            upsert=True
+        )
+        return True
+    except Exception as e:
+        print(f"Error saving applicant {applicant.get('id')}: {e}")
+        return False
+
+
+def update_applicant(applicant_id, changes):
+    """Set fields (dotted paths allowed) on one permanent applicant. Returns True if it exists."""
+    try:
+        return db.applicants.update_one({"id": applicant_id}, {"$set": changes}).matched_count > 0
+    except Exception as e:
+        print(f"Error updating applicant {applicant_id}: {e}")
+        return False
+
+def next_sequence_value(name, current_max):
+    """
+    Atomically allocate the next number of a named sequence (stored in the counters collection)
+
+    current_max is called once to seed a sequence that doesn't exist yet from the existing data.
+    """
+    counter = db.counters.find_one_and_update(
+        {"_id": name}, {"$inc": {"seq": 1}}, return_document=ReturnDocument.AFTER
+    )
+    if counter is None:
+        # $max makes concurrent seeding harmless: every seeder agrees on the same floor
+        db.counters.update_one({"_id": name}, {"$max": {"seq": current_max()}}, upsert=True)
+        counter = db.counters.find_one_and_update(
+            {"_id": name}, {"$inc": {"seq": 1}}, return_document=ReturnDocument.AFTER
+        )
+    return counter["seq"]
+
 def load_questions():
     """Load questions from MongoDB."""
     questions = list(db.questions.find({}, {'_id': 0}))
@@ -103,6 +189,7 @@ def load_questions():
 def save_questions(questions_data):
     """Save questions to MongoDB (replace all)."""
     try:
+        _retire_replaced_questions("questions", questions_data)
         db.questions.delete_many({})
         if questions_data:
             db.questions.insert_many(questions_data)
@@ -111,6 +198,83 @@ def save_questions(questions_data):
         print(f"Error saving questions: {e}")
         return False
 
+def set_question_audio_id(question_id, text, audio_id):
+    """Attach rendered audio to a speech question, only if its text hasn't changed since rendering."""
+    try:
+        result = db.questions.update_one({"id": question_id, "text": text}, {"$set": {"audio_id": audio_id}})
+        return result.matched_count > 0
+    except Exception as e:
+        print(f"Error setting audio for question {question_id}: {e}")
+        return False
+
+def _max_question_id(collection_name):
+    """Highest numeric question ID in a collection (only used to seed its ID sequence)"""
+    top = list(db[collection_name].find({"id": {"$type": "number"}}, {'_id': 0, 'id': 1}).sort("id", -1).limit(1))
+    return top[0]["id"] if top else 0
+
+def insert_question(collection_name, question_data, max_attempts=3):
+    """Insert one question with the next ID from the collection's sequence and return it"""
+    for _ in range(max_attempts):
+        question = {**question_data, "id": next_sequence_value(collection_name, lambda: _max_question_id(collection_name))}
+        try:
+            db[collection_name].insert_one(dict(question))  # Copy so the returned dict has no _id
+            return question
+        except DuplicateKeyError:
+            # A bulk save wrote IDs past the sequence; move the sequence up and try again
+            db.counters.update_one({"_id": collection_name}, {"$max": {"seq": _max_question_id(collection_name)}})
+    print(f"Error inserting question into {collection_name}: no free ID after {max_attempts} attempts")
+    return None
+
+def find_question(collection_name, question_id):
+    """Load one question by ID"""
+    return db[collection_name].find_one({"id": question_id}, {'_id': 0})
+
+def update_question(collection_name, question_id, changes):
+    """Set fields on one question and return the updated question (None if it doesn't exist)"""
+    return db[collection_name].find_one_and_update(
+        {"id": question_id},
+        {"$set": changes},
+        projection={'_id': 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+def delete_question(collection_name, question_id):
+    """Delete one question and return it (None if it doesn't exist); the deleted copy is retired so sessions holding its ID still resolve it"""
+    question = db[collection_name].find_one_and_delete({"id": question_id}, projection={'_id': 0})
+    if question is None:
+        return None
+    try:
+        # Workers keep serving it from their catalogs until the caller bumps the generation, after this
+        retire_questions(QUESTION_COLLECTION_TYPES[collection_name], [question])
+    except Exception:
+        db[collection_name].insert_one(dict(question))  # Put it back rather than lose it for sessions holding its ID
+        raise
+    return question
+
+def retire_questions(question_type, questions):
+    """Durably keep copies of removed questions in retired_questions (the first copy of an ID wins)"""
+    operations = [
+        UpdateOne(
+            {"question_type": question_type, "id": question["id"]},
+            {"$setOnInsert": {"question": question, "retired_at": datetime.utcnow()}},
+            upsert=True
+        )
+        for question in questions if question.get("id") is not None
+    ]
+    if operations:
+        db.retired_questions.bulk_write(operations, ordered=False)
+
+def load_retired_questions(question_type, question_ids):
+    """Retired questions of a type by ID, for the given IDs that have been retired"""
+    docs = db.retired_questions.find({"question_type": question_type, "id": {"$in": list(question_ids)}}, {'_id': 0})
+    return {doc["id"]: doc["question"] for doc in docs}
+
+def _retire_replaced_questions(collection_name, questions_data):
+    """Retire the questions a replace-all save is about to remove"""
+    kept_ids = [q.get("id") for q in questions_data or [] if q.get("id") is not None]
+    removed = list(db[collection_name].find({"id": {"$nin": kept_ids}}, {'_id': 0}))
+    retire_questions(QUESTION_COLLECTION_TYPES[collection_name], removed)
+
 def load_listening_test_questions():
     """Load listening test questions from MongoDB."""
     questions = list(db.listening_test_questions.find({}, {'_id': 0}))
@@ -120,6 +284,7 @@ def load_listening_test_questions():
 def save_listening_test_questions(questions_data):
     """Save listening test questions to MongoDB (replace all)."""
     try:
+        _retire_replaced_questions("listening_test_questions", questions_data)
         db.listening_test_questions.delete_many({})
         if questions_data:
             db.listening_test_questions.insert_many(questions_data)
@@ -137,6 +302,7 @@ def load_written_test_questions():
 def save_written_test_questions(questions_data):
     """Save written test questions to MongoDB (replace all)."""
     try:
+        _retire_replaced_questions("written_test_questions", questions_data)
         db.written_test_questions.delete_many({})
         if questions_data:
             db.written_test_questions.insert_many(questions_data)
@@ -153,6 +319,7 @@ def load_personality_test_questions():
 def save_personality_test_questions(questions_data):
     """Save personality test questions to MongoDB (replace all)."""
     try:
+        _retire_replaced_questions("personality_test_questions", questions_data)
         db.personality_test_questions.delete_many({})
         if questions_data:
             db.personality_test_questions.insert_many(questions_data)
@@ -164,22 +331,40 @@ def save_personality_test_questions(questions_data):
 def save_temp_applicant(applicant_data, session_id):
     """Store applicant data temporarily in MongoDB for later combination with evaluation."""
     try:
-        db.temp_applicants.replace_one({"sessionId": session_id}, applicant_data, upsert=True)
+        document = {
+            **applicant_data,
+            LISTING_TIMESTAMP_FIELD: parse_timestamp(applicant_data.get("timestamp")),  # Listing order
+            SCHEMA_VERSION_FIELD: get_schema_version("temp_applicants"),
+            "expires_at": get_expires_at("temp_applicants")
+        }
+        db.temp_applicants.replace_one({"sessionId": session_id}, document, upsert=True)
         return True
     except Exception as e:
         print(f"Error saving temp applicant: {e}")
         return False
 
 
+def update_temp_applicant(session_id, changes):
+    """Set fields (dotted paths allowed) on one temporary applicant. Returns True if it exists."""
+    try:
+        result = db.temp_applicants.update_one(
+            {"sessionId": session_id},
+            {"$set": {**changes, "expires_at": get_expires_at("temp_applicants")}}
+        )
+        return result.matched_count > 0
+    except Exception as e:
+        print(f"Error updating temp applicant {session_id}: {e}")
+        return False
+
 def load_temp_applicant(session_id):
     """Load temporary applicant data from MongoDB."""
-    doc = db.temp_applicants.find_one({"sessionId": session_id}, {'_id': 0})
+    doc = db.temp_applicants.find_one({"sessionId": session_id}, {'_id': 0, 'expires_at': 0, LISTING_TIMESTAMP_FIELD: 0})
     return doc
 
 def load_all_temp_applicants():
     """Load all temporary applicants from MongoDB."""
     try:
-        temp_applicants = list(db.temp_applicants.find({}, {'_id': 0}))
+        temp_applicants = list(db.temp_applicants.find({}, {'_id': 0, 'expires_at': 0, LISTING_TIMESTAMP_FIELD: 0}))
         return temp_applicants
     except Exception as e:
         print(f"Error loading all temp applicants: {e}")
@@ -207,18 +392,45 @@ def save_temp_evaluation(evaluation_data, session_id, question_index=None, test_
                 if section in evaluation_data:
                     existing_data[section] = evaluation_data[section]
         # If question_index is provided, store at specific index (not implemented for MongoDB, just store the structure)
-        db.temp_evaluations.replace_one({"sessionId": session_id}, {"sessionId": session_id, **existing_data}, upsert=True)
+        existing_data[SCHEMA_VERSION_FIELD] = get_schema_version("temp_evaluations")  # Every section is present
+        db.temp_evaluations.replace_one(
+            {"sessionId": session_id},
+            {"sessionId": session_id, **existing_data, "expires_at": get_expires_at("temp_evaluations")},
+            upsert=True
+        )
         return True
     except Exception as e:
         print(f"Error saving temp evaluation: {e}")
         return False
 
 
+def append_temp_evaluation(evaluation_entry, session_id, section):
+    """Append one result to a section of a session's temp evaluation (atomic, safe for parallel submissions)."""
+    try:
+        # A new document gets the other sections empty, so it is created at the current schema version
+        on_insert = {other: [] for other in EVALUATION_SECTIONS if other != section}
+        on_insert[SCHEMA_VERSION_FIELD] = get_schema_version("temp_evaluations")
+        db.temp_evaluations.update_one(
+            {"sessionId": session_id},
+            {
+                "$push": {section: evaluation_entry},
+                "$set": {"expires_at": get_expires_at("temp_evaluations")},
+                "$setOnInsert": on_insert
+            },
+            upsert=True
+        )
+        return True
+    except Exception as e:
+        print(f"Error appending temp evaluation: {e}")
+        return False
+
+
 def load_temp_evaluation(session_id):
     """Load temporary evaluation data from MongoDB."""
-    doc = db.temp_evaluations.find_one({"sessionId": session_id}, {'_id': 0})
+    doc = db.temp_evaluations.find_one({"sessionId": session_id}, {'_id': 0, 'expires_at': 0})
     if doc:
         doc.pop("sessionId", None)
+        upgrade_document("temp_evaluations", doc)  # In memory only; the background migrator persists it
     return doc
 
 def save_temp_comments(session_id, comments):
@@ -226,7 +438,7 @@ def save_temp_comments(session_id, comments):
     try:
         db.temp_comments.replace_one(
             {"sessionId": session_id}, 
-            {"sessionId": session_id, "comments": comments}, 
+            {"sessionId": session_id, "comments": comments, "expires_at": get_expires_at("temp_comments")}, 
             upsert=True
         )
         return True
@@ -239,11 +451,44 @@ def load_temp_comments(session_id):
     try:
         doc = db.temp_comments.find_one({"sessionId": session_id}, {'_id': 0})
         if doc:
-            return doc.get("comments", "")
-        return ""
+            return doc.get("comments", [])
+        return []
     except Exception as e:
         print(f"Error loading temp comments: {e}")
-        return ""
+        return []
+
+# Where each storage type keeps an applicant's comments: (collection, applicant key field)
+COMMENT_STORES = {
+    "permanent": ("applicants", "id"),
+    "temporary": ("temp_comments", "sessionId")
+}
+
+def push_applicant_comment(storage_type, applicant_id, comment):
+    """Atomically add a comment to the front of an applicant's comments (one small write). Returns True on success."""
+    collection_name, key = COMMENT_STORES[storage_type]
+    update = {"$push": {"comments": {"$each": [comment], "$position": 0}}}  # Most recent first
+    if storage_type == "temporary":
+        update["$set"] = {"expires_at": get_expires_at("temp_comments")}
+    try:
+        # Temporary applicants get their comments document on the first comment
+        result = db[collection_name].update_one({key: applicant_id}, update, upsert=storage_type == "temporary")
+        return result.matched_count > 0 or result.upserted_id is not None
+    except Exception as e:
+        print(f"Error adding comment for applicant {applicant_id}: {e}")
+        return False
+
+def pull_applicant_comment(storage_type, applicant_id, comment_id):
+    """Atomically remove one comment by ID. Returns True if the comment existed."""
+    collection_name, key = COMMENT_STORES[storage_type]
+    update = {"$pull": {"comments": {"id": comment_id}}}
+    if storage_type == "temporary":
+        update["$set"] = {"expires_at": get_expires_at("temp_comments")}
+    try:
+        result = db[collection_name].update_one({key: applicant_id, "comments.id": comment_id}, update)
+        return result.modified_count > 0
+    except Exception as e:
+        print(f"Error removing comment {comment_id} for applicant {applicant_id}: {e}")
+        return False
 
 def cleanup_temp_files(session_id):
     """Clean up temporary data for a session from MongoDB collections"""
@@ -302,8 +547,16 @@ def load_users():
     return users
 
 
+def invalidate_principal(user_id=None):
+    """Drop a cached user (or every cached user) after it changes"""
+    if user_id is None:
+        principal_cache.clear()
+    else:
+        principal_cache.pop(user_id)
+
+
 def save_users(users_list):
-    """Save users to MongoDB (replace all)."""
+    """Save users to MongoDB (replace all; only for bulk restores, use the per-user functions otherwise)."""
     try:
         db.users.delete_many({})
         if users_list:
@@ -312,80 +565,121 @@ def save_users(users_list):
     except Exception as e:
         print(f"Error saving users: {e}")
         return False
+    finally:
+        invalidate_principal()
 
 def find_user_by_username(username):
     """Find a user by username"""
-    users = load_users()
-    return next((user for user in users if user.get("username") == username), None)
+    return db.users.find_one({"username": username}, {'_id': 0})
 
 def find_user_by_id(user_id):
-    """Find a user by ID"""
-    users = load_users()
-    return next((user for user in users if user.get("id") == user_id), None)
-
-def create_user(user_data):
-    """Create a new user"""
-    users = load_users()
-    
-    # Generate new ID - safely handle different ID formats
+    """Find a user by ID (served from the principal cache when possible, never older than its TTL)"""
+    entry = principal_cache.get(user_id)
+    if entry is None or time.monotonic() - entry["loaded_at"] > PRINCIPAL_CACHE_TTL_SECONDS:
+        user = db.users.find_one({"id": user_id}, {'_id': 0})
+        if user is None:
+            principal_cache.pop(user_id)
+            return None
+        entry = {"user": user, "loaded_at": time.monotonic()}
+        principal_cache.set(user_id, entry)
+    return dict(entry["user"])  # Callers may modify their copy
+
+def _max_user_number():
+    """Highest N among existing user_N IDs (only used to seed the user ID sequence)"""
     max_user_num = 0
-    for user in users:
+    for user in db.users.find({}, {'_id': 0, 'id': 1}):
         user_id = user.get('id', '')
         if user_id.startswith('user_'):
             try:
                 # Extract numeric part after 'user_'
-                num_part = user_id.split('_', 1)[1]
-                user_num = int(num_part)
-                max_user_num = max(max_user_num, user_num)
+                max_user_num = max(max_user_num, int(user_id.split('_', 1)[1]))
             except (ValueError, IndexError):
                 # Skip IDs that don't match expected format
                 continue
-    
-    new_id = f"user_{max_user_num + 1}"
-    
-    user_data["id"] = new_id
+    return max_user_num
+
+def create_user(user_data):
+    """Create a new user (the unique username index rejects duplicates)"""
+    user_data["id"] = f"user_{next_sequence_value('users', _max_user_number)}"
     user_data["created_at"] = datetime.now().isoformat()
     
-    users.append(user_data)
-    
-    if save_users(users):
+    try:
+        db.users.insert_one(dict(user_data))  # Copy so the caller's dict doesn't gain an _id
         return user_data
+    except DuplicateKeyError:
+        print(f"Error creating user: username {user_data.get('username')} already exists")
+    except Exception as e:
+        print(f"Error creating user: {e}")
     return None
 
 def update_user(user_id, update_data):
-    """Update an existing user"""
-    users = load_users()
-    
-    for i, user in enumerate(users):
-        if user.get("id") == user_id:
-            users[i].update(update_data)
-            users[i]["updated_at"] = datetime.now().isoformat()
-            
-            if save_users(users):
-                return users[i]
-            break
-    
-    return None
+    """Update an existing user's fields in place and return the updated user"""
+    changes = {k: v for k, v in update_data.items() if k not in ('_id', 'id')}
+    changes["updated_at"] = datetime.now().isoformat()
+    try:
+        return db.users.find_one_and_update(
+            {"id": user_id},
+            {"$set": changes},
+            projection={'_id': 0},
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        print(f"Error updating user {user_id}: {e}")
+        return None
+    finally:
+        # After the write, so a concurrent lookup can't re-cache the old role, password or status
+        invalidate_principal(user_id)
+
+def count_active_super_admins(session=None):
+    """Number of active super admins"""
+    return db.users.count_documents({"role": "super_admin", "active": {"$ne": False}}, session=session)
 
 def delete_user(user_id):
-    """Delete a user"""
-    users = load_users()
-    
-    # Don't allow deleting the last super admin
-    super_admins = [u for u in users if u.get("role") == "super_admin" and u.get("active", True)]
-    if len(super_admins) <= 1:
-        user_to_delete = next((u for u in users if u.get("id") == user_id), None)
-        if user_to_delete and user_to_delete.get("role") == "super_admin":
-            return False, "Cannot delete the last super admin"
-    
-    original_count = len(users)
-    users = [user for user in users if user.get("id") != user_id]
-    
-    if len(users) < original_count:
-        if save_users(users):
-            return True, "User deleted successfully"
-    
-    return False, "User not found or could not be deleted" 
+    """Delete a user, unless it is the last active super admin (checked and deleted in one transaction where supported)"""
+    def _delete(session):
+        user = db.users.find_one({"id": user_id}, {'_id': 0, 'role': 1, 'active': 1}, session=session)
+        if user is None:
+            return False, "User not found or could not be deleted"
+        if user.get("role") == "super_admin" and user.get("active", True):
+            # Every super admin delete writes this document, so concurrent ones conflict and retry instead of both passing the count
+            db.counters.update_one({"_id": SUPER_ADMIN_GUARD_ID}, {"$inc": {"seq": 1}}, upsert=True, session=session)
+            if count_active_super_admins(session=session) <= 1:
+                return False, "Cannot delete the last super admin"
+        db.users.delete_one({"id": user_id}, session=session)
+        return True, "User deleted successfully"
+
+    try:
+        if supports_transactions():
+            with db.client.start_session() as session:
+                result = session.with_transaction(_delete)
+        else:
+            result = _delete_user_without_transaction(user_id)
+    except Exception as e:
+        print(f"Error deleting user {user_id}: {e}")
+        return False, "User not found or could not be deleted"
+    if result[0]:
+        invalidate_principal(user_id)
+    return result
+
+def _delete_user_without_transaction(user_id):
+    """
+    Delete a user on a standalone server: delete first, then recheck and restore the user if no super admin is left
+
+    Two concurrent deletes of the last two super admins may both be restored, but never both succeed.
+    """
+    user = db.users.find_one({"id": user_id}, {'_id': 0, 'role': 1, 'active': 1})
+    if user is None:
+        return False, "User not found or could not be deleted"
+    if user.get("role") == "super_admin" and user.get("active", True) and count_active_super_admins() <= 1:
+        return False, "Cannot delete the last super admin"
+    deleted = db.users.find_one_and_delete({"id": user_id})
+    if deleted is None:
+        return False, "User not found or could not be deleted"
+    # Recheck with the deleted document (it may have been promoted after the check above)
+    if deleted.get("role") == "super_admin" and deleted.get("active", True) and count_active_super_admins() == 0:
+        db.users.insert_one(deleted)
+        return False, "Cannot delete the last super admin"
+    return True, "User deleted successfully"
 
 def load_typing_tests():
     """Load typing tests from MongoDB."""
@@ -396,6 +690,7 @@ def load_typing_tests():
 def save_typing_tests(tests_data):
     """Save typing tests to MongoDB (replace all)."""
     try:
+        _retire_replaced_questions("typing_tests", tests_data)
         db.typing_tests.delete_many({})
         if tests_data:
             db.typing_tests.insert_many(tests_data)
@@ -0,0 +1,150 @@
+"""Index manifest for every MongoDB access pattern, plus a verifier that no point lookup scans a whole collection"""
+
+from datetime import datetime
+from pymongo.errors import OperationFailure
+from config import EXPIRY_TTL_DAYS
+from .db import db
+from .expiry import EXPIRES_AT_FIELD
+from .applicant_listing import LISTING_TIMESTAMP_FIELD
+
+# collection -> [(keys, options)]; create_index is a no-op when an identical index already exists
+INDEX_MANIFEST = {
+    "applicants": [
+        ([("id", 1)], {"name": "id_unique", "unique": True}),
+        ([(LISTING_TIMESTAMP_FIELD, -1), ("id", -1)], {"name": "listing_keyset"})
+    ],
+    "temp_applicants": [
+        ([("sessionId", 1)], {"name": "sessionId_unique", "unique": True}),
+        ([(LISTING_TIMESTAMP_FIELD, -1), ("sessionId", -1)], {"name": "listing_keyset"})
+    ],
+    "temp_evaluations": [
+        ([("sessionId", 1)], {"name": "sessionId_unique", "unique": True})
+    ],
+    "temp_comments": [
+        ([("sessionId", 1)], {"name": "sessionId_unique", "unique": True})
+    ],
+    "session_states": [
+        ([("session_id", 1)], {"name": "session_id_unique", "unique": True})
+    ],
+    "users": [
+        ([("username", 1)], {"name": "username_unique", "unique": True}),
+        ([("id", 1)], {"name": "id_unique", "unique": True}),
+        ([("role", 1), ("active", 1)], {"name": "role_active"})
+    ],
+    "questions": [
+        ([("id", 1)], {"name": "id_unique", "unique": True})
+    ],
+    "listening_test_questions": [
+        ([("id", 1)], {"name": "id_unique", "unique": True})
+    ],
+    "written_test_questions": [
+        ([("id", 1)], {"name": "id"})
+    ],
+    "personality_test_questions": [
+        ([("id", 1)], {"name": "id"})
+    ],
+    "typing_tests": [
+        ([("id", 1)], {"name": "id"})
+    ],
+    "retired_questions": [
+        ([("question_type", 1), ("id", 1)], {"name": "question_type_id_unique", "unique": True})
+    ]
+}
+
+# TTL indexes for temp session data (see utils/expiry.py)
+for _collection_name in EXPIRY_TTL_DAYS:
+    INDEX_MANIFEST.setdefault(_collection_name, []).append(
+        ([(EXPIRES_AT_FIELD, 1)], {"name": "expires_at_ttl", "expireAfterSeconds": 0})
+    )
+
+INDEX_CONFLICT_CODES = {85, 86}  # IndexOptionsConflict, IndexKeySpecsConflict
+
+# Point lookups issued by utils/file_ops.py, utils/question_catalog.py and utils/session.py: (where, collection, filter)
+# _id lookups (counters, catalog_generations) are listed too so a plan change there shows up as well.
+# Whole-collection loads (load_questions, load_users, ...) read everything by design and are not listed.
+VERIFIED_QUERIES = [
+    ("file_ops.save_applicants / load_applicant / save_applicant / update_applicant", "applicants", {"id": "verify"}),
+    ("file_ops.set_question_audio_id", "questions", {"id": 1, "text": "verify"}),
+    ("file_ops.find_question / update_question / delete_question", "questions", {"id": 1}),
+    ("file_ops.find_question / update_question / delete_question", "listening_test_questions", {"id": 1}),
+    ("file_ops.retire_questions / load_retired_questions", "retired_questions", {"question_type": "speech", "id": {"$in": [1]}}),
+    ("file_ops.save_temp_applicant / load_temp_applicant", "temp_applicants", {"sessionId": "verify"}),
+    ("file_ops.save_temp_evaluation / append_temp_evaluation / load_temp_evaluation", "temp_evaluations", {"sessionId": "verify"}),
+    ("file_ops.save_temp_comments / load_temp_comments / push_applicant_comment / pull_applicant_comment", "temp_comments", {"sessionId": "verify"}),
+    ("file_ops.find_user_by_username", "users", {"username": "verify"}),
+    ("file_ops.find_user_by_id / update_user / delete_user", "users", {"id": "verify"}),
+    ("file_ops.count_active_super_admins", "users", {"role": "super_admin", "active": {"$ne": False}}),
+    ("file_ops.next_sequence_value / delete_user guard", "counters", {"_id": "verify"}),
+    ("question_catalog._read_generations / invalidate_question_catalog", "catalog_generations", {"_id": "verify"}),
+    ("applicant_listing._permanent_page", "applicants", {LISTING_TIMESTAMP_FIELD: {"$lt": datetime(2000, 1, 1)}}),
+    ("applicant_listing._temporary_page", "temp_applicants", {LISTING_TIMESTAMP_FIELD: {"$lt": datetime(2000, 1, 1)}}),
+    ("session._load_session_state / clear_session", "session_states", {"session_id": "verify"}),
+    ("session.set_session_state (versioned write)", "session_states", {"session_id": "verify", "version": {"$in": [1]}})
+]
+
+
+def ensure_indexes():
+    """
+    Create every index in the manifest (idempotent)
+
+    Returns:
+        list: (collection, index name, error) for indexes that could not be created
+    """
+    failures = []
+    for collection_name, indexes in INDEX_MANIFEST.items():
+        for keys, options in indexes:
+            try:
+                try:
+                    db[collection_name].create_index(keys, **options)
+                except OperationFailure as e:
+                    if e.code not in INDEX_CONFLICT_CODES:
+                        raise
+                    # An older manifest created this key under another name or options, or this name on other keys; replace it
+                    _drop_conflicting_index(collection_name, keys, options["name"])
+                    db[collection_name].create_index(keys, **options)
+            except Exception as e:
+                # e.g. duplicate values blocking a unique index; keep going so the rest still get created
+                print(f"Warning: Could not create index {collection_name}.{options['name']}: {e}")
+                failures.append((collection_name, options["name"], str(e)))
+    return failures
+
+
+def _drop_conflicting_index(collection_name, keys, index_name):
+    """Drop whichever existing index covers exactly these keys or already uses this name"""
+    for name, info in db[collection_name].index_information().items():
+        if name != "_id_" and (name == index_name or [tuple(key) for key in info["key"]] == [tuple(key) for key in keys]):
+            db[collection_name].drop_index(name)
+
+
+def _plan_stages(plan):
+    """Every stage name in an explain plan tree (handles inputStage(s) and the SBE queryPlan wrapper)"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def verify_indexes():
+    """
+    Explain each verified query and check that its winning plan never scans a whole collection
+
+    Returns:
+        list: {"query", "collection", "filter", "stages", "ok"} per query
+    """
+    results = []
+    for where, collection_name, query in VERIFIED_QUERIES:
+        explanation = db[collection_name].find(query).explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning_plan))
+        results.append({
+            "query": where,
+            "collection": collection_name,
+            "filter": query,
+            "stages": stages,
+            "ok": "COLLSCAN" not in stages
+        })
+    return results
@@ -0,0 +1,24 @@
+"""Process-wide instrumentation counters"""
+
+import threading
+from collections import defaultdict
+
+_counters = defaultdict(int)  # Counter name -> value
+_counters_lock = threading.Lock()
+
+
+def increment(name, amount=1):
+    """Increment a named counter"""
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def get_counter(name):
+    """Get the current value of a named counter"""
+    return _counters.get(name, 0)
+
+
+def get_metrics(prefix=None):
+    """Get a snapshot of all counters (optionally only those starting with prefix)"""
+    with _counters_lock:
+        return {name: value for name, value in sorted(_counters.items()) if not prefix or name.startswith(prefix)}
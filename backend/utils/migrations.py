@@ -0,0 +1,255 @@
+"""Versioned schema migrations: documents are upgraded in memory on read and persisted in bulk in the background"""
+
+import copy
+import threading
+from pymongo import UpdateOne
+from config import MIGRATION_BATCH_SIZE
+from .db import db
+from .metrics import increment
+from .applicant_listing import LISTING_TIMESTAMP_FIELD, parse_timestamp
+
+SCHEMA_VERSION_FIELD = "schema_version"
+TEST_TYPES = ['listening', 'written', 'speech', 'personality', 'typing']
+EVALUATION_SECTIONS = ['speech_eval', 'listening_test', 'written_test', 'personality_test', 'typing_test']
+
+
+# session_states migrations
+
+def _session_fill_test_completion(doc):
+    """v1: every session has a completion flag for all five tests"""
+    completion = doc.setdefault('test_completion', {})
+    for test_type in TEST_TYPES:
+        completion.setdefault(test_type, False)
+
+
+# (question type, ID list field, legacy embedded questions field)
+SESSION_LEGACY_QUESTION_FIELDS = [
+    ('speech', 'question_ids', 'questions'),
+    ('listening', 'listening_question_ids', 'listening_questions'),
+    ('written', 'written_question_ids', 'written_questions')
+]
+
+
+def _legacy_session_questions(doc):
+    """(question type, embedded questions) for each legacy list the v2 migration will replace"""
+    return [
+        (question_type, doc[legacy_field])
+        for question_type, ids_field, legacy_field in SESSION_LEGACY_QUESTION_FIELDS
+        if doc.get(legacy_field) is not None and doc.get(ids_field) is None
+    ]
+
+
+def _session_question_ids(doc):
+    """v2: sessions store question ID lists instead of embedded question copies"""
+    from .question_catalog import remember_questions  # Imported here, the catalog loads through file_ops
+    for question_type, legacy_questions in _legacy_session_questions(doc):
+        # Kept in memory so the IDs resolve; the stored copies stay until the batch migration retires them
+        remember_questions(question_type, legacy_questions)
+    for question_type, ids_field, legacy_field in SESSION_LEGACY_QUESTION_FIELDS:
+        if doc.get(legacy_field) is not None and doc.get(ids_field) is None:
+            doc[ids_field] = [q.get('id') for q in doc[legacy_field]]
+        doc.pop(legacy_field, None)
+
+
+def _retire_session_questions(doc):
+    """Before a session is rewritten at v2: save its embedded questions to retired_questions (raises if that fails)"""
+    from .question_catalog import retain_questions
+    for question_type, legacy_questions in _legacy_session_questions(doc):
+        retain_questions(question_type, legacy_questions)
+
+
+# temp_evaluations migrations
+
+def _evaluation_sections(doc):
+    """v1: segmented evaluations have every section, even if empty"""
+    if "evaluations" in doc:
+        return  # Old flat format, combined as-is when the evaluation finishes
+    for section in EVALUATION_SECTIONS:
+        doc.setdefault(section, [])
+
+
+# applicants migrations
+
+def _applicant_comments_and_totals(doc):
+    """v1: applicants have a comments list and a stored question total"""
+    if not isinstance(doc.get('comments'), list):
+        doc['comments'] = []
+    if "evaluations" in doc:
+        doc.setdefault('total_questions', len(doc['evaluations']))
+        return
+    for section in EVALUATION_SECTIONS:
+        doc.setdefault(section, [])
+    doc.setdefault('total_questions', sum(len(doc[section]) for section in EVALUATION_SECTIONS))
+
+
+def _applicant_listing_timestamp(doc):
+    """v2: applicants store their application time as a date for the listing's keyset order"""
+    doc[LISTING_TIMESTAMP_FIELD] = parse_timestamp(doc.get('application_timestamp'))
+
+
+# temp_applicants migrations
+
+def _temp_applicant_listing_timestamp(doc):
+    """v1: temp applicants store their application time as a date for the listing's keyset order"""
+    doc[LISTING_TIMESTAMP_FIELD] = parse_timestamp(doc.get('timestamp'))
+
+
+# Ordered migrations per collection; a document's schema_version is the last one applied
+MIGRATIONS = {
+    "session_states": [
+        (1, _session_fill_test_completion),
+        (2, _session_question_ids)
+    ],
+    "temp_evaluations": [
+        (1, _evaluation_sections)
+    ],
+    "applicants": [
+        (1, _applicant_comments_and_totals),
+        (2, _applicant_listing_timestamp)
+    ],
+    "temp_applicants": [
+        (1, _temp_applicant_listing_timestamp)
+    ]
+}
+
+# Fields whose stored value must not change between reading and rewriting a document
+GUARD_FIELDS = {
+    "session_states": ['version']
+}
+
+# Durable side effects run by migrate_collection before a document is rewritten (never on the read path)
+BEFORE_PERSIST = {
+    "session_states": _retire_session_questions
+}
+
+
+def get_schema_version(collection_name):
+    """Latest schema version for a collection"""
+    migrations = MIGRATIONS.get(collection_name, [])
+    return migrations[-1][0] if migrations else 0
+
+
+def upgrade_document(collection_name, doc):
+    """Apply pending migrations to a document in memory (never writes). Returns True if it changed."""
+    if doc is None:
+        return False
+    current = doc.get(SCHEMA_VERSION_FIELD, 0)
+    changed = False
+    for version, migrate in MIGRATIONS.get(collection_name, []):
+        if version > current:
+            migrate(doc)
+            doc[SCHEMA_VERSION_FIELD] = version
+            changed = True
+    return changed
+
+
+def _field_update(before, after):
+    """
+    Match conditions and update for the top-level fields a migration changed
+
+    Each changed field must still hold the value that was read, so a concurrent write to it skips the
+    document (picked up on the next run) while writes to other fields, like $push to a section, are kept.
+    """
+    match = {}
+    to_set = {}
+    to_unset = {}
+    for key in set(before) | set(after):
+        if key == '_id' or before.get(key, _MISSING) == after.get(key, _MISSING):
+            continue
+        match[key] = before[key] if key in before else {'$exists': False}
+        if key in after:
+            to_set[key] = after[key]
+        else:
+            to_unset[key] = ""
+    update = {'$set': to_set}
+    if to_unset:
+        update['$unset'] = to_unset
+    return match, update
+
+
+_MISSING = object()
+
+
+def _outdated_filter(collection_name):
+    """Query matching documents below the latest schema version"""
+    return {'$or': [
+        {SCHEMA_VERSION_FIELD: {'$lt': get_schema_version(collection_name)}},
+        {SCHEMA_VERSION_FIELD: {'$exists': False}}
+    ]}
+
+
+def migrate_collection(collection_name, batch_size=None, dry_run=False):
+    """
+    Persist upgrades for every outdated document in a collection, in batches
+
+    Only the fields a migration changed are written. Documents whose changed fields (or guard fields)
+    were written by someone else while a batch was prepared are skipped and picked up on the next run.
+
+    Returns:
+        dict: {collection, outdated, upgraded, skipped}
+    """
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    collection = db[collection_name]
+    guard_fields = GUARD_FIELDS.get(collection_name, [])
+    before_persist = BEFORE_PERSIST.get(collection_name)
+    outdated = collection.count_documents(_outdated_filter(collection_name))
+    report = {"collection": collection_name, "outdated": outdated, "upgraded": 0, "skipped": 0}
+    if dry_run or not outdated:
+        return report
+
+    last_id = None
+    while True:
+        query = _outdated_filter(collection_name)
+        if last_id is not None:
+            query = {'$and': [query, {'_id': {'$gt': last_id}}]}
+        batch = list(collection.find(query).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]['_id']
+
+        operations = []
+        for doc in batch:
+            if before_persist:
+                try:
+                    before_persist(doc)
+                except Exception as e:
+                    print(f"Warning: Not migrating {collection_name} {doc['_id']}: {e}")
+                    report["skipped"] += 1
+                    continue
+            original = copy.deepcopy(doc)
+            upgrade_document(collection_name, doc)
+            match, update = _field_update(original, doc)
+            match.update({'_id': doc['_id'], SCHEMA_VERSION_FIELD: original.get(SCHEMA_VERSION_FIELD)})
+            match.update({field: original.get(field) for field in guard_fields})
+            if 'version' in guard_fields:
+                update['$inc'] = {'version': 1}  # Cached copies in other workers reload
+            operations.append(UpdateOne(match, update))
+
+        if not operations:
+            continue
+        result = collection.bulk_write(operations, ordered=False)
+        report["upgraded"] += result.modified_count
+        report["skipped"] += len(operations) - result.matched_count
+
+    increment(f"migrations.{collection_name}.upgraded", report["upgraded"])
+    return report
+
+
+def migrate_all(batch_size=None, dry_run=False):
+    """Run migrations for every collection"""
+    return [migrate_collection(name, batch_size, dry_run) for name in MIGRATIONS]
+
+
+def start_background_migrations():
+    """Persist pending upgrades in a daemon thread so startup isn't delayed"""
+    def _run():
+        try:
+            for report in migrate_all():
+                if report["outdated"]:
+                    print(f"✓ Migrated {report['upgraded']}/{report['outdated']} {report['collection']} documents")
+        except Exception as e:
+            print(f"Warning: Background migration failed: {e}")
+
+    thread = threading.Thread(target=_run, name="schema-migrations", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,51 @@
+"""Read-only progress snapshot for a session, computed from a single loaded session state"""
+
+from .session import get_session_state, SESSION_QUESTION_FIELDS, SESSION_QUESTION_LIMITS
+from .question_catalog import get_active_question_count
+
+TEST_ORDER = ['listening', 'written', 'speech', 'personality', 'typing']  # Order tests are taken in
+
+
+def _count_questions(state, question_type):
+    """Number of questions a session has (or will get) for a question type"""
+    question_ids = state.get(SESSION_QUESTION_FIELDS[question_type])
+    if question_ids is not None:
+        return len(question_ids)
+    # Not picked yet: the session will get up to the per-session limit of active questions
+    return min(get_active_question_count(question_type), SESSION_QUESTION_LIMITS[question_type])
+
+
+def _question_progress(state, question_type, answered_field, index_field, is_complete):
+    """Progress for a question-based test: next unanswered index, totals and completion"""
+    total_questions = _count_questions(state, question_type)
+    answered = state.get(answered_field, set())
+    next_index = next((i for i in range(total_questions) if i not in answered), state.get(index_field, 0))
+    return {
+        "current_index": next_index,
+        "total_questions": total_questions,
+        "answered_count": len(answered),
+        "is_complete": is_complete
+    }
+
+
+def get_progress_snapshot(session_id):
+    """Build the progress of every test for a session (one state read, no writes)"""
+    state = get_session_state(session_id, create=False)
+    test_completion = {test_type: bool(state.get('test_completion', {}).get(test_type, False)) for test_type in TEST_ORDER}
+    next_test = next((test_type for test_type in TEST_ORDER if not test_completion[test_type]), None)
+
+    return {
+        "session_id": session_id,
+        "test_completion": test_completion,
+        "next_test": next_test,  # None once every test is completed
+        "all_complete": next_test is None,
+        "speech_evaluation": _question_progress(state, 'speech', 'has_answered', 'current_index', test_completion['speech']),
+        "listening_test": _question_progress(state, 'listening', 'listening_has_answered', 'listening_current_index', test_completion['listening']),
+        "written_test": {
+            "total_questions": _count_questions(state, 'written'),
+            "is_complete": test_completion['written']
+        },
+        "personality_test": {"is_complete": test_completion['personality']},
+        "typing_test": {"is_complete": test_completion['typing']},
+        "last_updated": state.get('last_updated')
+    }
@@ -0,0 +1,188 @@
+"""
+Shared in-process question catalog so sessions can store question IDs instead of copies
+
+Each worker caches every question type in memory. Admin writes bump a per-type generation
+stored in MongoDB; workers compare it with the generation they loaded (one tiny read per
+request) and reload only the types that changed. Removed questions are kept in the
+retired_questions collection, so IDs already stored in sessions resolve on every worker.
+"""
+
+import random
+import threading
+from flask import g, has_request_context
+from config import QUESTION_SAMPLING_SEED
+from .db import db
+from .file_ops import (
+    load_questions, load_listening_test_questions, load_written_test_questions,
+    load_personality_test_questions, load_typing_tests, retire_questions, load_retired_questions
+)
+
+# Question types served from the catalog, with the loader for each
+CATALOG_LOADERS = {
+    "speech": load_questions,
+    "listening": load_listening_test_questions,
+    "written": load_written_test_questions,
+    "personality": load_personality_test_questions,
+    "typing": load_typing_tests
+}
+
+GENERATIONS_DOC_ID = "question_catalog"  # Single document in catalog_generations: {question type: generation}
+
+_catalog_lock = threading.Lock()
+_catalogs = {}  # question type -> {"questions": (all), "by_id": {id: question}, "active_ids": (ids)}, precomputed per load
+_generations = {}  # question type -> generation the loaded catalog reflects
+_retired = {question_type: {} for question_type in CATALOG_LOADERS}  # Local copy of retired_questions entries already looked up (never change)
+
+
+def _read_generations():
+    """Current generation of every question type (read at most once per request)"""
+    if has_request_context() and 'catalog_generations' in g:
+        return g.catalog_generations
+    generations = db.catalog_generations.find_one({"_id": GENERATIONS_DOC_ID}, {"_id": 0}) or {}
+    if has_request_context():
+        g.catalog_generations = generations
+    return generations
+
+
+def _load_catalog(question_type, generation):
+    """Load one question type from MongoDB, retiring questions that disappeared"""
+    questions = CATALOG_LOADERS[question_type]()
+    by_id = {q["id"]: q for q in questions if q.get("id") is not None}
+
+    previous = _catalogs.get(question_type)
+    if previous:
+        # Admin deletes retire questions themselves; this covers questions removed outside the app
+        removed = [question for question_id, question in previous["by_id"].items() if question_id not in by_id]
+        if removed:
+            try:
+                retire_questions(question_type, removed)
+            except Exception as e:
+                print(f"Warning: Could not retire removed {question_type} questions: {e}")
+
+    _catalogs[question_type] = {
+        "questions": tuple(questions),
+        "by_id": by_id,
+        "active_ids": tuple(q["id"] for q in questions if q.get("active", True) and q.get("id") is not None)
+    }
+    _generations[question_type] = generation
+    return _catalogs[question_type]
+
+
+def _get_catalog(question_type):
+    """Get one question type's catalog, reloading it if any worker bumped its generation"""
+    generation = _read_generations().get(question_type, 0)
+    if _generations.get(question_type) != generation or question_type not in _catalogs:
+        with _catalog_lock:
+            if _generations.get(question_type) != generation or question_type not in _catalogs:
+                return _load_catalog(question_type, generation)
+    return _catalogs[question_type]
+
+
+def invalidate_question_catalog(question_type=None):
+    """Bump one question type's generation (or all) after questions are saved, so every worker reloads it"""
+    question_types = [question_type] if question_type else list(CATALOG_LOADERS)
+    db.catalog_generations.update_one(
+        {"_id": GENERATIONS_DOC_ID},
+        {"$inc": {t: 1 for t in question_types}},
+        upsert=True
+    )
+    for t in question_types:
+        _generations.pop(t, None)  # Reload here even if the bumped generation isn't read back yet
+    if has_request_context():
+        g.pop('catalog_generations', None)
+
+
+def reload_question_catalog(question_type):
+    """Bust every worker's cache of a question type and reload it here now; returns the question count"""
+    invalidate_question_catalog(question_type)
+    return len(_get_catalog(question_type)["questions"])
+
+
+def get_catalog_version(question_type):
+    """Generation of a question type's catalog as served to this request (changes whenever any worker saves it)"""
+    return _read_generations().get(question_type, 0)
+
+
+def get_catalog_questions(question_type):
+    """Every question of a type (active or not), in stored order; treat as read-only"""
+    return list(_get_catalog(question_type)["questions"])
+
+
+def get_active_question_ids(question_type):
+    """IDs of every active question of a type"""
+    return list(_get_catalog(question_type)["active_ids"])
+
+
+def get_active_question_count(question_type):
+    """Number of active questions of a type"""
+    return len(_get_catalog(question_type)["active_ids"])
+
+
+def sample_active_question_ids(question_type, count, seed_key=None):
+    """
+    Pick up to count active question IDs in random order without copying or shuffling the whole pool
+
+    With QUESTION_SAMPLING_SEED set, the pick is reproducible for the same seed_key (e.g. the session ID).
+    """
+    pool = _get_catalog(question_type)["active_ids"]
+    if len(pool) <= count:
+        return list(pool)  # Every active question, in catalog order
+    if QUESTION_SAMPLING_SEED is not None:
+        rng = random.Random(f"{QUESTION_SAMPLING_SEED}:{question_type}:{seed_key}")
+        return rng.sample(pool, count)
+    return random.sample(pool, count)
+
+
+def _find_retired(question_type, question_ids):
+    """Retired questions for the IDs, from the local copy or in one query to retired_questions"""
+    retired = _retired[question_type]
+    missing = [question_id for question_id in question_ids if question_id not in retired]
+    if missing:
+        retired.update(load_retired_questions(question_type, missing))
+    return {question_id: retired[question_id] for question_id in question_ids if question_id in retired}
+
+
+def get_catalog_question(question_type, question_id):
+    """Look up a question by ID, including questions removed since a session started"""
+    question = _get_catalog(question_type)["by_id"].get(question_id)
+    if question is None:
+        question = _find_retired(question_type, [question_id]).get(question_id)
+    return question
+
+
+def resolve_questions(question_type, question_ids):
+    """Resolve an ordered list of IDs to question dicts (removed questions come from retired_questions)"""
+    by_id = _get_catalog(question_type)["by_id"]
+    retired = _find_retired(question_type, [question_id for question_id in question_ids if question_id not in by_id])
+    questions = []
+    for question_id in question_ids:
+        question = by_id.get(question_id) or retired.get(question_id)
+        if question is None:
+            # Only possible for questions deleted before they were retired; later positions shift
+            print(f"Warning: {question_type} question {question_id} no longer exists")
+            continue
+        questions.append(question)
+    return questions
+
+
+def remember_questions(question_type, questions):
+    """Keep questions embedded in an older session resolvable in this process (no writes; the migration retires them)"""
+    by_id = _get_catalog(question_type)["by_id"]
+    for question in questions:
+        if question.get("id") is not None and question["id"] not in by_id:
+            _retired[question_type].setdefault(question["id"], question)
+
+
+def retain_questions(question_type, questions):
+    """Durably retire questions embedded in older sessions that are no longer in the catalog (raises if that fails)"""
+    catalog = _get_catalog(question_type)
+    removed = [
+        question for question in questions
+        if question.get("id") is not None
+        and question["id"] not in catalog["by_id"]
+    ]
+    if removed:
+        # Always written (the upsert is idempotent): the local copy may hold entries only remembered on read
+        retire_questions(question_type, removed)
+        for question in removed:
+            _retired[question_type].setdefault(question["id"], question)
@@ -1,53 +1,123 @@
-import random
 from datetime import datetime
-from config import MAX_QUESTIONS_PER_SESSION
-from .file_ops import load_questions, load_listening_test_questions, load_written_test_questions
+from flask import g, has_request_context, jsonify
+from pymongo import ReturnDocument
+from config import MAX_QUESTIONS_PER_SESSION, SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_MAX_BYTES, SESSION_CACHE_TTL_SECONDS
+from .question_catalog import get_active_question_ids, sample_active_question_ids, get_catalog_question, resolve_questions
+from .migrations import upgrade_document, get_schema_version, SCHEMA_VERSION_FIELD
+from .expiry import get_expires_at
 from .db import session_states_collection
+from .cache import BoundedTTLCache
+from .metrics import increment
 
 # In-memory cache for performance (still used but backed by MongoDB)
-session_states_cache = {}  # Cache session state for each session ID
+session_states_cache = BoundedTTLCache(  # Cache session state for each session ID
+    "session_states",
+    max_entries=SESSION_CACHE_MAX_ENTRIES,
+    max_bytes=SESSION_CACHE_MAX_BYTES,
+    ttl_seconds=SESSION_CACHE_TTL_SECONDS
+)
 
-def get_session_state(session_id):
-    """Get session state for a specific session (from MongoDB)"""
-    # Check cache first
-    if session_id in session_states_cache:
-        return session_states_cache[session_id]
-    
-    # Try to load from MongoDB
-    session_doc = session_states_collection.find_one({'session_id': session_id})
-    
-    if session_doc:
-        # Convert stored data back to Python objects
-        state = {
-            'current_index': session_doc.get('current_index', 0),
-            'questions': session_doc.get('questions', None),
-            'has_answered': set(session_doc.get('has_answered', [])),
-            'listening_current_index': session_doc.get('listening_current_index', 0),
-            'listening_questions': session_doc.get('listening_questions', None),
-            'listening_has_answered': set(session_doc.get('listening_has_answered', [])),
-            'written_questions': session_doc.get('written_questions', None),
-            'test_completion': session_doc.get('test_completion', {
-                'listening': False,
-                'written': False,
-                'speech': False,
-                'personality': False,
-                'typing': False
-            }),
-            'last_updated': session_doc.get('last_updated')
-        }
-        # Cache it
-        session_states_cache[session_id] = state
+class SessionStateConflictError(Exception):
+    """Raised when a session document changed since it was read (another worker wrote first)"""
+
+class SessionState(dict):
+    """
+    Session state that remembers what was loaded so saves only send changed fields
+    
+    Sets and dicts are compared by value; other fields (like question lists) should be
+    replaced rather than mutated in place.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mark_clean()
+    
+    def mark_clean(self):
+        """Snapshot the current values as the persisted baseline"""
+        self._loaded = {key: _snapshot(value) for key, value in self.items()}
+    
+    def copy(self):
+        """Copy for mutation, keeping the same persisted baseline"""
+        state = SessionState({key: type(value)(value) if isinstance(value, (set, dict)) else value for key, value in self.items()})
+        state._loaded = self._loaded
         return state
     
-    # Initialize new session state if not found
-    new_state = {
+    def get_update(self):
+        """Build the $set/$addToSet/$unset update for fields changed since the last save"""
+        to_set = {}
+        to_add = {}
+        to_unset = {key: "" for key in self._loaded if key not in self}  # Dropped fields, e.g. legacy question copies
+        for key, value in self.items():
+            if key in ('version', 'last_updated'):
+                continue
+            original = self._loaded.get(key, _MISSING)
+            if value is original:
+                continue
+            if isinstance(value, set):
+                if isinstance(original, frozenset) and original <= value:
+                    added = value - original
+                    if added:
+                        to_add[key] = {'$each': sorted(added)}  # Only the newly answered indexes
+                    continue
+                to_set[key] = sorted(value)
+            elif isinstance(value, dict) and isinstance(original, dict) and set(original) <= set(value):
+                for sub_key, sub_value in value.items():
+                    if original.get(sub_key, _MISSING) != sub_value:
+                        to_set[f"{key}.{sub_key}"] = sub_value  # e.g. test_completion.speech
+            elif _snapshot(value) != original:
+                to_set[key] = value
+        return to_set, to_add, to_unset
+
+_MISSING = object()
+
+def _snapshot(value):
+    """Copy mutable containers so later in-place changes can be detected"""
+    if isinstance(value, set):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+# Session field holding each question type's ordered IDs
+SESSION_QUESTION_FIELDS = {
+    'speech': 'question_ids',
+    'listening': 'listening_question_ids',
+    'written': 'written_question_ids'
+}
+
+# Questions picked per session for each question type
+SESSION_QUESTION_LIMITS = {
+    'speech': MAX_QUESTIONS_PER_SESSION,
+    'listening': 5,
+    'written': 20
+}
+
+def _state_from_document(session_doc):
+    """Convert a stored session document back to Python objects"""
+    upgrade_document("session_states", session_doc)  # In memory only; the background migrator persists it
+    return SessionState({
+        'current_index': session_doc.get('current_index', 0),
+        'question_ids': session_doc.get('question_ids', None),
+        'has_answered': set(session_doc.get('has_answered', [])),
+        'listening_current_index': session_doc.get('listening_current_index', 0),
+        'listening_question_ids': session_doc.get('listening_question_ids', None),
+        'listening_has_answered': set(session_doc.get('listening_has_answered', [])),
+        'written_question_ids': session_doc.get('written_question_ids', None),
+        'test_completion': session_doc['test_completion'],  # Filled in by the schema migration
+        'last_updated': session_doc.get('last_updated'),
+        'version': session_doc.get('version', 0)  # Documents written before versioning count as version 0
+    })
+
+def _new_session_state():
+    """Default state for a session that has no document yet"""
+    return SessionState({
         'current_index': 0,
-        'questions': None,
+        'question_ids': None,
         'has_answered': set(),
         'listening_current_index': 0,
-        'listening_questions': None,
+        'listening_question_ids': None,
         'listening_has_answered': set(),
-        'written_questions': None,
+        'written_question_ids': None,
         'test_completion': {
             'listening': False,
             'written': False,
@@ -55,71 +125,267 @@ def get_session_state(session_id):
             'personality': False,
             'typing': False
         },
-        'last_updated': datetime.utcnow().isoformat()
-    }
+        'last_updated': datetime.utcnow().isoformat(),
+        'version': None  # Not persisted yet
+    })
+
+def _load_session_state(session_id):
+    """Load a session's state from the cache or MongoDB, or None if it has no document"""
+    # Check cache first, validating it against the stored version (projected read, no payload)
+    cached_state = session_states_cache.get(session_id)
+    if cached_state is not None:
+        stored = session_states_collection.find_one({'session_id': session_id}, {'_id': 0, 'version': 1})
+        if stored is not None and stored.get('version', 0) == cached_state.get('version'):
+            return cached_state
+        session_states_cache.pop(session_id)  # Another worker wrote since we cached it
+        increment("cache.session_states.stale")
     
-    # Save to MongoDB immediately
-    set_session_state(session_id, new_state)
-    return new_state
+    # Try to load from MongoDB
+    session_doc = session_states_collection.find_one({'session_id': session_id})
+    
+    if session_doc:
+        state = _state_from_document(session_doc)
+        # Cache it
+        session_states_cache.set(session_id, state)
+        return state
+    return None
+
+def _get_unit_of_work():
+    """Session states loaded by the current request, or None outside a request"""
+    if not has_request_context():
+        return None
+    if 'session_unit_of_work' not in g:
+        g.session_unit_of_work = {}  # session_id -> {state, mutations, dirty}
+    return g.session_unit_of_work
+
+def get_session_state(session_id, create=True):
+    """Get session state for a specific session (from MongoDB; create=False never writes)"""
+    unit_of_work = _get_unit_of_work()
+    if unit_of_work is not None and session_id in unit_of_work:
+        entry = unit_of_work[session_id]  # Already loaded (and maybe changed) by this request
+        if create and entry['state'].get('version') is None:
+            entry['dirty'] = True  # First looked up with create=False; now it must be inserted
+        return entry['state']
+    
+    state = _load_session_state(session_id)
+    is_new = state is None
+    if is_new:
+        # Initialize new session state if not found
+        state = _new_session_state()
+    
+    if unit_of_work is not None:
+        # Work on a copy for the rest of the request; the session is inserted when the request ends
+        unit_of_work[session_id] = {
+            'state': state if is_new else state.copy(),
+            'mutations': [],
+            'dirty': is_new and create
+        }
+        return unit_of_work[session_id]['state']
+    
+    if is_new and create:
+        # Save to MongoDB immediately
+        try:
+            set_session_state(session_id, state)
+        except SessionStateConflictError:
+            return get_session_state(session_id)  # Another worker created it first; use theirs
+    return state  # Unsaved defaults for read-only callers if create=False
 
 def set_session_state(session_id, state):
-    """Set session state for a specific session (save to MongoDB)"""
+    """Set session state for a specific session (save to MongoDB, only if unchanged since it was read)"""
+    if not isinstance(state, SessionState):
+        state = SessionState(state, version=state.get('version'))
+        state._loaded = {}  # Unknown baseline, write every field
+    expected_version = state.get('version')
+    
     # Update timestamp
     state['last_updated'] = datetime.utcnow().isoformat()
     
-    # Convert sets to lists for MongoDB storage
-    state_to_save = state.copy()
-    state_to_save['has_answered'] = list(state.get('has_answered', set()))
-    state_to_save['listening_has_answered'] = list(state.get('listening_has_answered', set()))
-    state_to_save['session_id'] = session_id
-    
-    # Save to MongoDB (upsert)
-    session_states_collection.replace_one(
-        {'session_id': session_id},
-        state_to_save,
-        upsert=True
-    )
+    if expected_version is None:
+        # New session: insert only if no other worker created it meanwhile
+        state_to_save = dict(state)
+        # Convert sets to lists for MongoDB storage
+        state_to_save['has_answered'] = sorted(state.get('has_answered', set()))
+        state_to_save['listening_has_answered'] = sorted(state.get('listening_has_answered', set()))
+        state_to_save['session_id'] = session_id
+        state_to_save['version'] = 1
+        state_to_save[SCHEMA_VERSION_FIELD] = get_schema_version('session_states')  # New sessions are written in the current shape
+        state_to_save['expires_at'] = get_expires_at('session_states')  # TTL index removes abandoned sessions
+        result = session_states_collection.update_one(
+            {'session_id': session_id},
+            {'$setOnInsert': state_to_save},
+            upsert=True
+        )
+        written = result.upserted_id is not None
+    else:
+        # Existing session: send only the changed fields, if nobody wrote since we read it
+        to_set, to_add, to_unset = state.get_update()
+        # Only adding answered indexes commutes with any concurrent write, so it needs no version check
+        commutative = bool(to_add) and not to_set and not to_unset
+        to_set['last_updated'] = state['last_updated']
+        to_set['expires_at'] = get_expires_at('session_states')  # Activity pushes expiry back
+        update = {'$set': to_set, '$inc': {'version': 1}}
+        if to_add:
+            update['$addToSet'] = to_add
+        if to_unset:
+            update['$unset'] = to_unset
+        if commutative:
+            stored = session_states_collection.find_one_and_update(
+                {'session_id': session_id},
+                update,
+                projection={'_id': 0, 'version': 1},
+                return_document=ReturnDocument.AFTER
+            )
+            written = stored is not None
+            if written and stored['version'] != expected_version + 1:
+                # Other writes landed in between; our copy lacks them, so don't cache it
+                state['version'] = stored['version']
+                state.mark_clean()
+                session_states_cache.pop(session_id)
+                increment("session_states.atomic_merges")
+                return
+        else:
+            result = session_states_collection.update_one(
+                {'session_id': session_id, 'version': {'$in': [expected_version] + ([None] if expected_version == 0 else [])}},
+                update
+            )
+            written = result.matched_count > 0
+    
+    if not written:
+        session_states_cache.pop(session_id)
+        increment("session_states.write_conflicts")
+        raise SessionStateConflictError(f"Session {session_id} was modified concurrently")
+    
+    state['version'] = (expected_version or 0) + 1
+    state.mark_clean()
     
     # Update cache
-    session_states_cache[session_id] = state
+    session_states_cache.set(session_id, state)
 
-def get_active_questions_for_session(session_id):
-    """Get active questions for a specific session (randomized once per session)"""
+def update_session_state(session_id, mutate, max_attempts=5):
+    """
+    Apply mutate(state) and save it, re-reading and retrying if another worker wrote first
+    
+    Inside a request the change is applied to the request's state and written once when the request ends.
+    """
+    unit_of_work = _get_unit_of_work()
+    if unit_of_work is not None:
+        state = get_session_state(session_id)
+        result = mutate(state)
+        entry = unit_of_work[session_id]
+        entry['mutations'].append(mutate)  # Replayed on a fresh state if the final write conflicts
+        entry['dirty'] = True
+        return result
+    
+    for attempt in range(max_attempts):
+        # Mutate a copy so a failed write never leaves the cached state half-changed
+        state = get_session_state(session_id).copy()
+        result = mutate(state)
+        try:
+            set_session_state(session_id, state)
+            return result
+        except SessionStateConflictError:
+            if attempt == max_attempts - 1:
+                raise
+
+def _comparable(state):
+    """A state's fields as values, ignoring bookkeeping that changes on every write"""
+    return {key: _snapshot(value) for key, value in state.items() if key not in ('version', 'last_updated')}
+
+def flush_session_writes(max_attempts=5):
+    """
+    Write every session changed during the request in one update each
+
+    Returns:
+        list: IDs of sessions that could not be saved, or whose saved state differs from what the
+        request saw (another worker's write was merged in), so the response no longer matches it
+    """
+    unit_of_work = g.pop('session_unit_of_work', None) if has_request_context() else None
+    if not unit_of_work:
+        return []
+    stale = []
+    for session_id, entry in unit_of_work.items():
+        if not entry['dirty']:
+            continue
+        state = entry['state']
+        seen = _comparable(state)  # What this request's response was built from
+        saved = False
+        for attempt in range(max_attempts):
+            try:
+                set_session_state(session_id, state)
+                saved = True
+                break
+            except SessionStateConflictError:
+                if attempt == max_attempts - 1:
+                    print(f"Error saving session {session_id}: modified concurrently {max_attempts} times")
+                    break
+                # Another worker wrote first: replay this request's changes on the latest state
+                state = _load_session_state(session_id)
+                state = state.copy() if state is not None else _new_session_state()
+                for mutate in entry['mutations']:
+                    mutate(state)
+        if not saved or _comparable(state) != seen:
+            stale.append(session_id)
+        increment("session_states.request_flushes")
+    return stale
+
+def init_session_unit_of_work(app):
+    """Flush coalesced session writes when each request ends"""
+    @app.after_request
+    def _flush_session_writes(response):
+        stale = flush_session_writes()  # Before the response is sent, so the next request sees the changes
+        if stale and response.status_code < 400:
+            # The response describes a state that was not stored as-is (the request's changes were replayed
+            # on another worker's write and kept); have the client reload the session rather than trust it
+            increment("session_states.stale_responses")
+            response = jsonify({"success": False, "message": "Session was updated by another request, please reload it"})
+            response.status_code = 409
+        return response
+    
+    @app.teardown_request
+    def _discard_session_writes(error=None):
+        g.pop('session_unit_of_work', None)  # Unhandled error: the request's changes are dropped
+
+def _get_session_questions(session_id, question_type):
+    """Get a session's questions of one type, picking and storing their IDs on first use"""
+    ids_field = SESSION_QUESTION_FIELDS[question_type]
+    max_questions = SESSION_QUESTION_LIMITS[question_type]
     state = get_session_state(session_id)  # Get current session state
     
-    # If we already have session questions, return them
-    if state['questions'] is not None:  # Check if questions already loaded
-        return state['questions']  # Return cached questions
-    
-    # Otherwise, randomize and store for this session
-    all_questions = load_questions()  # Load all questions from file
-    active_questions = [q for q in all_questions if q.get("active", True)]  # Filter active questions only
+    # If we already picked questions for this session, resolve their IDs
+    if state[ids_field] is not None:
+        return resolve_questions(question_type, state[ids_field])
     
-    # Randomize and select only MAX_QUESTIONS_PER_SESSION questions
-    if len(active_questions) > MAX_QUESTIONS_PER_SESSION:  # Check if we have too many questions
-        random.shuffle(active_questions)  # Randomize question order
-        active_questions = active_questions[:MAX_QUESTIONS_PER_SESSION]  # Limit to max questions per session
+    # Otherwise, sample IDs from the in-memory active pool and store them for this session
+    active_ids = sample_active_question_ids(question_type, max_questions, seed_key=session_id)
     
-    # Store for this session
-    state['questions'] = active_questions  # Cache questions for this session
-    set_session_state(session_id, state)  # Save updated state
-    return active_questions
+    # Store for this session (unless another worker picked them first)
+    def _store(state):
+        if state[ids_field] is None:
+            state[ids_field] = active_ids
+        return state[ids_field]
+    return resolve_questions(question_type, update_session_state(session_id, _store))
+
+def get_active_questions_for_session(session_id):
+    """Get active questions for a specific session (randomized once per session)"""
+    return _get_session_questions(session_id, 'speech')
 
 def reset_session_questions(session_id):
     """Reset session questions for new evaluation session"""
-    state = get_session_state(session_id)  # Get current session state (loads from MongoDB)
-    state['current_index'] = 0  # Reset to first question
-    state['has_answered'] = set()  # Clear answered questions tracking
-    set_session_state(session_id, state)  # Save reset state to MongoDB
+    def _reset(state):
+        state['current_index'] = 0  # Reset to first question
+        state['has_answered'] = set()  # Clear answered questions tracking
+    update_session_state(session_id, _reset)  # Save reset state to MongoDB
 
 def clear_session(session_id):
     """Clear session state for a specific session (from MongoDB and cache)"""
     # Remove from MongoDB
     session_states_collection.delete_one({'session_id': session_id})
     
-    # Remove from cache
-    if session_id in session_states_cache:
-        del session_states_cache[session_id] 
+    # Remove from cache (and from this request's pending writes)
+    session_states_cache.pop(session_id)
+    unit_of_work = _get_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.pop(session_id, None)
 
 def get_current_question_for_session(session_id):
     """Get current question for a specific session"""
@@ -148,20 +414,23 @@ def get_current_question_for_session(session_id):
 def move_to_next_question(session_id):
     """Move to next question for a session"""
     questions = get_active_questions_for_session(session_id)  # Get session questions
-    state = get_session_state(session_id)  # Get session state
-    current_index = state['current_index']  # Get current question index
-    
-    if not questions or current_index + 1 >= len(questions):  # Check if next question exists
-        return False  # Return False if no more questions
-    
-    # Mark current question as answered
-    state['has_answered'].add(current_index)  # Track that current question was answered
     
-    # Move to next question
-    state['current_index'] = current_index + 1  # Increment question index
-    set_session_state(session_id, state)  # Save updated state
+    def _advance(state):
+        current_index = state['current_index']  # Get current question index
+        if not questions or current_index + 1 >= len(questions):  # Check if next question exists
+            return False  # Return False if no more questions
+        
+        # Mark current question as answered
+        state['has_answered'].add(current_index)  # Track that current question was answered
+        
+        # Move to next question
+        state['current_index'] = current_index + 1  # Increment question index
+        return True
     
-    return True  # Return True if successfully moved to next question
+    state = get_session_state(session_id)
+    if not questions or state['current_index'] + 1 >= len(questions):
+        return False  # Nothing to write
+    return update_session_state(session_id, _advance)  # Return True if successfully moved to next question
 
 def get_question_by_index(session_id, index):
     """Get a specific question by index for a session"""
@@ -180,9 +449,7 @@ def get_question_by_index(session_id, index):
 
 def mark_question_answered(session_id, question_index):
     """Mark a question as answered for a session"""
-    state = get_session_state(session_id)  # Get current session state
-    state['has_answered'].add(question_index)  # Mark specific question as answered
-    set_session_state(session_id, state)  # Save updated state (persists to MongoDB)
+    update_session_state(session_id, lambda state: state['has_answered'].add(question_index))  # Persists to MongoDB
 
 def get_next_unanswered_question_index(session_id):
     """Get the index of the next unanswered question for resumption"""
@@ -202,12 +469,10 @@ def get_next_unanswered_question_index(session_id):
 
 def resume_session_from_last_checkpoint(session_id):
     """Resume session from the last unanswered question"""
-    state = get_session_state(session_id)
     next_index = get_next_unanswered_question_index(session_id)
     
     # Update current index to next unanswered question
-    state['current_index'] = next_index
-    set_session_state(session_id, state)
+    update_session_state(session_id, lambda state: state.update(current_index=next_index))
     
     return next_index
 
@@ -255,8 +520,9 @@ def mark_test_completed(session_id, test_type):
     
     # Only mark as completed if validation passed
     if should_mark_complete:
-        state['test_completion'][test_type] = True  # Mark test as completed
-        set_session_state(session_id, state)  # Save updated state
+        def _mark(state):
+            state.setdefault('test_completion', {})[test_type] = True  # Mark test as completed
+        update_session_state(session_id, _mark)  # Save updated state
         print(f"Successfully marked {test_type} test as completed")
     else:
         print(f"Test {test_type} cannot be marked as completed yet")
@@ -265,22 +531,13 @@ def mark_test_completed(session_id, test_type):
 
 def get_next_test_to_resume(session_id):
     """Get the next test that should be resumed for a session"""
-    state = get_session_state(session_id)  # Get current session state
-    if 'test_completion' not in state:  # Initialize if not exists
-        state['test_completion'] = {
-            'listening': False,
-            'written': False,
-            'speech': False,
-            'personality': False,
-            'typing': False
-        }
-        set_session_state(session_id, state)  # Save updated state
+    test_completion = get_session_state(session_id)['test_completion']  # Complete after schema migration
     
     test_order = ['listening', 'written', 'speech', 'personality', 'typing']  # Define test order
     
     # Find the first incomplete test
     for test_type in test_order:
-        if not state['test_completion'].get(test_type, False):
+        if not test_completion.get(test_type, False):
             return test_type  # Return first incomplete test
     
     # If all tests are completed, return None
@@ -288,64 +545,21 @@ def get_next_test_to_resume(session_id):
 
 def get_test_completion_status(session_id):
     """Get the completion status of all tests for a session"""
-    state = get_session_state(session_id)  # Get current session state
-    if 'test_completion' not in state:  # Initialize if not exists
-        state['test_completion'] = {
-            'listening': False,
-            'written': False,
-            'speech': False,
-            'personality': False,
-            'typing': False
-        }
-        set_session_state(session_id, state)  # Save updated state
-    
-    # Ensure all test types are present in existing sessions
-    if 'written' not in state['test_completion']:
-        state['test_completion']['written'] = False
-        set_session_state(session_id, state)
-    if 'personality' not in state['test_completion']:
-        state['test_completion']['personality'] = False
-        set_session_state(session_id, state)
-    
-    return state['test_completion'].copy()  # Return copy of completion status
+    return get_session_state(session_id)['test_completion'].copy()  # Return copy of completion status
 
 def get_active_listening_test_questions_for_session(session_id):
     """Get active listening test questions for a specific session (randomized once per session)"""
-    state = get_session_state(session_id)  # Get current session state
-    
-    # If we already have session listening questions, return them
-    if state['listening_questions'] is not None:  # Check if listening questions already loaded
-        return state['listening_questions']  # Return cached listening questions
-    
-    # Otherwise, randomize and store for this session
-    all_questions = load_listening_test_questions()  # Load all listening test questions
-    active_questions = [q for q in all_questions if q.get("active", True)]  # Filter active questions only
-    
-    # Randomize and select only 5 questions per session
-    if len(active_questions) > 5:  # Check if we have too many questions
-        random.shuffle(active_questions)  # Randomize question order
-        active_questions = active_questions[:5]  # Limit to 5 questions per session
-    
-    # Store for this session
-    state['listening_questions'] = active_questions  # Cache listening questions for this session
-    set_session_state(session_id, state)  # Save updated state
-    return active_questions  # Return active listening questions list
+    return _get_session_questions(session_id, 'listening')
 
 def get_active_listening_test_questions():
     """Get all active listening test questions (deprecated - use session-specific version)"""
     # This function is kept for backward compatibility but should not be used
     # for session-based question management to avoid duplicates
-    all_questions = load_listening_test_questions()  # Load all listening test questions
-    active_questions = [q for q in all_questions if q.get("active", True)]  # Filter active questions only
-    return active_questions  # Return active questions list without randomization
+    return resolve_questions('listening', get_active_question_ids('listening'))  # Return active questions list without randomization
 
 def get_listening_test_question_by_id(question_id):
     """Get a specific listening test question by ID"""
-    all_questions = load_listening_test_questions()  # Load all listening test questions
-    for question in all_questions:  # Iterate through questions
-        if question.get("id") == question_id:  # Check if ID matches
-            return question  # Return matching question
-    return None  # Return None if question not found
+    return get_catalog_question('listening', question_id)  # None if question not found
 
 def get_next_unanswered_listening_question_index(session_id):
     """Get the index of the next unanswered listening test question for resumption"""
@@ -366,33 +580,13 @@ def get_next_unanswered_listening_question_index(session_id):
 
 def resume_listening_session_from_last_checkpoint(session_id):
     """Resume listening test session from the last unanswered question"""
-    state = get_session_state(session_id)
     next_index = get_next_unanswered_listening_question_index(session_id)
     
     # Update current index to next unanswered question
-    state['listening_current_index'] = next_index
-    set_session_state(session_id, state)
+    update_session_state(session_id, lambda state: state.update(listening_current_index=next_index))
     
     return next_index
 
 def get_active_written_test_questions_for_session(session_id):
     """Get active written test questions for a specific session (randomized once per session)"""
-    state = get_session_state(session_id)  # Get current session state
-    
-    # If we already have session written questions, return them
-    if state['written_questions'] is not None:  # Check if written questions already loaded
-        return state['written_questions']  # Return cached written questions
-    
-    # Otherwise, randomize and store for this session
-    all_questions = load_written_test_questions()  # Load all written test questions
-    active_questions = [q for q in all_questions if q.get("active", True)]  # Filter active questions only
-    
-    # Randomize and select only 20 questions per session
-    if len(active_questions) > 20:  # Check if we have more than 20 questions
-        random.shuffle(active_questions)  # Randomize question order
-        active_questions = active_questions[:20]  # Limit to 20 questions per session
-    
-    # Store for this session
-    state['written_questions'] = active_questions  # Cache written questions for this session
-    set_session_state(session_id, state)  # Save updated state
-    return active_questions  # Return active written questions list 
\ No newline at end of file
+    return _get_session_questions(session_id, 'written')
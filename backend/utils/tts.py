@@ -1,20 +1,153 @@
-import pyttsx3
+"""Text-to-speech rendering through one pyttsx3 engine on a dedicated thread, with an on-disk audio cache"""
+
+import hashlib
+import os
+import queue
 import threading
+from concurrent.futures import Future
+import pyttsx3
 #import pythoncom
+from config import TTS_CACHE_DIR, TTS_QUEUE_MAXSIZE, TTS_VOICE, TTS_RATE
+from .audio_assets import get_audio_asset, register_audio_asset
+
+_render_queue = queue.Queue(maxsize=TTS_QUEUE_MAXSIZE)  # Bounded so bursts of /speak can't pile up threads
+# pyttsx3.init() hands every caller the same cached engine per driver, and its run loop is not
+# reentrant, so a single thread owns the engine and renders one request at a time
+_worker = None
+_worker_lock = threading.Lock()
+_pending_renders = {}  # audio_id -> Future, so concurrent requests for one prompt render it once
+_pending_lock = threading.Lock()
+
+
+class TTSQueueFullError(Exception):
+    """Raised when the render queue is full and the request should be retried later"""
+
+
+def get_speech_audio_id(text, voice=None, rate=None):
+    """Get the cache ID for a rendered prompt (keyed by text, voice and rate)"""
+    voice = voice or TTS_VOICE
+    rate = rate or TTS_RATE
+    digest = hashlib.sha1(f"{voice}\0{rate}\0{text}".encode("utf-8")).hexdigest()[:20]
+    return f"tts_{digest}"
+
+
+def get_cached_speech(text, voice=None, rate=None):
+    """Get the cached audio asset for a prompt, or None if it hasn't been rendered yet"""
+    return get_audio_asset(get_speech_audio_id(text, voice, rate))
+
+
+def _match_voice(voices, voice):
+    """ID of the first installed voice matching the preferred name, or None"""
+    voice_hints = [voice.lower(), "zira"]  # Fall back to the Windows female voice
+    for hint in voice_hints:
+        match = next((v for v in voices if hint in v.name.lower()), None)
+        if match:
+            return match.id
+    return None
+
+
+def _apply_settings(engine, voice_ids, voice, rate):
+    """Point the shared engine at a request's voice and rate (only on the render thread)"""
+    if voice not in voice_ids:
+        voice_ids[voice] = _match_voice(engine.getProperty('voices'), voice)  # Voice list scanned once per setting
+    if voice_ids[voice]:
+        engine.setProperty('voice', voice_ids[voice])  # Set preferred voice
+    engine.setProperty('rate', rate)
+
 
-def speak(text):
-    """Convert text to speech using pyttsx3"""
+def _render_to_file(engine, text, audio_id):
+    """Render text to a WAV file in the cache directory and index it"""
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    final_path = os.path.join(TTS_CACHE_DIR, f"{audio_id}.wav")
+    temp_path = os.path.join(TTS_CACHE_DIR, f"{audio_id}.{threading.get_ident()}.tmp.wav")
+    engine.save_to_file(text, temp_path)  # Queue rendering to file instead of speakers
+    engine.runAndWait()  # Wait for rendering to complete
+    os.replace(temp_path, final_path)  # Publish atomically so readers never see a partial file
+    return register_audio_asset("tts", final_path)
+
+
+def _worker_loop():
+    """Render queued prompts one at a time with the process's engine until the process exits"""
 #    pythoncom.CoInitialize()
-    engine = pyttsx3.init()  # Initialize text-to-speech engine
-    voices = engine.getProperty('voices')  # Get available voices
-    for voice in voices:
-        if "female" in voice.name.lower() or "zira" in voice.name.lower():  # Prefer female voice
-            engine.setProperty('voice', voice.id)  # Set preferred voice
-            break
-    engine.say(text)  # Queue text for speech
-    engine.runAndWait()  # Wait for speech to complete
- #   pythoncom.CoUninitialize()
-
-def speak_async(text):
-    """Convert text to speech asynchronously"""
-    threading.Thread(target=speak, args=(text,)).start()  # Start speech in background thread 
+    engine = None
+    voice_ids = {}  # voice name -> matched voice ID
+    while True:
+        text, voice, rate, audio_id, future = _render_queue.get()
+        try:
+            asset = get_audio_asset(audio_id)  # Rendered meanwhile (e.g. by another process sharing the cache)
+            if not asset:
+                if engine is None:
+                    engine = pyttsx3.init()  # Initialize text-to-speech engine
+                _apply_settings(engine, voice_ids, voice, rate)
+                asset = _render_to_file(engine, text, audio_id)
+            future.set_result(asset)
+        except Exception as e:
+            print(f"Error rendering text-to-speech {audio_id}: {e}")
+            future.set_exception(e)
+        finally:
+            with _pending_lock:
+                _pending_renders.pop(audio_id, None)
+            _render_queue.task_done()
+
+
+def _ensure_worker():
+    """Start the render thread on first use"""
+    global _worker
+    if _worker:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="tts-worker", daemon=True)
+            _worker.start()
+
+
+def render_speech_async(text, voice=None, rate=None):
+    """Queue a prompt for rendering and return a Future resolving to its audio asset"""
+    voice = voice or TTS_VOICE
+    rate = rate or TTS_RATE
+    audio_id = get_speech_audio_id(text, voice, rate)
+
+    asset = get_audio_asset(audio_id)
+    if asset:  # Already rendered, serve the cached file
+        future = Future()
+        future.set_result(asset)
+        return future
+
+    with _pending_lock:
+        future = _pending_renders.get(audio_id)
+        if future:  # Already queued by another request
+            return future
+        future = Future()
+        _ensure_worker()
+        try:
+            _render_queue.put_nowait((text, voice, rate, audio_id, future))
+        except queue.Full:
+            raise TTSQueueFullError("Text-to-speech queue is full")
+        _pending_renders[audio_id] = future
+    return future
+
+
+def render_speech(text, voice=None, rate=None, timeout=None):
+    """Render a prompt (or reuse the cached file) and return its audio asset"""
+    return render_speech_async(text, voice, rate).result(timeout=timeout)
+
+
+def prerender_question_audio(question_id, text):
+    """Render a speech question's prompt in the background and write its audio_id back when done"""
+    from .file_ops import set_question_audio_id
+    from .question_catalog import invalidate_question_catalog
+
+    def _on_rendered(future):
+        if future.exception():
+            return  # Already logged by the worker; the question keeps playing without audio
+        audio_id = future.result()["audio_id"]
+        if set_question_audio_id(question_id, text, audio_id):
+            invalidate_question_catalog("speech")  # Serve the new audio_id to sessions
+            print(f"Rendered audio {audio_id} for question {question_id}")
+
+    try:
+        render_speech_async(text).add_done_callback(_on_rendered)
+        return True
+    except TTSQueueFullError:
+        print(f"Warning: Text-to-speech queue full, audio for question {question_id} not rendered")
+        return False
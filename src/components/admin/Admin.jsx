@@ -8,6 +8,10 @@ import UserManagement from './UserManagement';
 
 const Admin = () => {
   const [applicants, setApplicants] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null); // Where the next "Load more" page starts (null when all loaded)
+  const [totalApplicants, setTotalApplicants] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [searching, setSearching] = useState(false); // First page reloading (the full-page spinner is only for the initial load)
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [selectedApplicant, setSelectedApplicant] = useState(null);
@@ -40,6 +44,8 @@ const Admin = () => {
   
   const AUTO_LOGOUT_TIME = 8 * 60 * 60 * 1000; // 8 hours in milliseconds
   const WARNING_TIME = 60 * 1000; // Show warning 1 minute before logout
+  const APPLICANT_PAGE_LIMIT = 50; // Applicants per server page ("Load more" fetches the next one)
+  const SEARCH_DEBOUNCE_MS = 300;
 
   // Configure axios to include auth token
   const getAuthHeaders = () => {
@@ -128,8 +134,7 @@ const Admin = () => {
       .then(response => {
         if (response.data.success) {
           setIsAuthenticated(true);
-          setCurrentUser(response.data.user);
-          fetchApplicants();
+          setCurrentUser(response.data.user); // The search effect loads the first page once authenticated
         } else {
           handleAutoLogout();
         }
@@ -195,6 +200,7 @@ const Admin = () => {
       });
       if (response.data.success) {
         setApplicants(applicants.filter(a => a.id !== applicantId));
+        setTotalApplicants(total => Math.max(0, total - 1));
         alert('Applicant deleted successfully!');
       } else {
         alert('Error deleting applicant: ' + response.data.message);
@@ -237,8 +243,6 @@ const Admin = () => {
         // Clear legacy storage
         localStorage.removeItem('adminAuthenticated');
         localStorage.removeItem('adminLastActivity');
-        
-        fetchApplicants();
       } else {
         setLoginError(response.data.message || 'Authentication failed');
       }
@@ -262,59 +266,75 @@ const Admin = () => {
     setShowLogoutWarning(false);
   };
 
+  const latestListRequestRef = useRef(0); // Ignores responses to searches the admin has already typed past
+
+  const fetchApplicantsPage = (cursor) => axios.get(`${API_URL}/admin/applicants`, {
+    headers: getAuthHeaders(),
+    params: { limit: APPLICANT_PAGE_LIMIT, ...(searchTerm.trim() ? { q: searchTerm.trim() } : {}), ...(cursor ? { cursor } : {}) }
+  });
+
+  const handleListError = (err) => {
+    console.error('Error fetching applicants:', err);
+    if (err.response && err.response.status === 401) {
+      handleAutoLogout();
+    } else if (err.response && err.response.status === 403) {
+      setError('You do not have permission to view applicants.');
+    } else {
+      setError('Error loading applicants data');
+    }
+  };
+
+  // First page only (searched on the server); older applicants come in through "Load more"
   const fetchApplicants = async () => {
+    const requestId = ++latestListRequestRef.current;
     try {
-      setLoading(true);
-      const response = await axios.get(`${API_URL}/admin/applicants`, {
-        headers: getAuthHeaders()
-      });
-      
-      if (response.data && response.data.applicants) {
-        setApplicants(response.data.applicants);
-      }
+      setSearching(true);
+      const response = await fetchApplicantsPage(null);
+      if (requestId !== latestListRequestRef.current) return;
+      setError(null);
+      setApplicants(response.data.applicants || []);
+      setNextCursor(response.data.next_cursor || null);
+      setTotalApplicants(response.data.total ?? (response.data.applicants || []).length);
     } catch (err) {
-      console.error('Error fetching applicants:', err);
-      if (err.response && err.response.status === 401) {
-        handleAutoLogout();
-      } else if (err.response && err.response.status === 403) {
-        setError('You do not have permission to view applicants.');
-      } else {
-        setError('Error loading applicants data');
+      if (requestId === latestListRequestRef.current) handleListError(err);
+    } finally {
+      if (requestId === latestListRequestRef.current) {
+        setSearching(false);
+        setLoading(false);
       }
+    }
+  };
+
+  const loadMoreApplicants = async () => {
+    if (!nextCursor || loadingMore) return;
+    const requestId = latestListRequestRef.current;
+    try {
+      setLoadingMore(true);
+      const response = await fetchApplicantsPage(nextCursor);
+      if (requestId !== latestListRequestRef.current) return; // The search changed meanwhile
+      setApplicants(prev => prev.concat(response.data.applicants || []));
+      setNextCursor(response.data.next_cursor || null);
+    } catch (err) {
+      handleListError(err);
     } finally {
-      setLoading(false);
+      setLoadingMore(false);
     }
   };
 
-  const filteredApplicants = applicants.filter(applicant => {
-    // Updated to handle new comprehensive applicant format
-    const firstName = applicant.applicant_info?.firstName || '';
-    const lastName = applicant.applicant_info?.lastName || '';
-    const fullName = `${lastName}, ${firstName}`.trim();
-    const email = applicant.applicant_info?.email || '';
-    const position = applicant.applicant_info?.positionApplied || '';
-    const cellphone = applicant.applicant_info?.cellphoneNumber || '';
-    
-    const searchLower = searchTerm.toLowerCase();
-    
-    const matchesSearch = 
-      fullName.toLowerCase().includes(searchLower) ||
-      firstName.toLowerCase().includes(searchLower) ||
-      lastName.toLowerCase().includes(searchLower) ||
-      email.toLowerCase().includes(searchLower) ||
-      position.toLowerCase().includes(searchLower) ||
-      cellphone.includes(searchTerm);
-      
-    return matchesSearch;
-  });
-  
+  // Load the first page after login and whenever the search changes (debounced)
+  useEffect(() => {
+    if (!isAuthenticated) return;
+    const timer = setTimeout(fetchApplicants, searchTerm ? SEARCH_DEBOUNCE_MS : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm, isAuthenticated]);
+
   // Calculate total pages
-  const totalPages = Math.ceil(filteredApplicants.length / itemsPerPage);
+  const totalPages = Math.ceil(applicants.length / itemsPerPage);
   
   // Get current page items
   const indexOfLastItem = currentPage * itemsPerPage;
   const indexOfFirstItem = indexOfLastItem - itemsPerPage;
-  const currentItems = filteredApplicants.slice(indexOfFirstItem, indexOfLastItem);
+  const currentItems = applicants.slice(indexOfFirstItem, indexOfLastItem);
   
   // Page change handler
   const handlePageChange = (pageNumber) => {
@@ -330,13 +350,36 @@ const Admin = () => {
 
 
 
+  const openApplicantDetails = async (applicant) => {
+    // The listing only has summaries; load the full record (evaluations, transcripts) for the modal
+    try {
+      const response = await axios.get(`${API_URL}/admin/applicants/${applicant.id}`, {
+        headers: getAuthHeaders()
+      });
+      if (response.data && response.data.success) {
+        setSelectedApplicant(response.data.applicant);
+      }
+    } catch (err) {
+      console.error('Error loading applicant details:', err);
+      if (err.response && err.response.status === 401) {
+        handleAutoLogout();
+      } else if (err.response && err.response.status === 404) {
+        alert('Applicant not found. It may have been deleted.');
+        fetchApplicants();
+      } else {
+        alert('Error loading applicant details');
+      }
+    }
+  };
+
   const getCompletionStatus = (applicant) => {
-    // New segmented format only
+    // Summaries carry per-test entry counts
+    const counts = applicant.test_counts || {};
     const hasEvaluations = (
-      (applicant.speech_eval && applicant.speech_eval.length > 0) ||
-      (applicant.listening_test && applicant.listening_test.length > 0) ||
-      (applicant.written_test && applicant.written_test.length > 0) ||
-      (applicant.typing_test && applicant.typing_test.length > 0)
+      (counts.speech_eval || 0) > 0 ||
+      (counts.listening_test || 0) > 0 ||
+      (counts.written_test || 0) > 0 ||
+      (counts.typing_test || 0) > 0
     );
     
     if (!hasEvaluations) return 'Not Started';
@@ -387,37 +430,16 @@ const Admin = () => {
     const positionType = applicant.applicant_info?.positionType || '';
     const isNonVoice = positionType.toLowerCase() === 'non-voice';
     
-    // Get scores for each test type
-    const speechScore = applicant.speech_eval && applicant.speech_eval.length > 0 
-      ? applicant.speech_eval.reduce((sum, evalItem) => sum + (evalItem.evaluation?.score || 0), 0) / applicant.speech_eval.length
-      : 0;
-    
-    const listeningScore = applicant.listening_test && applicant.listening_test.length > 0
-      ? applicant.listening_test.reduce((sum, evalItem) => sum + (evalItem.accuracy_percentage || 0), 0) / applicant.listening_test.length
-      : 0;
+    // Headline scores are averaged by the backend (missing entries count as 0)
+    const scores = applicant.scores || {};
+    const speechScore = scores.speech || 0;
+    const listeningScore = scores.listening || 0;
+    const writtenScore = scores.written || 0;
+    const typingScore = scores.typing || 0;
     
-    // Fixed written test score calculation
-    const writtenScore = applicant.written_test && applicant.written_test.length > 0
-      ? applicant.written_test.reduce((sum, evalItem) => sum + (evalItem.score_percentage || 0), 0) / applicant.written_test.length
-      : 0;
-    
-    const typingScore = applicant.typing_test && applicant.typing_test.length > 0
-      ? applicant.typing_test.reduce((sum, evalItem) => sum + (evalItem.words_per_minute || 0), 0) / applicant.typing_test.length
-      : 0;
-    
-    // Calculate personality score: categories passed / total categories
-    let personalityPassed = 0;
-    let personalityTotal = 0;
-    if (applicant.personality_test && applicant.personality_test.length > 0) {
-      const personalityData = applicant.personality_test[0]; // Get first personality test result
-      if (personalityData && personalityData.category_analysis) {
-        const categories = Object.keys(personalityData.category_analysis);
-        personalityTotal = categories.length;
-        personalityPassed = categories.filter(cat => 
-          personalityData.category_analysis[cat].passed === true
-        ).length;
-      }
-    }
+    // Personality score: categories passed / total categories in the first result
+    const personalityPassed = scores.personality_passed || 0;
+    const personalityTotal = scores.personality_total || 0;
     
     // Calculate merged score based on position type
     // Note: listeningScore is in percentage (0-100), so divide by 10 to get 0-10 scale
@@ -542,7 +564,7 @@ const Admin = () => {
       <div className="admin-tabs">
       <div className="stat-card">
               <h3>Total Applicants:</h3>
-              <span className="stat-number">{applicants.length}</span>
+              <span className="stat-number">{totalApplicants}</span>
             </div>
         <button 
           className={`tab-button ${activeTab === 'applicants' ? 'active' : ''}`}
@@ -610,13 +632,13 @@ const Admin = () => {
               </button>
             </div>
             
-            <button onClick={fetchApplicants} className="refresh-button">
-              Refresh
+            <button onClick={fetchApplicants} className="refresh-button" disabled={searching}>
+              {searching ? 'Loading...' : 'Refresh'}
             </button>
           </div>
 
           <div className={viewMode === 'grid' ? 'applicants-grid' : 'applicants-list'}>
-            {filteredApplicants.length === 0 ? (
+            {applicants.length === 0 ? (
               <div className="no-applicants">
                 <p>No applicants found matching your criteria.</p>
               </div>
@@ -690,7 +712,7 @@ const Admin = () => {
 
                     <div className="applicant-actions">
                       <button
-                        onClick={() => setSelectedApplicant(applicant)}
+                        onClick={() => openApplicantDetails(applicant)}
                         className="view-details-button"
                       >
                         📋 Details
@@ -816,7 +838,7 @@ const Admin = () => {
                       
                       <div className="list-item-content actions">
                         <button
-                          onClick={() => setSelectedApplicant(applicant)}
+                          onClick={() => openApplicantDetails(applicant)}
                           className="list-action-button details-button"
                           title="View Details"
                         >
@@ -840,7 +862,7 @@ const Admin = () => {
           </div>
           
           {/* Pagination Controls */}
-          {filteredApplicants.length > 0 && (
+          {applicants.length > 0 && (
             <div className="pagination-controls">
               <button 
                 onClick={() => handlePageChange(1)} 
@@ -898,6 +920,19 @@ const Admin = () => {
               </select>
             </div>
           )}
+
+          {nextCursor && (
+            <div className="pagination-controls">
+              <button
+                onClick={loadMoreApplicants}
+                disabled={loadingMore}
+                className="pagination-button load-more-button"
+                title="Load older applicants"
+              >
+                {loadingMore ? 'Loading...' : `Load more (${applicants.length} of ${totalApplicants} shown)`}
+              </button>
+            </div>
+          )}
         </>
       )}
 
@@ -368,7 +368,13 @@ const EvaluationPage = ({ onComplete, onNext }) => {
         averageScore: res.data.evaluation?.score || prev.averageScore
       }));
     } catch (err) {
-      alert("Error during evaluation: " + err.message);
+      if (err.response?.data?.rerecord) {
+        // Recording failed the server-side quality check; let the applicant record again
+        setHasAnswered(false);
+        alert(err.response.data.message);
+      } else {
+        alert("Error during evaluation: " + err.message);
+      }
     }
     setLoading(false);
   };
@@ -13,6 +13,7 @@
     const [currentQuestion, setCurrentQuestion] = useState('');
   const [currentAudioId, setCurrentAudioId] = useState('');
   const [audioElement, setAudioElement] = useState(null);
+  const [audioSprite, setAudioSprite] = useState(null); // All of the session's clips in one file (sprite mode only)
 
     const [currentQuestionIndex, setCurrentQuestionIndex] = useState(0);
     const [totalQuestions, setTotalQuestions] = useState(0);
@@ -39,6 +40,7 @@
     const canvasRef = useRef(null);
     const dataArrayRef = useRef(null);
     const stopButtonRef = useRef(null);
+    const spriteAudioRef = useRef(null);
 
       // Initialize listening test when component mounts
   useEffect(() => {
@@ -47,6 +49,21 @@
     }
   }, [applicantInfo, sessionId]);
 
+  // Start downloading the sprite as soon as we know about it, so every question plays without a fetch
+  useEffect(() => {
+    if (audioSprite) {
+      const audio = new Audio(`${API_URL}${audioSprite.url}`);
+      audio.preload = 'auto';
+      spriteAudioRef.current = audio;
+    }
+    return () => {
+      if (spriteAudioRef.current) {
+        spriteAudioRef.current.pause();
+        spriteAudioRef.current = null;
+      }
+    };
+  }, [audioSprite]);
+
   // Cleanup audio element when component unmounts
   useEffect(() => {
     return () => {
@@ -135,6 +152,7 @@
           if (questionResponse.data.text) {
             setCurrentQuestion(questionResponse.data.text);
             setCurrentAudioId(questionResponse.data.audio_id || '');
+            setAudioSprite(questionResponse.data.sprite || null); // Only present when sprite mode is enabled
             setCurrentQuestionIndex(0);
             setHasPlayedAudio(false); // Reset audio played state for first question
             
@@ -150,12 +168,54 @@
       }
     };
 
+    // Play one question's segment of the sprite, stopping at its end (the gap after it absorbs timeupdate lag)
+    const playSpriteSegment = async (segment) => {
+      const audio = spriteAudioRef.current;
+      if (audio.readyState < 1) {
+        await new Promise((resolve, reject) => {
+          audio.addEventListener('loadedmetadata', resolve, { once: true });
+          audio.addEventListener('error', reject, { once: true });
+          audio.load();
+        });
+      }
+
+      const finish = () => {
+        audio.pause();
+        audio.ontimeupdate = null;
+        audio.onended = null;
+        setIsPlaying(false);
+        setAudioElement(null);
+        setHasPlayedAudio(true); // Mark audio as played
+      };
+      audio.ontimeupdate = () => {
+        if (audio.currentTime >= segment.end) finish();
+      };
+      audio.onended = finish;
+      audio.onerror = () => {
+        setError('Failed to play audio file. Please try again.');
+        setIsPlaying(false);
+        setAudioElement(null);
+      };
+
+      audio.currentTime = segment.start;
+      setAudioElement(audio);
+      await audio.play();
+    };
+
     const playQuestion = async () => {
       if (!currentAudioId || hasPlayedAudio) return;
       
       try {
         setIsPlaying(true);
         
+        // Sprite mode: play this question's slice of the already downloaded sprite
+        const segment = audioSprite && spriteAudioRef.current
+          && audioSprite.segments.find(s => s.audio_id === currentAudioId);
+        if (segment) {
+          await playSpriteSegment(segment);
+          return;
+        }
+        
         // Get the audio URL from the backend
         const response = await axios.post(`${API_URL}/speak-audio`, {
           id: currentAudioId
@@ -305,7 +365,11 @@
         
       } catch (err) {
         console.error('Error evaluating recording:', err);
-        setError('Failed to evaluate recording. Please try again.');
+        if (err.response?.data?.rerecord) {
+          setError(err.response.data.message);
+        } else {
+          setError('Failed to evaluate recording. Please try again.');
+        }
         setSubmissionComplete(false); // Hide submission complete on error
       } finally {
         setLoading(false);
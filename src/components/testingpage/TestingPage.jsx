@@ -39,13 +39,14 @@ const TestingPage = () => {
   // Check test completion status and resume from appropriate test
   const checkTestCompletionStatus = async () => {
     try {
-      const response = await fetch(`${API_URL}/get_test_completion_status?session_id=${sessionId}`);
+      // One progress snapshot covers completion flags and the test to resume from
+      const response = await fetch(`${API_URL}/session_progress?session_id=${sessionId}`);
       
       if (response.ok) {
         const result = await response.json();
         
         if (result.success) {
-          const completionStatus = result.completion_status;
+          const completionStatus = result.test_completion;
           console.log('Test completion status:', completionStatus);
           
           // Update local test progress state
@@ -57,21 +58,13 @@ const TestingPage = () => {
             typing: { completed: completionStatus.typing, score: 0 }
           });
           
-          // Determine which test to resume from
-          let nextTest = 'listening';
-          if (completionStatus.listening && !completionStatus.written) {
-            nextTest = 'written';
-          } else if (completionStatus.listening && completionStatus.written && !completionStatus.speech) {
-            nextTest = 'speech';
-          } else if (completionStatus.listening && completionStatus.written && completionStatus.speech && !completionStatus.personality) {
-            nextTest = 'personality';
-          } else if (completionStatus.listening && completionStatus.written && completionStatus.speech && completionStatus.personality && !completionStatus.typing) {
-            nextTest = 'typing';
-          } else if (completionStatus.listening && completionStatus.written && completionStatus.speech && completionStatus.personality && completionStatus.typing) {
+          // Resume from the first incomplete test
+          if (result.all_complete) {
             // All tests completed, navigate to completion page
             navigate('/completion');
             return;
           }
+          const nextTest = result.next_test;
           
           setCurrentTest(nextTest);
           console.log(`Resuming from ${nextTest} test`);